@@ -3,23 +3,19 @@ import csv
 import re
 import time
 from bs4 import BeautifulSoup
+import stage_profile
+from records import LinkBatch, ResultBatch
+from ru_match import matcher_for
+import hedged_fetch
+import crawl_plan
+import search_adapters
 
-# 使用你提供的 cURL 信息
-COOKIES = {
-    'spid': '1768719007602_ec7647d43c8221785c41e5e8a154c79b_0dfdfrbr7k084j27',
-    'domain_sid': 'gqjJ2jhW0FbDn3dJcilUO:1768719026120',
-    'ma_id_api': 'z2NSv23Rdi7/Vql34KxC5spuDJavtr8fv9GDKh/9fhaXSkHozbQ7haiXZH/89yYHxQlitSXeMCQvNdZnASSvrUJyArT3nacd9V+dqG+1BTSq/x9iH/v3n9oXK8a6GTFvnbMblBG2MioRajTztVsslqPZ/8wMGZsPn1RFrsiNi5Z2U34IwAEQj3S3wf+Q7MscVFa1BM75u88cvgLCDxVcx9++LJabxiQFspxPX+2uA7yD/ClVI5BcRtnfsu1N3oBdyfGh8O3our6U2O9J9Tchl1G9tlW0GKrsQmYToM2Cd+PytgoWY5epBkdN07n3P+Qj0cGxCIol7ABXa81g95B/VQ==',
-}
-
-HEADERS = {
-    'accept': '*/*',
-    'accept-language': 'en,zh-CN;q=0.9,zh;q=0.8',
-    'referer': 'https://tass.ru/',
-    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36',
-}
+# 使用你提供的 cURL 信息：cookie / 请求头放在 search_adapters.py，搜索适配器和 crawl_plan.py 共用同一份
+COOKIES = search_adapters.TASS_COOKIES
+HEADERS = search_adapters.TASS_HEADERS
 
 def get_tass_links(query, total_limit=50):
-    all_links = []
+    all_links = LinkBatch()  # 按 URL 去重
     search_after = None
     api_url = "https://tass.ru/tbp/api/v1/search"
 
@@ -48,8 +44,7 @@ def get_tass_links(query, total_limit=50):
                 path = item.get('url', '')
                 if path:
                     full_url = "https://tass.ru" + path if path.startswith('/') else path
-                    if full_url not in [l['url'] for l in all_links]:
-                        all_links.append({'url': full_url, 'title': item.get('title', '')})
+                    all_links.add(item.get('title', ''), full_url)
                 if len(all_links) >= total_limit: break
 
             print(f"✅ 已抓取 {len(all_links)} 条链接")
@@ -72,7 +67,7 @@ def get_tass_links(query, total_limit=50):
 def extract_sentences(url, keyword):
     """提取正文匹配句"""
     try:
-        res = requests.get(url, headers=HEADERS, timeout=10)
+        res = hedged_fetch.get(url, headers=HEADERS, timeout=10)
         res.encoding = 'utf-8'
         soup = BeautifulSoup(res.text, 'html.parser')
         # TASS 常用正文容器
@@ -80,33 +75,40 @@ def extract_sentences(url, keyword):
         text = content.get_text(" ", strip=True) if content else soup.get_text(" ", strip=True)
         
         sentences = re.split(r'[.!?。！？]+', text)
-        return [s.strip() for s in sentences if keyword.lower() in s.lower() and len(s.strip()) > 5]
+        matcher = matcher_for(keyword)
+        return [s.strip() for s in sentences if matcher.search(s) and len(s.strip()) > 5]
     except:
         return []
 
 def main():
     keyword = "Huawei"
-    links = get_tass_links(keyword, total_limit=50)
+    if crawl_plan.requested() is not None:  # --plan：只试算请求数和耗时，不开始抓取
+        crawl_plan.run_plan("https://tass.ru/search?search=" + keyword, limit=50, pacing=(1, 0.5))
+        return
+
+    with stage_profile.stage('discover'):
+        links = get_tass_links(keyword, total_limit=50)
     
     if not links:
         print("🛑 抓取失败，请检查关键词或 Cookie。")
         return
 
-    final_data = []
-    for i, item in enumerate(links, 1):
-        print(f"[{i}/{len(links)}] 正在提取正文: {item['url']}")
-        matches = extract_sentences(item['url'], keyword)
-        for s in matches:
-            final_data.append([i, item['url'], s, keyword])
+    final_data = ResultBatch(links.pool)
+    for i, (title, url) in enumerate(links, 1):
+        print(f"[{i}/{len(links)}] 正在提取正文: {url}")
+        with stage_profile.stage('extract'):
+            matches = extract_sentences(url, keyword)
+        final_data.extend(url, matches, title=title, keyword=keyword, article=i)
         time.sleep(0.5)
 
     if final_data:
         fname = f"tass_{keyword}_results.csv"
-        with open(fname, 'w', encoding='utf-8-sig', newline='') as f:
+        with stage_profile.stage('write'), open(fname, 'w', encoding='utf-8-sig', newline='') as f:
             writer = csv.writer(f)
             writer.writerow(['序号', '链接', '匹配语句', '关键词'])
-            writer.writerows(final_data)
+            writer.writerows([r.article, r.url, r.sentence, r.keyword] for r in final_data)
         print(f"\n✨ 任务完成！保存至: {fname}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage_profile.from_argv():
+        main()
\ No newline at end of file
@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+离线基准测试：本地回放服务 + 故障注入，在没有网络的机器上可复现地测量各条流水线。
+
+1. 录制（只需联网一次）：回放服务在录制模式下把未命中的请求转发到真实站点并存入 bench_fixtures/
+    python bench_replay.py record rt --limit 20
+    python bench_replay.py record kommersant --limit 20
+    python bench_replay.py record tass --limit 20
+2. 回放（不访问外网）：按配置注入延迟、带宽限制、429 / 403 突发和人机验证页
+    python bench_replay.py run rt --latency 80 --bandwidth 500000 --burst-every 30 --burst-len 3
+    python bench_replay.py run kommersant --captcha-rate 0.05 --rate-403 0.02
+
+被测进程里给 requests 挂一个传输适配器（ReplayAdapter）：URL 保持原站地址，
+只把连接接到本地回放服务，Host 头照原站发送，回放服务按 Host 分站点。
+这样 stream_fetch / link_filter / 代理池 / 对冲请求 / 指标里按站点区分的逻辑和线上走同一条路径，
+流水线代码本身不做任何修改。结果报告：文章数/秒、每篇 CPU 时间、峰值内存、请求与拦截次数。
+"""
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import crawl_metrics as metrics
+import stage_profile
+from link_source import iter_links
+from records import ResultBatch
+
+# --- 配置 ---
+FIXTURES_DIR = "bench_fixtures"
+HOSTS = ['tass.ru', 'russian.rt.com', 'www.kommersant.ru', 'translate.google.com']
+SEARCH_URLS = {
+    'rt': "https://russian.rt.com/search?q=Huawei&type=&df=2020-01-18&dt=2026-01-18",
+    'kommersant': "https://www.kommersant.ru/search/results?search_query=Huawei&sort_type=0&search_full=1&time_range=2&dateStart=2020-01-02&dateEnd=2026-02-02",
+}
+TASS_LINK_FILE = "urls.txt"
+KEYWORD = "Huawei"
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+CAPTCHA_PAGE = b'<html><body><h1>captcha</h1><form>Please confirm you are not a robot</form></body></html>'
+
+
+class FixtureStore:
+    """录制结果：index.json 记录 host + 路径 → 文件 / 状态码 / Content-Type"""
+
+    def __init__(self, root=FIXTURES_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, 'index.json')
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {}
+
+    @staticmethod
+    def key(host, path):
+        return f"{host}{path}"
+
+    def get(self, host, path):
+        entry = self.index.get(self.key(host, path))
+        if entry is None:
+            return None
+        with open(os.path.join(self.root, entry['file']), 'rb') as f:
+            return entry['status'], entry['content_type'], f.read()
+
+    def put(self, host, path, status, content_type, body):
+        name = hashlib.sha1(self.key(host, path).encode('utf-8')).hexdigest() + '.bin'
+        with open(os.path.join(self.root, name), 'wb') as f:
+            f.write(body)
+        with self.lock:
+            self.index[self.key(host, path)] = {
+                'file': name, 'status': status, 'content_type': content_type}
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=1)
+
+
+class FaultInjector:
+    """按配置决定每个请求的“命运”：正常 / 429 突发 / 403 / 人机验证页"""
+
+    def __init__(self, faults, seed=42):
+        self.faults = faults
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.count = 0
+        self.burst_left = 0
+
+    def decide(self):
+        f = self.faults
+        with self.lock:
+            self.count += 1
+            if self.burst_left > 0:
+                self.burst_left -= 1
+                return '429'
+            if f.get('burst_every') and self.count % f['burst_every'] == 0:
+                self.burst_left = max(0, f.get('burst_len', 1) - 1)
+                return '429'
+            roll = self.random.random()
+            if roll < f.get('rate_403', 0):
+                return '403'
+            if roll < f.get('rate_403', 0) + f.get('captcha_rate', 0):
+                return 'captcha'
+            return 'ok'
+
+    def latency(self):
+        base = self.faults.get('latency_ms', 0) / 1000.0
+        with self.lock:
+            return base * self.random.uniform(0.5, 1.5)
+
+
+def _make_handler(store, faults, record):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            host = self.headers.get('Host', '').split(':')[0].lower()
+            if host not in HOSTS:
+                self._send(404, 'text/plain', b'unknown host')
+                return
+            time.sleep(faults.latency())
+            action = faults.decide()
+            if action in ('429', '403'):
+                self._send(int(action), 'text/html', b'<html>blocked</html>', {'Retry-After': '5'})
+                return
+            if action == 'captcha':
+                self._send(200, 'text/html; charset=utf-8', CAPTCHA_PAGE)
+                return
+            hit = store.get(host, self.path)
+            if hit is None and record:
+                hit = self._record(host)
+            if hit is None:
+                self._send(404, 'text/plain', b'not recorded')
+                return
+            self._send(*hit)
+
+        def _record(self, host):
+            url = f"https://{host}{self.path}"
+            req = Request(url, headers={'User-Agent': USER_AGENT})
+            try:
+                with urlopen(req, timeout=30) as resp:
+                    hit = (resp.status, resp.headers.get('Content-Type', 'text/html'), resp.read())
+            except HTTPError as e:
+                hit = (e.code, e.headers.get('Content-Type', 'text/html'), e.read())
+            except OSError as e:
+                print(f"  ❌ 录制失败 {url}: {e}")
+                return None
+            store.put(host, self.path, *hit)
+            return hit
+
+        def _send(self, status, content_type, body, extra=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for k, v in (extra or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            bandwidth = faults.faults.get('bandwidth', 0)
+            if not bandwidth:
+                self.wfile.write(body)
+                return
+            chunk = 8192
+            for i in range(0, len(body), chunk):
+                self.wfile.write(body[i:i + chunk])
+                time.sleep(min(chunk, len(body) - i) / bandwidth)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return ReplayHandler
+
+
+def _serve(fixtures_dir, faults, record, port_queue):
+    """回放服务进程：一个端口，按 Host 头区分站点"""
+    store = FixtureStore(fixtures_dir)
+    injector = FaultInjector(faults, faults.get('seed', 42))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(store, injector, record))
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_replay_server(fixtures_dir=FIXTURES_DIR, faults=None, record=False):
+    """在子进程中启动回放服务（不占用被测进程的 CPU / 内存），返回 (进程, 端口)"""
+    port_queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_serve, args=(fixtures_dir, faults or {}, record, port_queue),
+                                   daemon=True)
+    proc.start()
+    return proc, port_queue.get(timeout=30)
+
+
+class ReplayAdapter(HTTPAdapter):
+    """
+    requests 传输适配器：连接改接到本地回放服务，Host 头和对外可见的 URL 保持原站地址。
+    代理池给出的 proxies 在这里忽略（回放时没有真实出口），其余按原样走 requests 的完整流程。
+    """
+
+    def __init__(self, port):
+        super().__init__()
+        self.port = port
+
+    def send(self, request, **kwargs):
+        original = request.url
+        parts = urlsplit(original)
+        request.headers['Host'] = parts.netloc
+        request.url = urlunsplit(('http', f'127.0.0.1:{self.port}', parts.path or '/', parts.query, ''))
+        kwargs['proxies'] = None
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            request.url = original
+        response.url = original
+        return response
+
+
+@contextlib.contextmanager
+def replay_transport(port, hosts=HOSTS):
+    """被测进程内所有 requests 会话对 hosts 的请求都经 ReplayAdapter 回放"""
+    adapter = ReplayAdapter(port)
+    get_adapter = requests.Session.get_adapter
+
+    def replay_get_adapter(session, url):
+        if (urlsplit(url).hostname or '').lower() in hosts:
+            return adapter
+        return get_adapter(session, url)
+
+    requests.Session.get_adapter = replay_get_adapter
+    try:
+        yield adapter
+    finally:
+        requests.Session.get_adapter = get_adapter
+        adapter.close()
+
+
+# --- 各条流水线：extract_article_links → extract_sentences* → CSV ---
+def pipeline_rt(limit, out_file):
+    import extract_keywords as ek
+    links = ek.extract_article_links(SEARCH_URLS['rt'], limit=limit)
+    results = ResultBatch()
+    for link in links:
+        results.extend(link, ek.extract_sentences_with_keyword(link, KEYWORD, stream=True), keyword=KEYWORD)
+    ek.save_results_to_csv(results, KEYWORD, out_file)
+    return len(links), len(results)
+
+
+def pipeline_kommersant(limit, out_file):
+    import extract_keywords_v3 as v3
+    links = v3.extract_article_links(SEARCH_URLS['kommersant'], limit=limit)
+    results = ResultBatch()
+    for link in links:
+        results.extend(link, v3.extract_sentences_with_keyword(link, KEYWORD), keyword=KEYWORD)
+    v3.save_results_to_csv(results, KEYWORD, out_file)
+    return len(links), len(results)
+
+
+def pipeline_tass(limit, out_file):
+    import shoudongtass_v4 as v4
+    links = list(itertools.islice(iter_links(TASS_LINK_FILE), limit))
+    count = 0
+    with open(out_file, 'w', encoding='utf-8-sig', newline='') as f_out:
+        writer = csv.writer(f_out)
+        writer.writerow(['序号', '链接', '标题', '匹配语料'])
+        for title, url in links:
+            for s in v4.extract_sentences(v4.get_with_retry(url)[0]):
+                count += 1
+                writer.writerow([count, url, title, s])
+    return len(links), count
+
+
+PIPELINES = {'rt': pipeline_rt, 'kommersant': pipeline_kommersant, 'tass': pipeline_tass}
+
+
+def run_benchmark(name, port, limit=None, with_pacing=False):
+    """跑一遍流水线（请求经 replay_transport 接到 port 上的回放服务）并返回报告"""
+    metrics.REGISTRY.reset()
+    metrics.PACING_ENABLED = with_pacing
+    out_file = os.path.join(tempfile.gettempdir(), f"bench_{name}.csv")
+    cpu_start = time.process_time()
+    wall_start = time.time()
+    with replay_transport(port):
+        articles, sentences = PIPELINES[name](limit, out_file)
+    wall = time.time() - wall_start
+    cpu = time.process_time() - cpu_start
+    snap = metrics.REGISTRY.snapshot()
+    sleep_total = sum(v for k, v in snap['counters'].items() if k.startswith('crawl_sleep_seconds_total'))
+    blocked = sum(v for k, v in snap['counters'].items() if k.startswith('crawl_blocked_total'))
+    requests_total = sum(v for k, v in snap['counters'].items() if k.startswith('crawl_requests_total'))
+    return {
+        'pipeline': name,
+        'articles': articles,
+        'sentences': sentences,
+        'wall_seconds': round(wall, 3),
+        'articles_per_sec': round(articles / wall, 3) if wall else None,
+        'cpu_ms_per_article': round(cpu * 1000 / articles, 2) if articles else None,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'requests': requests_total,
+        'blocked': blocked,
+        'pacing_seconds_skipped': 0 if with_pacing else round(sleep_total, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线基准测试')
+    parser.add_argument('mode', choices=['record', 'run'])
+    parser.add_argument('pipeline', choices=sorted(PIPELINES))
+    parser.add_argument('--limit', type=int, default=20, help='最多处理多少篇文章')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--latency', type=float, default=0, help='平均延迟（毫秒）')
+    parser.add_argument('--bandwidth', type=int, default=0, help='带宽（字节/秒），0 为不限')
+    parser.add_argument('--burst-every', type=int, default=0, help='每多少个请求触发一次 429 突发')
+    parser.add_argument('--burst-len', type=int, default=3, help='每次突发连续返回多少个 429')
+    parser.add_argument('--rate-403', type=float, default=0)
+    parser.add_argument('--captcha-rate', type=float, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--with-pacing', action='store_true', help='保留脚本中的礼貌休眠')
+    parser.add_argument('--out', help='报告追加写入的 JSON Lines 文件')
+    args = parser.parse_args()
+
+    faults = {}
+    if args.mode == 'run':
+        faults = {
+            'latency_ms': args.latency, 'bandwidth': args.bandwidth,
+            'burst_every': args.burst_every, 'burst_len': args.burst_len,
+            'rate_403': args.rate_403, 'captcha_rate': args.captcha_rate, 'seed': args.seed,
+        }
+    proc, port = start_replay_server(args.fixtures, faults, record=args.mode == 'record')
+    print(f"🧪 回放服务已启动（{'录制' if args.mode == 'record' else '回放'}模式）: 127.0.0.1:{port}")
+    try:
+        report = run_benchmark(args.pipeline, port, args.limit,
+                               with_pacing=args.with_pacing or args.mode == 'record')
+    finally:
+        proc.terminate()
+
+    report['faults'] = faults
+    print("\n📊 基准测试结果：")
+    for k, v in report.items():
+        print(f"  {k}: {v}")
+    if args.out:
+        with open(args.out, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report, ensure_ascii=False) + '\n')
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
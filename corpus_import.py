@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+数据/ 语料的批量导入与合并去重。
+
+数据/ 下是手工整理的三种格式：
+    tass数据 / rt数据   序号,链接,标题,匹配语料
+    生意人报数据         序号,来源URL,语句内容,关键词
+    tass链接 / rt链接    标题,链接（每行一条，标题里粘着日期）
+补充文件（例如 tass20-21补.csv）与主文件有重叠，序号按文件各自从 1 开始。
+
+本脚本流式读取所有文件，统一列名、规范化 URL、剥离标题中粘连的日期，
+用外部排序（分段排序写盘 + heapq 多路归并）按 (链接, 语句) 去重，内存占用与语料规模无关；
+输出一份重新编号的合并语料、一份合并链接表和按来源 / 时间段的汇总。
+
+可重复运行、增量：每个输入文件排好序的分段按内容哈希缓存在 <输出目录>/runs/，
+清单 manifest.json 记录文件大小和修改时间；新增年份文件后再次运行只解析新文件，再重新归并。
+
+命令：
+    python corpus_import.py                       # 数据/ → 数据汇总/
+    python corpus_import.py --data-dir 数据 --out-dir 数据汇总 --run-size 50000
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import heapq
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+
+import stage_profile
+from date_bucket import DateContext, split_title_date, detect_window
+from link_source import canonical_url, parse_line
+
+# --- 配置 ---
+DATA_DIR = "数据"
+OUT_DIR = "数据汇总"
+RUN_SIZE = 50000              # 每个排序分段的记录数（决定内存上限）
+DEFAULT_KEYWORD = "Huawei"
+
+# 目录名前缀 → 来源名
+SOURCE_DIRS = [('生意人报', '生意人报'), ('tass', 'tass'), ('rt', 'rt')]
+SOURCE_ORDER = {'tass': 0, 'rt': 1, '生意人报': 2}
+SPACE_RE = re.compile(r'\s+')
+
+CORPUS_HEADER = ['序号', '来源', '时间段', '链接', '标题', '发布日期', '匹配语料', '关键词', '原文件', '原序号']
+LINKS_HEADER = ['序号', '来源', '时间段', '链接', '标题', '发布日期', '原文件', '原行号']
+SUMMARY_HEADER = ['类型', '来源', '时间段', '文件数', '原始行数', '空行', '重复', '保留', '文章数']
+
+# 记录统一为列表，便于写 JSON Lines：
+# 0 类型(corpus/links) 1 来源 2 时间段 3 原文件 4 原行号 5 链接 6 标题 7 发布日期 8 语句 9 关键词 10 去重键
+KIND, SOURCE, WINDOW, FILE, ROW, URL, TITLE, DATE, TEXT, KEYWORD, NORM = range(11)
+
+
+def normalize_text(text):
+    """合并空白（生意人报的语句里常有大段换行）"""
+    return SPACE_RE.sub(' ', text or '').strip()
+
+
+def dedup_key(text):
+    return normalize_text(text).casefold().replace('ё', 'е')
+
+
+def detect_source(path):
+    folder = os.path.basename(os.path.dirname(path))
+    name = os.path.basename(path)
+    for prefix, source in SOURCE_DIRS:
+        if folder.startswith(prefix) or name.startswith(prefix):
+            return source
+    return folder or 'unknown'
+
+
+def _date_context(window):
+    return DateContext(window=window or None)
+
+
+def _split_title(title, context):
+    """剥离标题里的日期；不落在文件所属时间段内的日期（例如只有“18:30”被当成今天）由 context 丢弃"""
+    clean, date = split_title_date(title, context)
+    return clean, date.isoformat() if date else ''
+
+
+def iter_data_file(path):
+    """流式读取一个语料 CSV，产出统一格式的记录；空语句也产出（NORM 为空），用于统计"""
+    source, window = detect_source(path), detect_window(path)
+    rel = os.path.relpath(path)
+    context = _date_context(window)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        for i, row in enumerate(reader, 1):
+            text = normalize_text(row.get('匹配语料') or row.get('语句内容') or row.get('匹配语句'))
+            url = canonical_url(row.get('链接') or row.get('来源URL') or row.get('原链接'))
+            title, date = _split_title(normalize_text(row.get('标题')), context)
+            keyword = (row.get('关键词') or DEFAULT_KEYWORD).strip()
+            yield ['corpus', source, window, rel, i, url, title, date, text, keyword,
+                   dedup_key(text) if text else '']
+
+
+def iter_link_file(path):
+    source, window = detect_source(path), detect_window(path)
+    rel = os.path.relpath(path)
+    context = _date_context(window)
+    with open(path, 'r', encoding='utf-8') as f:
+        for i, line in enumerate(f, 1):
+            record, problem = parse_line(line)
+            if record is None:
+                if problem:
+                    yield ['links', source, window, rel, i, '', '', '', '', '', '']
+                continue
+            title, date = _split_title(record.title, context)
+            yield ['links', source, window, rel, i, canonical_url(record.url), title, date, '', '', '#']
+
+
+def _dedup_sort_key(r):
+    return (r[KIND], r[URL], r[NORM], SOURCE_ORDER.get(r[SOURCE], 9), r[WINDOW], r[FILE], r[ROW])
+
+
+def _output_sort_key(r):
+    return (r[KIND], SOURCE_ORDER.get(r[SOURCE], 9), r[WINDOW], r[FILE], r[ROW])
+
+
+def _write_run(records, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False) + '\n')
+    return path
+
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def sorted_runs(records, key, run_dir, prefix, run_size=RUN_SIZE):
+    """把记录切成每段 run_size 条、排好序写盘，返回分段文件列表"""
+    runs = []
+    buf = []
+    for r in records:
+        buf.append(r)
+        if len(buf) >= run_size:
+            buf.sort(key=key)
+            runs.append(_write_run(buf, os.path.join(run_dir, f"{prefix}-{len(runs)}.jsonl")))
+            buf = []
+    if buf or not runs:
+        buf.sort(key=key)
+        runs.append(_write_run(buf, os.path.join(run_dir, f"{prefix}-{len(runs)}.jsonl")))
+    return runs
+
+
+def merge_runs(runs, key):
+    """多路归并已排序的分段，同时只在内存中保留每段的一条记录"""
+    return heapq.merge(*(_read_run(p) for p in runs), key=key)
+
+
+def _file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def prepare_runs(paths, out_dir, run_size=RUN_SIZE):
+    """
+    为每个输入文件准备按去重键排好序的分段，未变化的文件直接复用缓存
+    返回 (全部分段, 新解析或已删除的文件数, 清单)
+    """
+    run_dir = os.path.join(out_dir, 'runs')
+    os.makedirs(run_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, 'manifest.json')
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+    except FileNotFoundError:
+        old = {}
+
+    manifest = {}
+    parsed = 0
+    for path in paths:
+        rel = os.path.relpath(path)
+        stat = os.stat(path)
+        entry = old.get(rel)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime \
+                and all(os.path.exists(p) for p in entry['runs']):
+            manifest[rel] = entry
+            continue
+        digest = _file_digest(path)
+        if entry and entry['sha1'] == digest and all(os.path.exists(p) for p in entry['runs']):
+            entry.update(size=stat.st_size, mtime=stat.st_mtime)
+            manifest[rel] = entry
+            continue
+        if entry:
+            for p in entry['runs']:
+                if os.path.exists(p):
+                    os.remove(p)
+        records = iter_link_file(path) if path.endswith('.txt') else iter_data_file(path)
+        runs = sorted_runs(records, _dedup_sort_key, run_dir, digest, run_size)
+        manifest[rel] = {'sha1': digest, 'size': stat.st_size, 'mtime': stat.st_mtime, 'runs': runs}
+        parsed += 1
+        print(f"  📄 已解析 {rel}")
+
+    # 已删除的输入文件：清理它们的缓存分段
+    for rel, entry in old.items():
+        if rel not in manifest:
+            parsed += 1
+            for p in entry['runs']:
+                if os.path.exists(p):
+                    os.remove(p)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    all_runs = [p for entry in manifest.values() for p in entry['runs']]
+    return all_runs, parsed, manifest
+
+
+def dedup(records, stats):
+    """输入按去重键有序，同键只保留第一条（来源 / 时间段 / 文件 / 行号最靠前的那条）"""
+    last = None
+    for r in records:
+        group = (r[KIND], r[SOURCE], r[WINDOW])
+        stats[group + ('原始行数',)] += 1
+        if not r[NORM] or not r[URL]:
+            stats[group + ('空行',)] += 1
+            continue
+        key = (r[KIND], r[URL], r[NORM])
+        if key == last:
+            stats[group + ('重复',)] += 1
+            continue
+        last = key
+        stats[group + ('保留',)] += 1
+        yield r
+
+
+def build(data_dir=DATA_DIR, out_dir=OUT_DIR, run_size=RUN_SIZE, force=False):
+    paths = sorted(glob.glob(os.path.join(data_dir, '*', '*.csv')) +
+                   glob.glob(os.path.join(data_dir, '*', '*.txt')))
+    if not paths:
+        print(f"🛑 {data_dir} 下没有找到 CSV / 链接文件")
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"🚀 共 {len(paths)} 个输入文件")
+    with stage_profile.stage('parse'):
+        runs, parsed, manifest = prepare_runs(paths, out_dir, run_size)
+    outputs = [os.path.join(out_dir, n) for n in ('corpus.csv', 'links.csv', 'summary.csv')]
+    if not parsed and not force and all(os.path.exists(p) for p in outputs):
+        print("✅ 输入文件没有变化，无需重新合并（加 --force 强制）")
+        return
+
+    files_per_group = Counter()
+    for rel in manifest:
+        kind = 'links' if rel.endswith('.txt') else 'corpus'
+        files_per_group[(kind, detect_source(rel), detect_window(rel))] += 1
+
+    stats = Counter()
+    articles = {}
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp_dir, stage_profile.stage('write'):
+        # 第一次归并：按去重键，去掉重复；第二次外部排序：恢复 来源 / 时间段 / 原顺序
+        kept = dedup(merge_runs(runs, _dedup_sort_key), stats)
+        ordered = merge_runs(sorted_runs(kept, _output_sort_key, tmp_dir, 'kept', run_size), _output_sort_key)
+        with open(outputs[0], 'w', encoding='utf-8-sig', newline='') as f_corpus, \
+                open(outputs[1], 'w', encoding='utf-8-sig', newline='') as f_links:
+            w_corpus, w_links = csv.writer(f_corpus), csv.writer(f_links)
+            w_corpus.writerow(CORPUS_HEADER)
+            w_links.writerow(LINKS_HEADER)
+            n_corpus = n_links = 0
+            for r in ordered:
+                group = (r[KIND], r[SOURCE], r[WINDOW])
+                urls = articles.setdefault(group, set())
+                urls.add(r[URL])
+                if r[KIND] == 'corpus':
+                    n_corpus += 1
+                    w_corpus.writerow([n_corpus, r[SOURCE], r[WINDOW], r[URL], r[TITLE], r[DATE],
+                                       r[TEXT], r[KEYWORD], r[FILE], r[ROW]])
+                else:
+                    n_links += 1
+                    w_links.writerow([n_links, r[SOURCE], r[WINDOW], r[URL], r[TITLE], r[DATE],
+                                      r[FILE], r[ROW]])
+
+    groups = sorted({k[:3] for k in stats} | set(files_per_group),
+                    key=lambda g: (g[0], SOURCE_ORDER.get(g[1], 9), g[2]))
+    with open(outputs[2], 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(SUMMARY_HEADER)
+        for g in groups:
+            writer.writerow(list(g) + [files_per_group[g]] +
+                            [stats[g + (col,)] for col in ('原始行数', '空行', '重复', '保留')] +
+                            [len(articles.get(g, ()))])
+
+    print(f"\n📊 合并语料 {n_corpus} 条 → {outputs[0]}")
+    print(f"📊 合并链接 {n_links} 条 → {outputs[1]}")
+    for g in groups:
+        if g[0] == 'corpus':
+            print(f"  {g[1]} {g[2]}: 原始 {stats[g + ('原始行数',)]} 条，空行 {stats[g + ('空行',)]}，"
+                  f"重复 {stats[g + ('重复',)]}，保留 {stats[g + ('保留',)]}，文章 {len(articles.get(g, ()))} 篇")
+    print(f"✓ 汇总已写入: {outputs[2]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据/ 语料批量导入与合并去重')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--out-dir', default=OUT_DIR)
+    parser.add_argument('--run-size', type=int, default=RUN_SIZE, help='每个排序分段的记录数')
+    parser.add_argument('--force', action='store_true', help='输入没有变化也重新合并')
+    args = parser.parse_args()
+    build(args.data_dir, args.out_dir, args.run_size, args.force)
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
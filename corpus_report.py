@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+语料统计与抓取核对报告：自动生成 数据/数据结果说明.txt 那样的核对结果。
+
+按列（pandas）读入 数据/ 下全部语料 CSV 和链接文件，向量化计算：
+* 每个来源 / 时间段的链接数、站点导航链接数、搜索结果数、有命中的文章数、语句数、命中率；
+* 关键词出现次数（KEYWORDS 中每种写法分别统计）、每篇文章命中语句数的分布；
+* 链接文件与输出文件对比：没有任何命中的文章（关键词漏检号 = 链接文件中的行号），
+  以及 work_queue 数据库里标记为 failed 的链接。
+
+站点导航链接不靠手工数：同一来源的链接文件里，出现在一半以上文件中的 URL 视为导航（TASS 每个文件 34 个）。
+
+依赖：pip install pandas
+命令：
+    python corpus_report.py                            # 写出 数据结果报告.txt 和 漏检明细.csv
+    python corpus_report.py --db crawl_queue.db --out 报告.txt
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+import stage_profile
+from corpus_import import detect_source, detect_window, SOURCE_ORDER
+
+# --- 配置 ---
+DATA_DIR = "数据"
+DB_FILE = "crawl_queue.db"
+REPORT_FILE = "数据结果报告.txt"
+MISSED_FILE = "漏检明细.csv"
+KEYWORDS = ["Huawei", "Хуавэй", "Хуавей", "华为"]
+CHROME_SHARE = 0.5          # 出现在超过这个比例的同来源链接文件中的 URL 视为站点导航
+HIT_BINS = [0, 1, 2, 4, 6, 11, float('inf')]
+HIT_LABELS = ['1', '2-3', '4-5', '6-10', '>10']
+
+COLUMN_MAP = {
+    '链接': 'url', '来源URL': 'url', '原链接': 'url',
+    '匹配语料': 'sentence', '语句内容': 'sentence', '匹配语句': 'sentence',
+    '标题': 'title', '关键词': 'keyword',
+}
+GLUED_URL_RE = r'^.+(?=https://)'     # https://tass.ruhttps://tassphoto.com/ru → 取最后一个 https://
+
+
+def _repair_urls(urls):
+    return urls.str.strip().str.replace(GLUED_URL_RE, '', regex=True)
+
+
+def load_outputs(data_dir=DATA_DIR):
+    """读入全部语料 CSV，统一为 source / window / file / url / title / sentence / keyword 列"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(data_dir, '*', '*.csv'))):
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+        df = df.rename(columns=COLUMN_MAP).reindex(columns=['url', 'title', 'sentence', 'keyword'],
+                                                   fill_value='')
+        df['source'] = detect_source(path)
+        df['window'] = detect_window(path)
+        df['file'] = os.path.basename(path)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=['url', 'title', 'sentence', 'keyword', 'source', 'window', 'file'])
+    df = pd.concat(frames, ignore_index=True)
+    df['url'] = _repair_urls(df['url'])
+    df['sentence'] = df['sentence'].str.strip()
+    return df
+
+
+def load_links(data_dir=DATA_DIR):
+    """读入全部链接文件，每行一条：source / window / file / line / title / url / chrome"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(data_dir, '*', '*.txt'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = pd.Series(f.read().splitlines(), dtype=str)
+        parts = lines.str.rsplit(',', n=1, expand=True)
+        if parts.shape[1] < 2:
+            continue
+        df = pd.DataFrame({'line': range(1, len(lines) + 1), 'title': parts[0], 'url': parts[1]})
+        df = df[df['url'].notna()]
+        df['source'] = detect_source(path)
+        df['window'] = detect_window(path)
+        df['file'] = os.path.basename(path)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=['line', 'title', 'url', 'source', 'window', 'file', 'chrome'])
+    df = pd.concat(frames, ignore_index=True)
+    df['url'] = _repair_urls(df['url'])
+    df = df[df['url'].str.startswith('http')]
+
+    # 站点导航：同一来源中出现在过半链接文件里的 URL（文件数太少时不判断）
+    files = df.groupby('source')['file'].nunique()
+    spread = df.drop_duplicates(['source', 'file', 'url']).groupby(['source', 'url']).size()
+    share = spread / files.reindex(spread.index.get_level_values('source')).to_numpy()
+    enough = (files.reindex(spread.index.get_level_values('source')) >= 3).to_numpy()
+    chrome = share[(share > CHROME_SHARE) & enough].index
+    df['chrome'] = pd.MultiIndex.from_frame(df[['source', 'url']]).isin(chrome)
+    return df
+
+
+def load_failed(db_file=DB_FILE):
+    """work_queue 数据库中最终失败的链接"""
+    if not db_file or not os.path.exists(db_file):
+        return pd.DataFrame(columns=['url', 'title', 'error', 'attempts'])
+    with sqlite3.connect(db_file) as conn:
+        return pd.read_sql_query(
+            "SELECT url, title, error, attempts FROM tasks WHERE status = 'failed'", conn)
+
+
+def reconcile(outputs, links, failed):
+    """
+    返回 (每个来源/时间段的统计表, 漏检明细表, 关键词统计表, 命中分布表)
+    """
+    hits = outputs[outputs['sentence'] != '']
+    per_article = hits.groupby(['source', 'window', 'url']).size().rename('sentences').reset_index()
+
+    stats = per_article.groupby(['source', 'window']).agg(
+        articles=('url', 'size'), sentences=('sentences', 'sum'),
+        median_per_article=('sentences', 'median'), max_per_article=('sentences', 'max'))
+
+    content = links[~links['chrome']]
+    link_stats = links.groupby(['source', 'window']).agg(links=('url', 'size'), chrome=('chrome', 'sum'))
+    link_stats['search_results'] = content.groupby(['source', 'window'])['url'].nunique()
+    stats = link_stats.join(stats, how='outer')
+
+    # 链接文件里有、输出里没有任何命中的文章
+    hit_keys = pd.MultiIndex.from_frame(per_article[['source', 'window', 'url']])
+    content_keys = pd.MultiIndex.from_frame(content[['source', 'window', 'url']])
+    missed = content[~content_keys.isin(hit_keys)].copy()
+    missed['failed'] = missed['url'].isin(failed['url'])
+    missed = missed.merge(failed[['url', 'error']], on='url', how='left')
+    stats['missed'] = missed.groupby(['source', 'window']).size()
+    stats['failed'] = missed[missed['failed']].groupby(['source', 'window']).size()
+    stats['hit_rate'] = stats['articles'] / stats['search_results']
+    stats = stats.fillna({'links': 0, 'chrome': 0, 'search_results': 0, 'articles': 0,
+                          'sentences': 0, 'missed': 0, 'failed': 0})
+
+    # 关键词：每种写法在语句中出现的次数（不区分大小写）
+    keyword_counts = pd.DataFrame({
+        kw: hits['sentence'].str.count('(?i)' + kw).groupby([hits['source'], hits['window']]).sum()
+        for kw in KEYWORDS})
+
+    # 每篇文章命中语句数的分布
+    bins = pd.cut(per_article['sentences'], HIT_BINS, right=False, labels=['0'] + HIT_LABELS)
+    distribution = per_article.groupby(['source', 'window', bins], observed=False).size().unstack(fill_value=0)
+    distribution = distribution.drop(columns='0', errors='ignore')
+    return stats, missed, keyword_counts, distribution
+
+
+def _ordered(index):
+    return sorted(index, key=lambda k: (SOURCE_ORDER.get(k[0], 9), k[1]))
+
+
+def render_report(stats, missed, keyword_counts, distribution, elapsed=None):
+    """与 数据/数据结果说明.txt 相同的写法，一个来源 / 时间段一行"""
+    lines = [f"# 自动生成于 {time.strftime('%Y-%m-%d %H:%M:%S')}", '']
+    chrome = stats.groupby(level='source')['chrome'].max()
+    for source in sorted(chrome.index, key=lambda s: SOURCE_ORDER.get(s, 9)):
+        if chrome[source]:
+            lines.append(f"{source} 每个链接文件含 {int(chrome[source])} 个站点导航链接（已排除）")
+    lines.append('')
+
+    current = None
+    for key in _ordered(stats.index):
+        source, window = key
+        if current is not None and source != current:
+            lines.append('')
+        current = source
+        row = stats.loc[key]
+        search = f"搜索结果{int(row['search_results'])}" if row['links'] else "搜索结果-"
+        part = [f"{source}{window}", search, f"实际爬取结果{int(row['articles'])}篇/{int(row['sentences'])}句"]
+        if row['links']:
+            part.append(f"命中率{row['hit_rate']:.1%}")
+            rows = missed[(missed['source'] == source) & (missed['window'] == window)]
+            if len(rows):
+                numbers = ' '.join(
+                    f"{n}" if not f.endswith('补.txt') else f"补{n}"
+                    for f, n in zip(rows['file'], rows['line']))
+                part.append(f"关键词漏检号{numbers}")
+            else:
+                part.append("关键词漏检号无")
+            part.append(f"失败链接{int(row['failed'])}")
+        lines.append('  '.join(part))
+
+    lines += ['', '# 关键词出现次数']
+    for key in _ordered(keyword_counts.index):
+        counts = '  '.join(f"{kw} {int(n)}" for kw, n in keyword_counts.loc[key].items() if n)
+        lines.append(f"{key[0]}{key[1]}  {counts}")
+
+    lines += ['', '# 每篇文章命中语句数分布（篇）', '来源时间段  ' + '  '.join(distribution.columns.astype(str))]
+    for key in _ordered(distribution.index):
+        lines.append(f"{key[0]}{key[1]}  " + '  '.join(str(int(n)) for n in distribution.loc[key]))
+
+    if elapsed is not None:
+        lines += ['', f"# 用时 {elapsed:.2f} 秒"]
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='语料统计与抓取核对报告')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--db', default=DB_FILE, help='work_queue 数据库，用于列出失败链接')
+    parser.add_argument('--out', default=REPORT_FILE)
+    parser.add_argument('--missed', default=MISSED_FILE, help='漏检明细 CSV')
+    args = parser.parse_args()
+
+    start = time.time()
+    with stage_profile.stage('parse'):
+        outputs = load_outputs(args.data_dir)
+        links = load_links(args.data_dir)
+        failed = load_failed(args.db)
+    with stage_profile.stage('classify'):
+        stats, missed, keyword_counts, distribution = reconcile(outputs, links, failed)
+    report = render_report(stats, missed, keyword_counts, distribution, time.time() - start)
+
+    with stage_profile.stage('write'):
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(report)
+        missed.rename(columns={
+            'source': '来源', 'window': '时间段', 'file': '链接文件', 'line': '行号',
+            'title': '标题', 'url': '链接', 'failed': '抓取失败', 'error': '错误'
+        })[['来源', '时间段', '链接文件', '行号', '标题', '链接', '抓取失败', '错误']] \
+            .to_csv(args.missed, index=False, encoding='utf-8-sig')
+    print(report)
+    print(f"✓ 报告已写入: {args.out}，漏检明细: {args.missed}")
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
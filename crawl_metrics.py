@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+抓取指标：按阶段（discover / fetch / classify / parse / extract / write）和站点统计
+计数器与直方图，可以用 Prometheus 文本格式对外暴露，也可以定时写成 JSON Lines。
+
+用法（在其他脚本里）：
+    import crawl_metrics as metrics
+    metrics.serve(9108)                         # http://localhost:9108/metrics
+    metrics.start_json_dump('metrics.jsonl')    # 每 30 秒追加一行快照
+    with metrics.timer('fetch', host):
+        ...
+    metrics.record_fetch(host, status, elapsed, nbytes)
+    metrics.sleep(3, host)                      # 代替 time.sleep，单独统计休眠时间
+
+命令（查看某次运行写出的 JSON Lines 的最后一条快照）：
+    python crawl_metrics.py metrics.jsonl
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import stage_profile
+
+STAGES = ('discover', 'fetch', 'classify', 'parse', 'extract', 'write')
+
+# 为 False 时 sleep() 只记账不真正休眠（离线基准测试用，见 bench_replay.py）
+PACING_ENABLED = True
+
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _buckets_for(name):
+    if name.endswith('_bytes'):
+        return BYTES_BUCKETS
+    if name.endswith('_seconds'):
+        return SECONDS_BUCKETS
+    return COUNT_BUCKETS
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _label_text(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in key) + '}'
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """按桶线性插值估算分位数"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+            if seen + n >= target and n:
+                return lower + (upper - lower) * (target - seen) / n
+            seen += n
+            lower = upper
+        return self.bounds[-1]
+
+
+class MetricsRegistry:
+    """线程安全的指标注册表"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}     # (name, labels) -> value
+        self.histograms = {}   # (name, labels) -> Histogram
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(_buckets_for(name))
+            hist.observe(value)
+
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            for (name, key), value in sorted(self.counters.items()):
+                lines.append(f"{name}{_label_text(key)} {value}")
+            for (name, key), hist in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip(hist.bounds, hist.counts):
+                    cumulative += n
+                    le_key = key + (('le', str(bound)),)
+                    lines.append(f"{name}_bucket{_label_text(le_key)} {cumulative}")
+                le_key = key + (('le', '+Inf'),)
+                lines.append(f"{name}_bucket{_label_text(le_key)} {hist.count}")
+                lines.append(f"{name}_sum{_label_text(key)} {hist.sum}")
+                lines.append(f"{name}_count{_label_text(key)} {hist.count}")
+            lines.append(f"crawl_uptime_seconds {time.time() - self.started}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """汇总成便于阅读的字典：计数、p50 / p95、请求速率"""
+        now = time.time()
+        with self.lock:
+            uptime = now - self.started
+            counters = {name + _label_text(key): value for (name, key), value in self.counters.items()}
+            hists = {}
+            for (name, key), hist in self.histograms.items():
+                hists[name + _label_text(key)] = {
+                    'count': hist.count,
+                    'sum': round(hist.sum, 4),
+                    'p50': hist.quantile(0.5),
+                    'p95': hist.quantile(0.95),
+                }
+            requests_total = sum(v for (name, _), v in self.counters.items()
+                                 if name == 'crawl_requests_total')
+        return {
+            'ts': round(now, 3),
+            'uptime': round(uptime, 3),
+            'requests_per_sec': round(requests_total / uptime, 4) if uptime else 0.0,
+            'counters': counters,
+            'histograms': hists,
+        }
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def inc(name, value=1, **labels):
+    REGISTRY.inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    REGISTRY.observe(name, value, **labels)
+
+
+@contextmanager
+def timer(stage, host=None):
+    """统计一个阶段的耗时和次数；开启 --profile 时同时作为剖析阶段"""
+    start = time.time()
+    try:
+        with stage_profile.stage(stage):
+            yield
+    finally:
+        REGISTRY.observe('crawl_stage_seconds', time.time() - start, stage=stage, host=host)
+        REGISTRY.inc('crawl_stage_total', stage=stage, host=host)
+
+
+def record_fetch(host, status, elapsed, nbytes=None):
+    """记录一次 HTTP 请求：状态码、耗时、字节数；429 / 403 单独计数"""
+    REGISTRY.inc('crawl_requests_total', host=host, status=status)
+    REGISTRY.observe('crawl_fetch_seconds', elapsed, host=host)
+    if nbytes is not None:
+        REGISTRY.observe('crawl_response_bytes', nbytes, host=host)
+    if status in (403, 429):
+        REGISTRY.inc('crawl_blocked_total', host=host, status=status)
+
+
+def sleep(seconds, host=None, reason='pacing'):
+    """代替 time.sleep：休眠时间单独统计，便于区分“在等”和“在干活”"""
+    if seconds <= 0:
+        return
+    REGISTRY.inc('crawl_sleep_seconds_total', seconds, host=host, reason=reason)
+    if PACING_ENABLED:
+        time.sleep(seconds)
+
+
+def serve(port=9108, host='0.0.0.0'):
+    """后台线程暴露 /metrics（Prometheus 文本格式）和 /metrics.json"""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/metrics.json'):
+                body = json.dumps(REGISTRY.snapshot(), ensure_ascii=False).encode('utf-8')
+                ctype = 'application/json; charset=utf-8'
+            elif self.path.startswith('/metrics'):
+                body = REGISTRY.render_prometheus().encode('utf-8')
+                ctype = 'text/plain; version=0.0.4; charset=utf-8'
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', ctype)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📈 指标接口: http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def start_json_dump(path='metrics.jsonl', interval=30):
+    """后台线程每 interval 秒追加一行快照；返回的 Event 置位即停止（停止前再写一次）"""
+    stopped = threading.Event()
+
+    def run():
+        while True:
+            done = stopped.wait(interval)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(REGISTRY.snapshot(), ensure_ascii=False) + '\n')
+            if done:
+                break
+
+    threading.Thread(target=run, daemon=True).start()
+    return stopped
+
+
+def print_summary(snapshot=None):
+    """按阶段打印耗时汇总"""
+    snap = snapshot or REGISTRY.snapshot()
+    print(f"\n📊 运行 {snap['uptime']:.0f} 秒 | 请求速率 {snap['requests_per_sec']} 次/秒")
+    for name, h in sorted(snap['histograms'].items()):
+        p50 = f"{h['p50']:.3f}" if h['p50'] is not None else '-'
+        p95 = f"{h['p95']:.3f}" if h['p95'] is not None else '-'
+        print(f"  {name}: n={h['count']} sum={h['sum']} p50={p50} p95={p95}")
+    for name, value in sorted(snap['counters'].items()):
+        if name.startswith(('crawl_blocked_total', 'crawl_sleep_seconds_total')):
+            print(f"  {name}: {round(value, 2)}")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("用法: python crawl_metrics.py metrics.jsonl")
+        return
+    last = None
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    if last is None:
+        print("📭 文件中没有快照。")
+        return
+    print_summary(last)
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+抓取计划 / 试算：正式开跑前估算请求数、流量和耗时。
+
+大规模抓取前不知道一个查询要跑 20 分钟还是 20 小时。其实需要的数字都拿得到：
+搜索页上的“Результатов: около N”、TASS 接口的 has_more / total、各脚本里的翻页和文章间隔。
+本脚本对每个来源 / 时间段只发第一个搜索请求：
+* 读出结果总数和每页条数，按时间段（date_bucket 的年份划分）拆开 df/dt、dateStart/dateEnd 分别试算；
+* 用第一页的链接估计有多少文章已经抓过（数据/*链接、work_queue / recrawl 数据库），只计新文章；
+* 按配置的翻页 / 文章间隔、实测的平均耗时和字节数（metrics.jsonl，没有时用默认值）
+  估算每个阶段（discover / fetch / extract）的请求数、流量和耗时；
+* 给定时间预算时，建议每个出口的并发数和分片数（分片 = 多个出口 / 多台机器，见 work_queue.py）。
+
+命令：
+    python crawl_plan.py "https://russian.rt.com/search?q=Huawei&df=2020-01-18&dt=2026-01-18" --budget 2
+    python extract_keywords.py --plan            # 各抓取脚本加 --plan 只输出计划，不开始抓取
+    python 11.py --plan --budget=0.5
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+
+import crawl_metrics as metrics
+import stage_profile
+import search_adapters
+from date_bucket import BUCKET_START, bucket_label
+from link_filter import rule_verdict
+from link_source import iter_links, canonical_url
+from stream_fetch import response_encoding
+
+# --- 配置 ---
+METRICS_FILE = "metrics.jsonl"        # 有历史运行指标时用实测的平均耗时 / 字节数
+SEEN_LINK_FILES = ["数据/*链接/*.txt"]
+SEEN_DATABASES = ["crawl_queue.db", "recrawl.db"]
+# 各站点的（翻页间隔, 文章间隔）秒数，与对应抓取脚本一致；脚本调用时会传入自己的值
+PACING = {
+    'russian.rt.com': (0.6, 1.0),       # extract_keywords.py
+    'www.kommersant.ru': (3.5, 1.15),   # extract_keywords_v3.py
+    'tass.ru': (1.0, 0.5),              # 11.py
+}
+DEFAULT_PACING = (1.0, 1.0)
+DEFAULT_LATENCY = 1.5                 # 秒 / 请求
+DEFAULT_ARTICLE_BYTES = 180 * 1024
+CPU_PER_ARTICLE = 0.02                # 分句匹配、写盘（秒 / 篇）
+MAX_PER_HOST = 4                      # 单个出口对同一站点的最大并发，超过就要分片换出口
+UNKNOWN_PAGES = 10                    # 读不到结果总数且还有下一页时，按这么多页估算
+# 搜索日期参数（开始, 结束, 日期格式）
+DATE_PARAMS = {
+    'russian.rt.com': ('df', 'dt', '%Y-%m-%d'),
+    'www.kommersant.ru': ('dateStart', 'dateEnd', '%Y-%m-%d'),
+}
+# 数字只允许按千分组（“1 234”），否则会连上后面的分页链接（“143 1 2” → 14312）
+NUMBER = r'(\d{1,3}(?:[ \u00a0]\d{3})*)(?!\d)'
+TOTAL_PATTERNS = [
+    re.compile(r'Результатов:\s*около\s*' + NUMBER, re.I),
+    re.compile(r'Найдено\s*:?\s*' + NUMBER, re.I),
+]
+TOTAL_KEYS = ('total', 'Total', 'total_count', 'count', 'found')
+HTML_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+}
+
+
+def requested(argv=None):
+    """
+    抓取脚本里调用：命令行带 --plan 时返回预算小时数（没有 --budget 时为 0），否则返回 None
+    例：python 11.py --plan --budget=2 或 python 11.py --plan --budget 2
+    """
+    argv = sys.argv if argv is None else argv
+    if '--plan' not in argv:
+        return None
+    budget = 0.0
+    for i, arg in enumerate(argv):
+        if arg.startswith('--budget='):
+            value = arg.split('=', 1)[1]
+        elif arg == '--budget':
+            value = argv[i + 1] if i + 1 < len(argv) else ''
+        else:
+            continue
+        try:
+            budget = float(value)
+        except ValueError:
+            raise SystemExit(f"❌ --budget 需要小时数，例如 --budget=2（收到: {value!r}）")
+    return budget
+
+
+# --- 已抓链接与历史指标 ---
+
+def load_seen(link_files=SEEN_LINK_FILES, databases=SEEN_DATABASES):
+    """已经抓过 / 已在队列中的链接（规范化 URL）"""
+    seen = {canonical_url(r.url) for r in iter_links(link_files, dedup=False, verbose=False)}
+    for db, sql in zip(databases, ("SELECT url FROM tasks", "SELECT url FROM pages")):
+        if os.path.exists(db):
+            with sqlite3.connect(db) as conn:
+                try:
+                    seen.update(canonical_url(r[0]) for r in conn.execute(sql))
+                except sqlite3.DatabaseError:
+                    pass
+    return seen
+
+
+def load_history(path=METRICS_FILE):
+    """metrics.jsonl 最后一条快照 → {站点: {'latency': 平均秒数, 'bytes': 平均字节数}}"""
+    if not path or not os.path.exists(path):
+        return {}
+    last = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                last = line
+    if last is None:
+        return {}
+    hists = json.loads(last).get('histograms', {})
+    history = defaultdict(dict)
+    for name, h in hists.items():
+        m = re.match(r'(crawl_fetch_seconds|crawl_response_bytes)\{.*host="([^"]+)"', name)
+        if m and h['count']:
+            key = 'latency' if m.group(1) == 'crawl_fetch_seconds' else 'bytes'
+            history[m.group(2)][key] = h['sum'] / h['count']
+    return dict(history)
+
+
+# --- 时间段拆分与探测 ---
+
+def split_windows(search_url):
+    """按 date_bucket 的时间段拆分搜索日期范围，返回 [(时间段, 搜索地址)]；没有日期参数时原样返回"""
+    parts = urlsplit(search_url)
+    conf = DATE_PARAMS.get(parts.netloc.lower())
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    if conf is None or not query.get(conf[0]) or not query.get(conf[1]):
+        return [('', search_url)]
+    start_key, end_key, fmt = conf
+    try:
+        start = datetime.datetime.strptime(query[start_key], fmt).date()
+        end = datetime.datetime.strptime(query[end_key], fmt).date()
+    except ValueError:
+        return [('', search_url)]
+    windows = []
+    cursor = start
+    while cursor <= end:
+        month, day = BUCKET_START
+        label = bucket_label(cursor)
+        nxt = datetime.date(2000 + int(label[3:]), month, day)
+        stop = min(end, nxt - datetime.timedelta(days=1))
+        q = dict(query, **{start_key: cursor.strftime(fmt), end_key: stop.strftime(fmt)})
+        windows.append((label, urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(q), ''))))
+        cursor = nxt
+    return windows
+
+
+def _parse_total(text):
+    for pattern in TOTAL_PATTERNS:
+        m = pattern.search(text)
+        if m:
+            digits = re.sub(r'\D', '', m.group(1))
+            if digits:
+                return int(digits)
+    return None
+
+
+def probe(search_url):
+    """
+    只发第一个搜索请求
+
+    返回:
+        dict: total（None 表示读不到）/ per_page / has_more / urls / latency / bytes / status
+    """
+    host = urlsplit(search_url).netloc.lower()
+    result = {'total': None, 'per_page': 0, 'has_more': False, 'urls': [], 'latency': None,
+              'bytes': 0, 'status': None}
+    adapter = search_adapters.adapter_for(search_url)
+    start = time.time()
+    try:
+        if isinstance(adapter, search_adapters.TassAdapter):
+            # TASS 只有 JSON 接口（见 11.py）
+            url, params = adapter.request(dict(parse_qsl(urlsplit(search_url).query)), adapter.first_cursor())
+            # 与 11.py 相同的 cookie / 请求头，否则接口给出的总数和结果可能不同
+            response = requests.get(url, params=params, headers=adapter.headers, cookies=adapter.cookies, timeout=15)
+            try:
+                records, cursor = adapter.parse_page(response.text, url)
+            except search_adapters.AdapterError:
+                records, cursor = [], None    # 不是 JSON（cookie 过期时返回整页 HTML）
+            data = search_adapters._load_json(response.text)
+            total = search_adapters._find_key(data, TOTAL_KEYS) if data is not None else None
+            result['total'] = total if isinstance(total, int) else None
+        else:
+            response = requests.get(search_url, headers=HTML_HEADERS, timeout=20)
+            response.encoding = response_encoding(response)
+            body = response.text
+            records = [(t, u) for t, u in search_adapters.links_from_fragment(body, search_url)
+                       if rule_verdict(u) == 'article']
+            text = search_adapters.TAG_RE.sub(' ', body)
+            result['total'] = _parse_total(text)
+            cursor = ('Загрузить ещё' in text or 'Показать ещё' in text or 'page=2' in body) or None
+    except requests.exceptions.RequestException as e:
+        result['status'] = f'error: {e}'
+        return result
+    result['latency'] = time.time() - start
+    result['bytes'] = len(response.content)
+    result['status'] = response.status_code
+    metrics.record_fetch(host, response.status_code, result['latency'], result['bytes'])
+    urls = list(dict.fromkeys(canonical_url(u) for _, u in records))    # 与 load_seen 比对用的键
+    result.update(urls=urls, per_page=len(urls), has_more=cursor is not None)
+    return result
+
+
+# --- 估算 ---
+
+def estimate(window, found, seen, limit=None, pacing=DEFAULT_PACING, history=None):
+    """一个时间段的各阶段估算"""
+    host_stats = history or {}
+    page_delay, article_delay = pacing
+    per_page = max(1, found['per_page'])
+    total_known = found['total'] is not None
+    if total_known:
+        total = found['total']
+    elif found['has_more']:
+        total = per_page * UNKNOWN_PAGES
+    else:
+        total = found['per_page']
+    if limit:
+        total = min(total, limit)
+    pages = max(1, math.ceil(total / per_page))
+    seen_share = (sum(u in seen for u in found['urls']) / len(found['urls'])) if found['urls'] else 0.0
+    new_articles = int(round(total * (1 - seen_share)))
+
+    latency = host_stats.get('latency') or found['latency'] or DEFAULT_LATENCY
+    article_bytes = host_stats.get('bytes') or DEFAULT_ARTICLE_BYTES
+    return {
+        'window': window,
+        'total': total, 'total_known': total_known, 'per_page': found['per_page'],
+        'seen_share': seen_share, 'new_articles': new_articles,
+        'discover': {'requests': pages, 'bytes': pages * found['bytes'],
+                     'seconds': pages * ((found['latency'] or latency) + page_delay)},
+        'fetch': {'requests': new_articles, 'bytes': new_articles * article_bytes,
+                  'seconds': new_articles * (latency + article_delay)},
+        'extract': {'requests': 0, 'bytes': 0, 'seconds': new_articles * CPU_PER_ARTICLE},
+    }
+
+
+def suggest(rows, budget_hours):
+    """按时间预算建议并发数和分片数；discover 阶段按顺序翻页，不并行"""
+    discover = sum(r['discover']['seconds'] for r in rows)
+    fetch = sum(r['fetch']['seconds'] + r['extract']['seconds'] for r in rows)
+    articles = sum(r['new_articles'] for r in rows)
+    if not budget_hours:
+        return None
+    available = budget_hours * 3600 - discover
+    if available <= 0:
+        return {'feasible': False, 'reason': f"翻页阶段就需要 {_fmt_seconds(discover)}，超出预算"}
+    needed = max(1, math.ceil(fetch / available))
+    concurrency = min(needed, MAX_PER_HOST)
+    shards = math.ceil(needed / MAX_PER_HOST)
+    return {
+        'feasible': True, 'concurrency': concurrency, 'shards': shards,
+        'shard_size': math.ceil(articles / shards) if articles else 0,
+        'wall_seconds': discover + fetch / (concurrency * shards),
+    }
+
+
+def plan(search_urls, limit=None, pacing=None, budget_hours=0, seen=None, history=None):
+    """对若干搜索地址（每个按时间段拆开）试算，返回 (明细行, 建议)"""
+    seen = load_seen() if seen is None else seen
+    history = load_history() if history is None else history
+    rows = []
+    for search_url in search_urls:
+        host = urlsplit(search_url).netloc.lower()
+        host_pacing = pacing or PACING.get(host, DEFAULT_PACING)
+        windows = split_windows(search_url)
+        remaining = limit
+        for i, (window, url) in enumerate(windows):
+            print(f"🔭 探测 {host} {window or '全部'} …")
+            found = probe(url)
+            if found['status'] != 200:
+                print(f"  ⚠️ 第一个搜索请求失败（{found['status']}），该时间段按 0 计")
+            row = estimate(window, found, seen, remaining, host_pacing, history.get(host))
+            row['host'] = host
+            rows.append(row)
+            if remaining:
+                remaining = max(0, remaining - row['total'])
+                if not remaining:
+                    break
+            if i + 1 < len(windows):
+                metrics.sleep(host_pacing[0], host)
+    return rows, suggest(rows, budget_hours)
+
+
+def _fmt_seconds(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}小时{seconds % 3600 // 60:02d}分"
+    if seconds >= 60:
+        return f"{seconds // 60}分{seconds % 60:02d}秒"
+    return f"{seconds}秒"
+
+
+def _fmt_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f"{n:.0f}{unit}" if unit == 'B' else f"{n:.1f}{unit}"
+        n /= 1024
+
+
+def print_plan(rows, advice, budget_hours=0):
+    print(f"\n{'站点':<20}{'时间段':<8}{'结果数':>8}{'已抓':>7}{'新文章':>7}"
+          f"{'翻页请求':>9}{'文章请求':>9}{'流量':>10}{'单线程耗时':>12}")
+    totals = defaultdict(float)
+    for r in rows:
+        requests_n = r['discover']['requests'] + r['fetch']['requests']
+        nbytes = r['discover']['bytes'] + r['fetch']['bytes']
+        seconds = sum(r[stage]['seconds'] for stage in ('discover', 'fetch', 'extract'))
+        total = f"{r['total']}" + ('' if r['total_known'] else '?')
+        print(f"{r['host']:<20}{r['window'] or '-':<8}{total:>8}{r['seen_share']:>7.0%}{r['new_articles']:>7}"
+              f"{r['discover']['requests']:>9}{r['fetch']['requests']:>9}{_fmt_bytes(nbytes):>10}"
+              f"{_fmt_seconds(seconds):>12}")
+        for stage in ('discover', 'fetch', 'extract'):
+            for k in ('requests', 'bytes', 'seconds'):
+                totals[(stage, k)] += r[stage][k]
+        totals['requests'] += requests_n
+    print("\n各阶段合计：")
+    for stage in ('discover', 'fetch', 'extract'):
+        print(f"  {stage:<9} 请求 {int(totals[(stage, 'requests')]):>6}  流量 {_fmt_bytes(totals[(stage, 'bytes')]):>9}"
+              f"  耗时 {_fmt_seconds(totals[(stage, 'seconds')])}")
+    if any(not r['total_known'] for r in rows):
+        print(f"  （? = 页面上读不到结果总数，按 {UNKNOWN_PAGES} 页估算）")
+
+    if advice is None:
+        print("\n💡 加 --budget=小时数 可得到并发 / 分片建议")
+    elif not advice['feasible']:
+        print(f"\n❌ {budget_hours} 小时内无法完成：{advice['reason']}")
+    else:
+        print(f"\n💡 预算 {budget_hours} 小时：每个出口并发 {advice['concurrency']}，分 {advice['shards']} 片"
+              f"（每片约 {advice['shard_size']} 篇），预计 {_fmt_seconds(advice['wall_seconds'])} 完成")
+        if advice['shards'] > 1:
+            print(f"   同一站点单出口并发上限为 {MAX_PER_HOST}：用 work_queue.py 导入链接后，"
+                  f"在 {advice['shards']} 个出口 / 机器上各启动 {advice['concurrency']} 个 worker")
+
+
+def run_plan(search_url, limit=None, pacing=None, budget_hours=None):
+    """抓取脚本的 --plan 入口"""
+    if budget_hours is None:
+        budget_hours = requested() or 0
+    rows, advice = plan([search_url], limit=limit, pacing=pacing, budget_hours=budget_hours)
+    print_plan(rows, advice, budget_hours)
+    return rows, advice
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抓取计划：只发第一个搜索请求，估算请求数、流量和耗时')
+    parser.add_argument('urls', nargs='+', help='站内搜索地址（日期参数会按时间段拆开）')
+    parser.add_argument('--limit', type=int, help='每个搜索地址最多抓多少篇')
+    parser.add_argument('--budget', type=float, default=0, help='时间预算（小时）')
+    parser.add_argument('--page-delay', type=float, help='覆盖翻页间隔（秒）')
+    parser.add_argument('--article-delay', type=float, help='覆盖文章间隔（秒）')
+    args = parser.parse_args()
+
+    pacing = None
+    if args.page_delay is not None or args.article_delay is not None:
+        pacing = (args.page_delay if args.page_delay is not None else DEFAULT_PACING[0],
+                  args.article_delay if args.article_delay is not None else DEFAULT_PACING[1])
+    rows, advice = plan(args.urls, limit=args.limit, pacing=pacing, budget_hours=args.budget)
+    print_plan(rows, advice, args.budget)
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
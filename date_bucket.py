@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+发布日期解析 + 按时间段自动分文件。
+
+链接文件里的标题末尾粘着日期，例如：
+    …Си Цзиньпину18:30           （当天）
+    …батарей12 января            （今年）
+    …на 6-8%26 декабря 2025      （完整日期）
+本模块把日期从标题上剥下来，并把每条记录写进对应时间段的文件
+（20-21 / 21-22 / …），一次抓取同时产出所有年份的文件。
+
+命令（把一个合并的 CSV 按年份拆开）：
+    python date_bucket.py split huawei_corpus_final.csv --prefix tass
+"""
+
+import argparse
+import csv
+import datetime
+import os
+import re
+
+import stage_profile
+
+# --- 配置 ---
+# 时间段起点（月, 日）：数据/ 中的 20-21 对应 2020 年全年，故取 1 月 1 日
+BUCKET_START = (1, 1)
+UNKNOWN_BUCKET = "未知日期"
+
+MONTHS_RU = {
+    'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4, 'мая': 5, 'июня': 6,
+    'июля': 7, 'августа': 8, 'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12,
+}
+
+# 日期必须紧贴前面的文字（“…компаний01 января 2021”），
+# 否则“…против Huawei до 15 мая”这类以日期短语结尾的标题会被误剥；
+# 紧贴在数字后面时（“…P4001 января”）只认两位的日 / 时
+GLUED_NUMBER = r'(?:(?<![\s\d])\d{1,2}|(?<=\d)\d{2})'
+TITLE_DATE_RE = re.compile(
+    r'(?:(?P<day>' + GLUED_NUMBER + r') (?P<month>' + '|'.join(MONTHS_RU) + r')(?: (?P<year>\d{4}))?'
+    r'|(?P<hour>' + GLUED_NUMBER + r'):(?P<minute>\d{2}))\s*$', re.I)
+
+# 新闻发布会公告类标题的日期在开头，例如 “3 марта, 13:00Новосибирск…”
+LEADING_DATE_RE = re.compile(
+    r'^(?P<day>\d{1,2}) (?P<month>' + '|'.join(MONTHS_RU) + r')(?: (?P<year>\d{4}))?,?\s*'
+    r'(?:\d{1,2}:\d{2})?', re.I)
+
+# 文章页元数据里的发布日期，按可靠程度排列
+META_DATE_RES = [
+    re.compile(r'<meta[^>]+property=["\']article:published_time["\'][^>]+content=["\']([^"\']+)', re.I),
+    re.compile(r'<meta[^>]+content=["\']([^"\']+)["\'][^>]+property=["\']article:published_time', re.I),
+    re.compile(r'itemprop=["\']datePublished["\'][^>]+(?:content|datetime)=["\']([^"\']+)', re.I),
+    re.compile(r'"datePublished"\s*:\s*"([^"]+)"'),
+    re.compile(r'<time[^>]+datetime=["\']([^"\']+)', re.I),
+]
+ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+WINDOW_RE = re.compile(r'(\d{2})-(\d{2})')
+
+
+def detect_window(path):
+    """文件名里的时间段，例如 tass20-21补.csv → 20-21"""
+    m = WINDOW_RE.search(os.path.basename(path))
+    return f"{m.group(1)}-{m.group(2)}" if m else ''
+
+
+def window_range(label, start=BUCKET_START):
+    """时间段标签 → (第一天, 最后一天)，例如 '20-21' → (2020-01-01, 2020-12-31)"""
+    first = datetime.date(2000 + int(label[:2]), *start)
+    following = datetime.date(2000 + int(label[3:5]), *start)
+    return first, following - datetime.timedelta(days=1)
+
+
+def _date(year, month, day):
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+class DateContext:
+    """
+    解析相对日期的上下文。
+
+    reference: 抓取链接的日期（“18:30”即当天，“12 января”取该年）
+    window: 链接文件所属时间段（如 '20-21'）；给定时无年份的日期在该时间段内取年份，
+            落在时间段外的日期视为误识别（contains() 为 False）
+    链接文件按时间倒序排列，last 记录上一条的日期，用来推断跨年的无年份日期。
+    """
+
+    def __init__(self, reference=None, window=None):
+        self.window = window_range(window) if window else None
+        if reference is None:
+            reference = datetime.date.today()
+            if self.window:
+                reference = min(reference, self.window[1])
+        self.reference = reference
+        self.last = None
+
+    def contains(self, date):
+        return self.window is None or self.window[0] <= date <= self.window[1]
+
+    def resolve(self, day, month, year=None):
+        if year is None:
+            anchor = self.last or self.reference
+            year = anchor.year
+            candidate = _date(year, month, day)
+            if candidate is not None and candidate > anchor:
+                year -= 1
+            if self.window and not (_date(year, month, day) and self.contains(_date(year, month, day))):
+                # 时间段本身就确定了年份，上一条日期推断出的跨年不可信
+                for y in (self.window[0].year, self.window[1].year):
+                    if _date(y, month, day) and self.contains(_date(y, month, day)):
+                        year = y
+                        break
+        found = _date(year, month, day)
+        if found is not None and self.contains(found):
+            self.last = found
+        return found
+
+
+def split_title_date(title, context=None):
+    """
+    剥离标题末尾粘连的日期
+
+    返回:
+        tuple: (干净标题, datetime.date 或 None)；日期落在 context 时间段外时照样剥离，日期返回 None
+    """
+    context = context or DateContext()
+    m = TITLE_DATE_RE.search(title or '')
+    if not m:
+        m = LEADING_DATE_RE.match(title or '')
+        if not m:
+            return title, None
+        clean = title[m.end():].lstrip()
+    else:
+        clean = title[:m.start()].rstrip()
+        if m.group('hour') is not None:
+            found = context.reference
+            if not context.contains(found):
+                return clean, None
+            context.last = found
+            return clean, found
+    found = context.resolve(int(m.group('day')), MONTHS_RU[m.group('month').lower()],
+                            int(m.group('year')) if m.group('year') else None)
+    if found is None:
+        return title, None
+    return clean, found if context.contains(found) else None
+
+
+def extract_published_date(html):
+    """从文章 HTML 的 meta / JSON-LD / <time> 中取发布日期"""
+    if not html:
+        return None
+    for pattern in META_DATE_RES:
+        m = pattern.search(html)
+        if not m:
+            continue
+        iso = ISO_DATE_RE.search(m.group(1))
+        if iso:
+            try:
+                return datetime.date(int(iso.group(1)), int(iso.group(2)), int(iso.group(3)))
+            except ValueError:
+                continue
+    return None
+
+
+def bucket_label(date, start=BUCKET_START):
+    """日期 → 时间段标签，例如 2021-03-05 → '21-22'"""
+    if date is None:
+        return UNKNOWN_BUCKET
+    year = date.year if (date.month, date.day) >= start else date.year - 1
+    return f"{year % 100:02d}-{(year + 1) % 100:02d}"
+
+
+class BucketWriter:
+    """按时间段懒打开输出文件，每个文件独立编号"""
+
+    def __init__(self, prefix, header, start=BUCKET_START):
+        self.prefix = prefix
+        self.header = header
+        self.start = start
+        self.files = {}
+        self.writers = {}
+        self.counts = {}
+
+    def path_for(self, label):
+        return f"{self.prefix}{label}.csv"
+
+    def write(self, date, row):
+        """写入一行（不含序号列），返回所在时间段标签"""
+        label = bucket_label(date, self.start)
+        writer = self.writers.get(label)
+        if writer is None:
+            f = open(self.path_for(label), 'w', encoding='utf-8-sig', newline='')
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            self.files[label] = f
+            self.writers[label] = writer
+            self.counts[label] = 0
+        self.counts[label] += 1
+        writer.writerow([self.counts[label]] + list(row))
+        return label
+
+    def flush(self):
+        for f in self.files.values():
+            f.flush()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+        self.writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def split_csv(input_file, prefix, reference=None, window=None):
+    """把 序号,链接,标题,匹配语料 格式的 CSV 按标题日期拆成各时间段文件"""
+    context = DateContext(reference, window or detect_window(input_file) or None)
+    with open(input_file, 'r', encoding='utf-8-sig', newline='') as f_in:
+        reader = csv.reader(f_in)
+        header = next(reader)
+        with BucketWriter(prefix, header) as buckets:
+            last_title = None
+            for row in reader:
+                if len(row) < 4:
+                    continue
+                # 同一篇文章的多条语料标题相同，只解析一次，避免把上下文日期推乱
+                if row[2] != last_title:
+                    last_title = row[2]
+                    clean_title, found = split_title_date(row[2], context)
+                buckets.write(found, [row[1], clean_title] + row[3:])
+            return dict(buckets.counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按发布日期拆分语料')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_split = sub.add_parser('split')
+    p_split.add_argument('input')
+    p_split.add_argument('--prefix', default='tass')
+    p_split.add_argument('--reference', help='链接抓取日期 YYYY-MM-DD，默认今天')
+    p_split.add_argument('--window', help='链接所属时间段（如 20-21），默认从文件名识别')
+    args = parser.parse_args()
+
+    reference = datetime.date.fromisoformat(args.reference) if args.reference else None
+    counts = split_csv(args.input, args.prefix, reference, args.window)
+    for label, n in sorted(counts.items()):
+        print(f"📅 {args.prefix}{label}.csv: {n} 条")
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
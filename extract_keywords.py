@@ -8,6 +8,14 @@ import csv
 import re
 from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 import time
+import hedged_fetch
+from link_filter import in_page_chrome, rule_verdict
+import crawl_metrics as metrics
+import stage_profile
+from records import ResultBatch
+from ru_match import matcher_for
+import search_adapters
+import crawl_plan
 
 
 def _set_query_param(url, key, value):
@@ -21,24 +29,38 @@ def _set_query_param(url, key, value):
 def _collect_links_from_html(soup, base_url):
     links = set()
     for a_tag in soup.find_all('a', href=True):
+        # 跳过导航栏 / 页脚里的链接，它们不是搜索结果
+        if in_page_chrome(a_tag):
+            continue
         link = a_tag['href']
         full_url = urljoin(base_url, link)
-        if full_url.startswith('http'):
+        if full_url.startswith('http') and rule_verdict(full_url) != 'reject':
             links.add(full_url)
     return links
 
 
-def extract_article_links(url, limit=None, max_pages=None):
+def extract_article_links(url, limit=None, max_pages=None, renderer=None):
     """
     从网页中提取所有文章链接
     
     参数:
         url (str): 网页链接
         limit (int): 限制链接数量
+        renderer: render_pool.RenderPool，结果靠脚本加载（“加载更多” / 无限滚动）的搜索页
+                  用无头浏览器渲染一次、加载完全部结果后取链接，不再按 page 参数翻页
     
     返回:
         list: 文章链接列表
     """
+    if renderer is not None:
+        print(f"正在渲染网页链接: {url}")
+        soup = BeautifulSoup(renderer.render(url, load_more=True), 'html.parser')
+        links = list(_collect_links_from_html(soup, url))
+        if limit:
+            links = links[:limit]
+        print(f"找到 {len(links)} 个链接")
+        return links
+
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -62,8 +84,11 @@ def extract_article_links(url, limit=None, max_pages=None):
             for param_name in params_to_try:
                 page_url = _set_query_param(url, param_name, current_page)
                 print(f"正在获取网页链接: {page_url}")
+                start = time.time()
                 response = requests.get(page_url, headers=headers, timeout=10)
                 response.encoding = 'utf-8'
+                metrics.record_fetch(urlsplit(page_url).netloc, response.status_code,
+                                     time.time() - start, len(response.content))
 
                 if response.status_code != 200:
                     print(f"错误: 无法访问网址，状态码 {response.status_code}")
@@ -133,7 +158,7 @@ def extract_article_links(url, limit=None, max_pages=None):
                 break
 
             # 温和一些，间隔抓取
-            time.sleep(0.6)
+            metrics.sleep(0.6, urlsplit(url).netloc)
 
         links = list(all_links)
         if limit:
@@ -146,13 +171,15 @@ def extract_article_links(url, limit=None, max_pages=None):
         return []
 
 
-def extract_sentences_with_keyword(url, keyword):
+def extract_sentences_with_keyword(url, keyword, stream=False, renderer=None):
     """
     从网址中提取包含指定关键词的语句
     
     参数:
         url (str): 网页链接
         keyword (str): 关键词
+        stream (bool): 流式读取，正文容器闭合即停止下载
+        renderer: render_pool.RenderPool，动态加载的网站用无头浏览器渲染
     
     返回:
         list: 包含关键词的句子列表
@@ -164,30 +191,49 @@ def extract_sentences_with_keyword(url, keyword):
         }
         
         print(f"  正在处理: {url}")
-        response = requests.get(url, headers=headers, timeout=10)
-        response.encoding = 'utf-8'
-        
-        if response.status_code != 200:
-            print(f"  错误: 无法访问，状态码 {response.status_code}")
-            return []
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # 移除脚本和样式元素
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # 获取所有文本
-        text = soup.get_text()
+        if renderer is not None:
+            # 文章页不点“加载更多”、不滚动：否则会把推荐 / 下一篇文章的正文也拼进来
+            soup = BeautifulSoup(renderer.render(url, load_more=False), 'html.parser')
+            for script in soup(["script", "style"]):
+                script.decompose()
+            text = soup.get_text()
+        elif stream:
+            outcome = hedged_fetch.fetch_stream(url, headers=headers, timeout=10)
+            if outcome['status'] != 200:
+                print(f"  错误: 无法访问，{outcome['reason']}")
+                return []
+            if outcome['truncated']:
+                print(f"  提示: 内容已截断 ({outcome['reason']})")
+            text = outcome['text']
+        else:
+            start = time.time()
+            response = hedged_fetch.get(url, headers=headers, timeout=10)
+            response.encoding = 'utf-8'
+            metrics.record_fetch(urlsplit(url).netloc, response.status_code,
+                                 time.time() - start, len(response.content))
+            
+            if response.status_code != 200:
+                print(f"  错误: 无法访问，状态码 {response.status_code}")
+                return []
+            
+            soup = BeautifulSoup(response.content, 'html.parser')
+            
+            # 移除脚本和样式元素
+            for script in soup(["script", "style"]):
+                script.decompose()
+            
+            # 获取所有文本
+            text = soup.get_text()
         
         # 按句号、感叹号、问号分割句子
         sentences = re.split(r'[。！？\.\!\?；;]+', text)
+        matcher = matcher_for(keyword)  # 俄文变格 / 转写写法一并匹配
         
         # 筛选包含关键词的句子
         matching_sentences = []
         for sentence in sentences:
             sentence = sentence.strip()
-            if sentence and keyword.lower() in sentence.lower():
+            if sentence and matcher.search(sentence):
                 matching_sentences.append(sentence)
         
         if matching_sentences:
@@ -208,7 +254,7 @@ def save_results_to_csv(all_results, keyword, output_file=None):
     将提取结果保存为CSV文件
     
     参数:
-        all_results (list): 包含(URL, 句子)的元组列表
+        all_results (records.ResultBatch): 命中语句批次
         keyword (str): 关键词
         output_file (str): 输出文件名
     
@@ -221,8 +267,8 @@ def save_results_to_csv(all_results, keyword, output_file=None):
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
         writer = csv.writer(f)
         writer.writerow(['序号', '来源URL', '语句内容', '关键词'])
-        for idx, (url, sentence) in enumerate(all_results, 1):
-            writer.writerow([idx, url, sentence, keyword])
+        for idx, record in enumerate(all_results, 1):
+            writer.writerow([idx, record.url, record.sentence, keyword])
     
     print(f"\n✓ 结果已保存到: {output_file}")
     return output_file
@@ -233,6 +279,14 @@ def main():
     main_url = "https://russian.rt.com/search?q=Huawei&type=&df=2020-01-18&dt=2026-01-18"#这里改网址
     keyword = "Huawei"#这里改关键词
     max_links = None  # 设置为 None 表示处理所有链接，或改为具体数字限制
+    stream = False  # True：流式读取正文，省流量（tests/test_stream_fetch.py 的 RT 样本换成真实页面并通过后再默认打开）
+    use_search_api = True  # 先走站内搜索 JSON 接口（search_adapters.py，目前是 TASS），其余站点 / 接口不可用时走 HTML 翻页
+    metrics_port = None  # 例如 9108：运行期间可访问 http://localhost:9108/metrics
+    render_listing = False  # 搜索结果靠“加载更多” / 无限滚动加载时改为 True（需要 playwright，见 render_pool.py）
+
+    if crawl_plan.requested() is not None:  # --plan：只试算请求数和耗时，不开始抓取
+        crawl_plan.run_plan(main_url, limit=max_links, pacing=(0.6, 1))
+        return
     
     print("=" * 60)
     print("网页爬虫关键词提取工具")
@@ -242,8 +296,20 @@ def main():
     print(f"最多处理链接数: {max_links}")
     print("=" * 60)
     
+    if metrics_port:
+        metrics.serve(metrics_port)
+    stop_dump = metrics.start_json_dump('metrics.jsonl')
+
     # 第一步: 提取主页面上的所有链接
-    article_links = extract_article_links(main_url, limit=max_links)
+    with metrics.timer('discover'):
+        if render_listing:
+            from render_pool import RenderPool
+            with RenderPool(size=1) as renderer:
+                article_links = extract_article_links(main_url, limit=max_links, renderer=renderer)
+        elif use_search_api:
+            article_links = search_adapters.article_links(main_url, limit=max_links, fallback=extract_article_links)
+        else:
+            article_links = extract_article_links(main_url, limit=max_links)
     
     if not article_links:
         print("未找到任何链接")
@@ -252,25 +318,33 @@ def main():
     print(f"\n将处理 {len(article_links)} 个链接\n")
     
     # 第二步: 逐个访问链接并提取关键词
-    all_results = []
+    all_results = ResultBatch()
     for i, link in enumerate(article_links, 1):
         print(f"[{i}/{len(article_links)}]")
-        sentences = extract_sentences_with_keyword(link, keyword)
-        for sentence in sentences:
-            all_results.append((link, sentence))
-        time.sleep(1)  # 为了礼貌，每个请求间隔1秒
+        host = urlsplit(link).netloc
+        with metrics.timer('extract', host):
+            sentences = extract_sentences_with_keyword(link, keyword, stream=stream)
+        metrics.observe('crawl_sentences_per_article', len(sentences), host=host)
+        all_results.extend(link, sentences, keyword=keyword)
+        metrics.sleep(1, host)  # 为了礼貌，每个请求间隔1秒
     
     # 第三步: 保存结果
     print(f"\n总共找到 {len(all_results)} 条包含关键词的语句")
     
     if all_results:
         output_file = f"result_{keyword}.csv"
-        save_results_to_csv(all_results, keyword, output_file)
+        with metrics.timer('write'):
+            save_results_to_csv(all_results, keyword, output_file)
         print("=" * 60)
         print("✓ 提取完成！")
     else:
         print("未找到包含关键词的语句")
 
+    stop_dump.set()
+    metrics.print_summary()
+    hedged_fetch.print_stats()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage_profile.from_argv():
+        main()
\ No newline at end of file
@@ -8,6 +8,9 @@ import re
 from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 import time
 import random
+import stage_profile
+from records import ResultBatch
+from ru_match import matcher_for
 
 # --- 辅助函数：处理 URL 参数 ---
 def _set_query_param(url, key, value):
@@ -129,11 +132,12 @@ def extract_sentences_with_keyword(url, keyword):
         text = soup.get_text()
         # 适配中俄英常用分句符号
         sentences = re.split(r'[。！？\.\!\?；;]+', text)
+        matcher = matcher_for(keyword)  # 俄文变格 / 转写写法一并匹配
         
         matching_sentences = []
         for s in sentences:
             clean_s = s.strip()
-            if clean_s and keyword.lower() in clean_s.lower():
+            if clean_s and matcher.search(clean_s):
                 # 过滤太短的噪音（如菜单词）
                 if len(clean_s) > 10:
                     matching_sentences.append(clean_s)
@@ -148,8 +152,8 @@ def save_results_to_csv(all_results, keyword, output_file):
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
         writer = csv.writer(f)
         writer.writerow(['序号', '来源URL', '语句内容', '关键词'])
-        for idx, (url, sentence) in enumerate(all_results, 1):
-            writer.writerow([idx, url, sentence, keyword])
+        for idx, record in enumerate(all_results, 1):
+            writer.writerow([idx, record.url, record.sentence, keyword])
     print(f"\n✓ 成功！语料已保存至: {output_file}")
 
 # --- 执行 ---
@@ -163,7 +167,8 @@ def main():
     print("=" * 60)
     
     # 第一步: 自动提取所有有效链接
-    article_links = extract_article_links(base_search_url)
+    with stage_profile.stage('discover'):
+        article_links = extract_article_links(base_search_url)
     
     if not article_links:
         print("❌ 未抓取到任何有效链接。")
@@ -172,20 +177,22 @@ def main():
     print(f"\n🔗 共计获取 {len(article_links)} 个文章链接，开始提取语料...\n")
     
     # 第二步: 提取关键词语句
-    all_results = []
+    all_results = ResultBatch()
     for i, link in enumerate(article_links, 1):
         print(f"[{i}/{len(article_links)}] 提取中: {link[:50]}...")
-        sentences = extract_sentences_with_keyword(link, keyword)
-        for s in sentences:
-            all_results.append((link, s))
+        with stage_profile.stage('extract'):
+            sentences = extract_sentences_with_keyword(link, keyword)
+        all_results.extend(link, sentences, keyword=keyword)
         time.sleep(random.uniform(0.5, 1.2)) # 礼貌间歇
     
     # 第三步: 保存
     if all_results:
         output_file = f"result_{keyword}_{int(time.time())}.csv"
-        save_results_to_csv(all_results, keyword, output_file)
+        with stage_profile.stage('write'):
+            save_results_to_csv(all_results, keyword, output_file)
     else:
         print("📭 未找到包含关键词的语料。")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage_profile.from_argv():
+        main()
\ No newline at end of file
@@ -8,6 +8,13 @@ import re
 from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 import time
 import random
+import crawl_metrics as metrics
+import hedged_fetch
+import stage_profile
+from records import ResultBatch
+from ru_match import matcher_for
+import search_adapters
+import crawl_plan
 
 # --- 辅助函数：处理 URL 参数 ---
 def _set_query_param(url, key, value):
@@ -56,12 +63,12 @@ def extract_article_links(url, limit=None):
                     wait_time = random.uniform(80, 150) # 触发封锁后深度休眠
                     print(f"\n⚠️ 检测到人机验证或访问受限 (Code: {response.status_code})")
                     print(f"🛑 程序将休眠 {int(wait_time)} 秒以解除封锁，随后重试当前页...")
-                    time.sleep(wait_time)
+                    metrics.sleep(wait_time, urlsplit(url).netloc, reason='blocked')
                     continue  # 跳过本次循环，重新请求当前 current_page
 
                 if response.status_code != 200:
                     print(f"❌ 异常状态码 {response.status_code}，5秒后尝试下一页...")
-                    time.sleep(5)
+                    metrics.sleep(5, urlsplit(url).netloc, reason='retry')
                     current_page += 1
                     continue
 
@@ -93,11 +100,11 @@ def extract_article_links(url, limit=None):
 
                 current_page += 1
                 # 正常的步进随机休眠
-                time.sleep(random.uniform(2.5, 4.5))
+                metrics.sleep(random.uniform(2.5, 4.5), urlsplit(url).netloc)
 
             except (requests.exceptions.RequestException, Exception) as e:
                 print(f"❌ 网络波动或异常: {e}，正在重试当前页...")
-                time.sleep(10)
+                metrics.sleep(10, urlsplit(url).netloc, reason='retry')
                 continue
 
         return list(all_links)[:limit] if limit else list(all_links)
@@ -110,12 +117,12 @@ def extract_article_links(url, limit=None):
 def extract_sentences_with_keyword(url, keyword):
     try:
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/121.0.0.0'}
-        response = requests.get(url, headers=headers, timeout=15)
+        response = hedged_fetch.get(url, headers=headers, timeout=15)
         
         # 语料提取阶段如果遇到拦截，同样增加保护
         if response.status_code in [403, 429]:
             print(f"\n⚠️ 详情页访问受限，休眠 30 秒...")
-            time.sleep(30)
+            metrics.sleep(30, urlsplit(url).netloc, reason='blocked')
             return []
 
         response.encoding = 'utf-8'
@@ -125,11 +132,12 @@ def extract_sentences_with_keyword(url, keyword):
         
         text = soup.get_text()
         sentences = re.split(r'[。！？\.\!\?；;]+', text)
+        matcher = matcher_for(keyword)  # 俄文变格 / 转写写法一并匹配
         
         matching_sentences = []
         for s in sentences:
             clean_s = s.strip()
-            if clean_s and keyword.lower() in clean_s.lower():
+            if clean_s and matcher.search(clean_s):
                 if len(clean_s) > 10:
                     matching_sentences.append(clean_s)
         return matching_sentences
@@ -141,21 +149,30 @@ def save_results_to_csv(all_results, keyword, output_file):
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
         writer = csv.writer(f)
         writer.writerow(['序号', '来源URL', '语句内容', '关键词'])
-        for idx, (url, sentence) in enumerate(all_results, 1):
-            writer.writerow([idx, url, sentence, keyword])
+        for idx, record in enumerate(all_results, 1):
+            writer.writerow([idx, record.url, record.sentence, keyword])
     print(f"\n✓ 成功！保存至: {output_file}")
 
 # --- 主程序 ---
 def main():
     base_search_url = "https://www.kommersant.ru/search/results?search_query=Huawei&sort_type=0&search_full=1&time_range=2&dateStart=2020-01-02&dateEnd=2026-02-02"
     keyword = "Huawei"
+    use_search_api = True  # 先走站内搜索 JSON 接口（search_adapters.py，目前是 TASS），其余站点 / 接口不可用时走 HTML 翻页
+
+    if crawl_plan.requested() is not None:  # --plan：只试算请求数和耗时，不开始抓取
+        crawl_plan.run_plan(base_search_url, pacing=(3.5, 1.15))
+        return
     
     print("=" * 60)
     print(f"🚀 启动自修复分页爬虫 | 关键词: {keyword}")
     print("=" * 60)
 
     # 1. 抓取链接
-    article_links = extract_article_links(base_search_url)
+    with metrics.timer('discover'):
+        if use_search_api:
+            article_links = search_adapters.article_links(base_search_url, fallback=extract_article_links)
+        else:
+            article_links = extract_article_links(base_search_url)
     
     if not article_links:
         print("❌ 未获取到有效链接。")
@@ -164,22 +181,24 @@ def main():
     print(f"\n🔗 共计获取 {len(article_links)} 个链接，开始提取语料...\n")
     
     # 2. 提取语句
-    all_results = []
+    all_results = ResultBatch()
     for i, link in enumerate(article_links, 1):
         print(f"[{i}/{len(article_links)}] 提取中: {link[:50]}...")
-        sentences = extract_sentences_with_keyword(link, keyword)
-        for s in sentences:
-            all_results.append((link, s))
+        with metrics.timer('extract', urlsplit(link).netloc):
+            sentences = extract_sentences_with_keyword(link, keyword)
+        all_results.extend(link, sentences, keyword=keyword)
         
         # 详情页爬取也建议稍微放慢速度
-        time.sleep(random.uniform(0.8, 1.5))
+        metrics.sleep(random.uniform(0.8, 1.5), urlsplit(link).netloc)
     
     # 3. 保存
     if all_results:
         output_file = f"result_{keyword}_{int(time.time())}.csv"
-        save_results_to_csv(all_results, keyword, output_file)
+        with metrics.timer('write'):
+            save_results_to_csv(all_results, keyword, output_file)
     else:
         print("📭 未找到包含关键词的语料。")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage_profile.from_argv():
+        main()
\ No newline at end of file
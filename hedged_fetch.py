@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+对冲请求与按站点自适应的超时。
+
+原来的超时全是写死的数字（extract_keywords.py 10 秒、v3 15/20 秒、shoudongtass_v4 30 秒）：
+一个卡住的连接能占住 worker 30 秒，断掉的 TCP 连接要等满超时才发现。这里：
+* 按站点记录最近 WINDOW 次请求的耗时，算 p50 / p95 / p99；
+* 连接超时 = p99 × CONNECT_FACTOR（不低于 MIN_CONNECT_TIMEOUT），读取超时 = p99 × READ_FACTOR
+  （不低于 MIN_READ_TIMEOUT），两者都不超过调用方原来的超时；
+* 对冲：请求超过该站点的 p95 还没返回，就再发一个相同的请求，先成功返回的那个胜出；
+  额外请求数受每个站点的预算限制（不超过总请求数的 HEDGE_RATIO，外加 HEDGE_BURST 次突发）；
+* 对冲落败的那个 Response 会被关闭，连接还回连接池；
+* 样本不足 MIN_SAMPLES 时不对冲，连接超时取 CONNECT_TIMEOUT，读取超时沿用调用方给的数字。
+
+用法：
+    import hedged_fetch
+    response = hedged_fetch.get(url, headers=headers, timeout=10)            # 代替 requests.get
+    outcome = hedged_fetch.fetch_stream(url, headers=headers, timeout=20)    # 代替 fetch_article_stream
+命令：
+    python hedged_fetch.py https://tass.ru/ekonomika/26126381 -n 20           # 连续抓取，打印各站点分位数和对冲统计
+"""
+
+import argparse
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+import requests
+
+import crawl_metrics as metrics
+import stage_profile
+from stream_fetch import fetch_article_stream
+
+# --- 配置 ---
+HEDGE_ENABLED = True
+WINDOW = 200                 # 每个站点保留的耗时样本数
+MIN_SAMPLES = 20             # 样本少于这个数时不对冲、不调整超时
+CONNECT_TIMEOUT = 3.05       # 样本不足时建立连接的超时（秒），丢包 / 断线尽快发现
+CONNECT_FACTOR = 2.0         # 连接超时 = p99 × CONNECT_FACTOR（整次请求耗时已包含建连）
+MIN_CONNECT_TIMEOUT = 1.0    # 不低于 TCP 首次重传 SYN 的间隔
+READ_FACTOR = 3.0            # 读取超时 = p99 × READ_FACTOR
+MIN_READ_TIMEOUT = 2.0
+HEDGE_PERCENTILE = 95        # 超过该分位数还没返回就对冲
+MIN_HEDGE_DELAY = 0.2
+HEDGE_RATIO = 0.05           # 对冲请求最多占该站点请求数的比例
+HEDGE_BURST = 3
+NO_HEDGE_HOSTS = {'translate.google.com'}   # 限流严重的站点只调超时，不发重复请求
+MAX_WORKERS = 64
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    k = min(len(ordered) - 1, max(0, int(round(q / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+class LatencyTracker:
+    """按站点保存最近的耗时样本（线程安全）"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.lock = threading.Lock()
+
+    def add(self, host, seconds):
+        with self.lock:
+            self.samples[host].append(seconds)
+
+    def count(self, host):
+        with self.lock:
+            return len(self.samples.get(host, ()))
+
+    def percentile(self, host, q):
+        with self.lock:
+            samples = list(self.samples.get(host, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return _percentile(samples, q)
+
+    def snapshot(self):
+        with self.lock:
+            hosts = {h: list(s) for h, s in self.samples.items()}
+        return {h: {'n': len(s), 'p50': _percentile(s, 50), 'p95': _percentile(s, 95),
+                    'p99': _percentile(s, 99)} for h, s in hosts.items()}
+
+
+class HedgeBudget:
+    """每个站点的对冲额度：hedges ≤ requests × ratio + burst"""
+
+    def __init__(self, ratio=HEDGE_RATIO, burst=HEDGE_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self.requests = defaultdict(int)
+        self.hedges = defaultdict(int)
+        self.wins = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record_request(self, host):
+        with self.lock:
+            self.requests[host] += 1
+
+    def try_acquire(self, host):
+        with self.lock:
+            if self.hedges[host] >= self.requests[host] * self.ratio + self.burst:
+                return False
+            self.hedges[host] += 1
+            return True
+
+    def record_win(self, host):
+        with self.lock:
+            self.wins[host] += 1
+
+
+class HedgedFetcher:
+    """
+    call(host, fn, timeout)：fn(timeout) 执行一次请求；超过 p95 未返回且有额度时再执行一次，取先成功的结果
+    """
+
+    def __init__(self, hedge=HEDGE_ENABLED, tracker=None, budget=None, max_workers=MAX_WORKERS):
+        self.hedge = hedge
+        self.tracker = tracker or LatencyTracker()
+        self.budget = budget or HedgeBudget()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+
+    def timeout_for(self, host, default):
+        """(连接超时, 读取超时)；default 为调用方原来的总超时，作为上限"""
+        p99 = self.tracker.percentile(host, 99)
+        if p99 is None:
+            return (min(CONNECT_TIMEOUT, default), default)
+        read = min(default, max(MIN_READ_TIMEOUT, p99 * READ_FACTOR))
+        connect = min(default, max(MIN_CONNECT_TIMEOUT, p99 * CONNECT_FACTOR))
+        return (connect, read)
+
+    def hedge_delay(self, host):
+        if not self.hedge or host in NO_HEDGE_HOSTS:
+            return None
+        p = self.tracker.percentile(host, HEDGE_PERCENTILE)
+        return None if p is None else max(MIN_HEDGE_DELAY, p)
+
+    def _attempt(self, host, fn, timeout):
+        start = time.time()
+        try:
+            return fn(timeout)
+        finally:
+            # 失败 / 超时也计入样本，否则卡住的请求永远不会抬高分位数
+            self.tracker.add(host, time.time() - start)
+
+    def call(self, host, fn, timeout=10, ok=None, discard=None):
+        """
+        参数:
+            fn: fn(timeout) → 结果；timeout 为 (连接, 读取) 元组
+            ok: ok(结果) → 是否算成功（默认不抛异常即成功）
+            discard: 对落败的结果做清理（例如关闭 Response）
+        """
+        ok = ok or (lambda result: True)
+        timeouts = self.timeout_for(host, timeout)
+        delay = self.hedge_delay(host)
+        self.budget.record_request(host)
+        if delay is None:
+            return self._attempt(host, fn, timeouts)
+
+        primary = self.executor.submit(self._attempt, host, fn, timeouts)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.budget.try_acquire(host):
+            return primary.result()
+
+        metrics.inc('crawl_hedged_requests_total', host=host)
+        backup = self.executor.submit(self._attempt, host, fn, timeouts)
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and ok(future.result()):
+                    if future is backup:
+                        self.budget.record_win(host)
+                        metrics.inc('crawl_hedge_wins_total', host=host)
+                    # 落败的一方不论已结束、还在进行，结束后都要关闭，否则流式连接一直占着连接池
+                    loser = backup if future is primary else primary
+                    loser.add_done_callback(lambda f: self._discard(f, discard))
+                    return future.result()
+        # 两个都没成功：返回主请求的结果（或抛出它的异常），与不对冲时行为一致
+        self._discard(backup, discard)
+        return primary.result()
+
+    @staticmethod
+    def _discard(future, discard):
+        if discard is not None and not future.cancelled() and future.exception() is None:
+            discard(future.result())
+
+    def get(self, url, timeout=10, session=None, **kwargs):
+        """对冲版 requests.get；状态码 200 视为成功"""
+        getter = session.get if session is not None else requests.get
+        host = urlsplit(url).netloc.lower()
+        return self.call(host, lambda t: getter(url, timeout=t, **kwargs), timeout,
+                         ok=lambda r: r.status_code == 200, discard=lambda r: r.close())
+
+    def fetch_stream(self, url, timeout=20, **kwargs):
+        """对冲版 fetch_article_stream；拿到 200 且有正文视为成功"""
+        host = urlsplit(url).netloc.lower()
+        return self.call(host, lambda t: fetch_article_stream(url, timeout=t, **kwargs), timeout,
+                         ok=lambda o: o['status'] == 200 and bool(o['text']))
+
+    def stats(self):
+        snapshot = self.tracker.snapshot()
+        for host, row in snapshot.items():
+            row['requests'] = self.budget.requests[host]
+            row['hedges'] = self.budget.hedges[host]
+            row['hedge_wins'] = self.budget.wins[host]
+        return snapshot
+
+
+_default = HedgedFetcher()
+
+
+def get(url, timeout=10, **kwargs):
+    return _default.get(url, timeout=timeout, **kwargs)
+
+
+def fetch_stream(url, timeout=20, **kwargs):
+    return _default.fetch_stream(url, timeout=timeout, **kwargs)
+
+
+def timeout_for(host, default):
+    return _default.timeout_for(host, default)
+
+
+def print_stats():
+    stats = _default.stats()
+    if not stats:
+        return
+    print("\n⏱️ 各站点耗时与对冲：")
+    for host, row in sorted(stats.items()):
+        print(f"  {host}: n={row['n']} p50={row['p50']:.2f}s p95={row['p95']:.2f}s p99={row['p99']:.2f}s "
+              f"| 请求 {row['requests']} 对冲 {row['hedges']} 对冲胜出 {row['hedge_wins']} "
+              f"| 当前超时 {timeout_for(host, 30)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对冲请求 / 自适应超时试跑')
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('-n', type=int, default=10, help='每个链接抓取次数')
+    parser.add_argument('--timeout', type=float, default=20)
+    parser.add_argument('--no-hedge', action='store_true')
+    args = parser.parse_args()
+
+    _default.hedge = not args.no_hedge
+    for i in range(args.n):
+        for url in args.urls:
+            start = time.time()
+            outcome = fetch_stream(url, timeout=args.timeout)
+            print(f"[{i + 1}/{args.n}] {outcome['status']} {time.time() - start:.2f}s {url}")
+    print_stats()
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
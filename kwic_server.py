@@ -0,0 +1,609 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+语料检索服务：倒排索引 + 关键词上下文（KWIC）查询。
+
+原来要回答“2021–2022 年所有同时提到 Huawei 和 5G / Мэн Ваньчжоу 的句子”只能在 Excel 里逐个打开 数据/ 下的 CSV。
+这里给全部语料语句建倒排索引：
+* 每个语料 CSV 一个索引段（按内容哈希命名），清单 manifest.json 记录文件大小 / 修改时间，
+  新增或改动的 CSV 只重建自己的段；语句、偏移量、倒排表都是内存映射的二进制文件；
+* 查询语法：空格 / AND 为“且”，OR 为“或”，NOT 或 -词 为“非”，括号分组，"双引号" 为短语，词* 为前缀；
+  词项按 ru_match.py 展开（Huawei 也能查到 Хуавэя / Хуавэем）；
+* 可按来源、时间段、日期范围过滤；结果按关键词上下文（左文 / 命中 / 右文）返回；
+* 相同查询走 LRU 缓存，语料有变化时自动失效；后台定时检查 数据/ 是否有新文件。
+
+命令：
+    python kwic_server.py build                                   # 建立 / 增量更新索引
+    python kwic_server.py query 'Huawei (5G OR "Мэн Ваньчжоу")' --from 2021-01-01 --to 2022-12-31
+    python kwic_server.py serve --port 8765
+    # http://localhost:8765/search?q=Huawei+5G&source=tass&from=2021&to=2022&width=60&limit=20
+"""
+
+import argparse
+import bisect
+import datetime
+import json
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+from collections import defaultdict
+from functools import lru_cache, partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import stage_profile
+from corpus_import import iter_data_file, detect_source, detect_window, dedup_key, _file_digest, SOURCE_ORDER
+from date_bucket import BUCKET_START
+from ru_match import compile_keywords, expand_keywords
+
+# --- 配置 ---
+DATA_DIR = "数据"
+INDEX_DIR = "语料索引"
+PORT = 8765
+QUERY_CACHE = 512            # 缓存的查询条数
+CONTEXT_WIDTH = 60           # 命中词左右各取多少个字符
+DEFAULT_LIMIT = 50
+WATCH_INTERVAL = 60          # 服务运行时每隔多少秒检查一次新 CSV（0 关闭）
+
+TOKEN_RE = re.compile(r'[一-鿿]|[^\W_一-鿿]+')
+QUERY_TOKEN_RE = re.compile(r'"[^"]*"|\(|\)|-?[^\s()"]+')
+FIELD_SEP = '\x1f'
+HEAD_VARIANTS = {'е': 'еэё', 'э': 'эеё', 'ё': 'ёе'}
+
+
+def tokenize(text):
+    return [t.lower().replace('ё', 'е') for t in TOKEN_RE.findall(text or '')]
+
+
+# --- 索引段 ---
+
+def write_segment(prefix, records):
+    """
+    records: corpus_import.iter_data_file 的记录；写出 prefix.docs / .offs / .post / .lex
+    .docs  语句记录（日期、链接、标题、语句用 \\x1f 分隔）连续存放
+    .offs  每条记录的起始偏移（uint64）
+    .post  按词排序拼接的文档号（uint32）
+    .lex   JSON：{词: [起点, 个数]}
+    """
+    postings = defaultdict(list)
+    offsets = array('Q', [0])
+    n = 0
+    with open(prefix + '.docs', 'wb') as f:
+        for r in records:
+            text = r[8]
+            if not text:
+                continue
+            blob = FIELD_SEP.join([r[7], r[5], r[6], text]).encode('utf-8')
+            f.write(blob)
+            offsets.append(offsets[-1] + len(blob))
+            for term in set(tokenize(text)):
+                postings[term].append(n)
+            n += 1
+    post = array('I')
+    lexicon = {}
+    for term in sorted(postings):
+        ids = postings[term]
+        lexicon[term] = [len(post), len(ids)]
+        post.extend(ids)
+    with open(prefix + '.offs', 'wb') as f:
+        offsets.tofile(f)
+    with open(prefix + '.post', 'wb') as f:
+        post.tofile(f)
+    with open(prefix + '.lex', 'w', encoding='utf-8') as f:
+        json.dump(lexicon, f, ensure_ascii=False)
+    return n
+
+
+def _map(path, typecode):
+    """内存映射一个二进制数组文件；空文件返回空数组"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return array(typecode), None
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return (memoryview(mm).cast(typecode) if typecode else mm), mm
+
+
+class Segment:
+    """一个语料文件的索引段（只读，内存映射）"""
+
+    def __init__(self, prefix, source, window, file):
+        self.source = source
+        self.window = window
+        self.file = file
+        with open(prefix + '.lex', 'r', encoding='utf-8') as f:
+            self.lexicon = json.load(f)
+        self.prefix = prefix
+        self.offsets, offs_mm = _map(prefix + '.offs', 'Q')
+        self.post, post_mm = _map(prefix + '.post', 'I')
+        self.docs, docs_mm = _map(prefix + '.docs', None)
+        self.mmaps = [mm for mm in (offs_mm, post_mm, docs_mm) if mm is not None]
+        self.size = max(0, len(self.offsets) - 1)
+
+    def close(self):
+        """释放内存映射（Windows 上映射着的文件删不掉）；仍有切片在用时留给垃圾回收"""
+        try:
+            for view in (self.offsets, self.post):
+                if isinstance(view, memoryview):
+                    view.release()
+            for mm in self.mmaps:
+                mm.close()
+        except BufferError:
+            pass
+
+    def postings(self, term):
+        entry = self.lexicon.get(term)
+        if entry is None:
+            return ()
+        start, count = entry
+        return self.post[start:start + count]
+
+    def doc(self, i):
+        raw = bytes(self.docs[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+        date, url, title, text = raw.split(FIELD_SEP)
+        return {'date': date, 'url': url, 'title': title, 'sentence': text}
+
+
+def build_index(data_dir=DATA_DIR, index_dir=INDEX_DIR, verbose=True, remove_stale=True):
+    """
+    增量建立索引；返回 (清单, 重建的段数)
+    remove_stale 为 False 时不删除不再引用的段文件（服务进程里它们可能还映射着，由 CorpusIndex 稍后清理）
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    manifest_path = os.path.join(index_dir, 'manifest.json')
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+    except FileNotFoundError:
+        old = {}
+
+    manifest = {}
+    rebuilt = 0
+    for path in _csv_paths(data_dir):
+        rel = os.path.relpath(path)
+        stat = os.stat(path)
+        entry = old.get(rel)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            manifest[rel] = entry
+            continue
+        digest = _file_digest(path)
+        prefix = os.path.join(index_dir, 'seg_' + digest[:16])
+        if not os.path.exists(prefix + '.lex'):
+            docs = write_segment(prefix, iter_data_file(path))
+            rebuilt += 1
+            if verbose:
+                print(f"  📄 已索引 {rel}：{docs} 句")
+        manifest[rel] = {'sha1': digest, 'size': stat.st_size, 'mtime': stat.st_mtime, 'segment': prefix,
+                         'source': detect_source(path), 'window': detect_window(path)}
+
+    live = {e['segment'] for e in manifest.values()}
+    rebuilt += sum(1 for entry in old.values() if entry['segment'] not in live)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    if remove_stale:
+        remove_stale_segments(index_dir, live)
+    return manifest, rebuilt
+
+
+SEGMENT_EXTS = ('.docs', '.offs', '.post', '.lex')
+
+
+def remove_stale_segments(index_dir, keep):
+    """删除 keep（段前缀集合）以外的段文件；删不掉的（Windows 上仍被映射）留到下次"""
+    keep = {os.path.normpath(p) for p in keep}
+    for name in os.listdir(index_dir):
+        stem, ext = os.path.splitext(name)
+        if not stem.startswith('seg_') or ext not in SEGMENT_EXTS:
+            continue
+        if os.path.normpath(os.path.join(index_dir, stem)) in keep:
+            continue
+        try:
+            os.remove(os.path.join(index_dir, name))
+        except OSError:
+            pass
+
+
+def _csv_paths(data_dir):
+    for folder in sorted(os.listdir(data_dir)):
+        full = os.path.join(data_dir, folder)
+        if os.path.isdir(full):
+            for name in sorted(os.listdir(full)):
+                if name.endswith('.csv'):
+                    yield os.path.join(full, name)
+
+
+# --- 查询解析 ---
+
+def parse_query(query):
+    """
+    查询 → 语法树：('or', [...]) / ('and', [...]) / ('not', x) / ('term', 词) / ('phrase', [词...])
+    """
+    tokens = QUERY_TOKEN_RE.findall(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        if pos >= len(tokens):
+            raise ValueError(f"查询不完整: {query}")
+        pos += 1
+        return tokens[pos - 1]
+
+    def parse_or():
+        items = [parse_and()]
+        while peek() in ('OR', '|'):
+            take()
+            items.append(parse_and())
+        return items[0] if len(items) == 1 else ('or', items)
+
+    def parse_and():
+        items = []
+        while peek() is not None and peek() not in ('OR', '|', ')'):
+            if peek() in ('AND', '&'):
+                take()
+                continue
+            items.append(parse_unary())
+        if not items:
+            raise ValueError(f"查询不完整: {query}")
+        return items[0] if len(items) == 1 else ('and', items)
+
+    def parse_unary():
+        tok = take()
+        if tok == 'NOT':
+            return ('not', parse_unary())
+        if tok == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError(f"括号不匹配: {query}")
+            take()
+            return node
+        if tok.startswith('-') and len(tok) > 1:
+            tokens.insert(pos, tok[1:])
+            return ('not', parse_unary())
+        if tok.startswith('"'):
+            words = tokenize(tok.strip('"'))
+            if not words:
+                raise ValueError(f"空短语: {query}")
+            return ('phrase', words) if len(words) > 1 else ('term', words[0])
+        words = tokenize(tok.rstrip('*'))
+        if not words:
+            raise ValueError(f"无法识别的查询词: {tok}")
+        if len(words) > 1:
+            return ('phrase', words)
+        return ('term', words[0] + ('*' if tok.endswith('*') else ''))
+
+    node = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"无法解析: {' '.join(tokens[pos:])}")
+    return node
+
+
+def _positive_terms(node):
+    kind = node[0]
+    if kind == 'term':
+        return [node[1]]
+    if kind == 'phrase':
+        return list(node[1])
+    if kind in ('and', 'or'):
+        return [t for child in node[1] for t in _positive_terms(child)]
+    return []
+
+
+# --- 索引与查询 ---
+
+def _window_span(window):
+    """时间段 '20-21' → (起始日期, 结束日期)，用于没有发布日期的语句"""
+    if not re.match(r'^\d{2}-\d{2}$', window or ''):
+        return None
+    month, day = BUCKET_START
+    start = datetime.date(2000 + int(window[:2]), month, day)
+    end = datetime.date(2000 + int(window[3:]), month, day) - datetime.timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+
+def _normalize_date(value, end=False):
+    """'2021' / '2021-03' / '2021-03-05' → ISO 日期字符串（区间两端分别补齐）"""
+    if not value:
+        return None
+    parts = value.split('-')
+    if len(parts) == 1:
+        return f"{parts[0]}-12-31" if end else f"{parts[0]}-01-01"
+    if len(parts) == 2:
+        return f"{value}-31" if end else f"{value}-01"
+    return value
+
+
+class CorpusIndex:
+    def __init__(self, data_dir=DATA_DIR, index_dir=INDEX_DIR, cache_size=QUERY_CACHE):
+        self.data_dir = data_dir
+        self.index_dir = index_dir
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()    # 后台检查和 /reload 可能同时调用 refresh
+        self.segments = []
+        self.vocabulary = []
+        self.retired = []    # 上一次换下来的段，可能还有查询在读，下次 refresh 时才关闭、删除
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """增量更新索引；有变化时重新打开段并清空查询缓存。返回是否有变化"""
+        with self.refresh_lock:
+            manifest, rebuilt = build_index(self.data_dir, self.index_dir, remove_stale=False)
+            if not rebuilt and not force:
+                return False
+            segments = [Segment(e['segment'], e['source'], e['window'], rel)
+                        for rel, e in sorted(manifest.items())]
+            segments.sort(key=lambda s: (SOURCE_ORDER.get(s.source, 9), s.window, s.file))
+            vocabulary = sorted({t for s in segments for t in s.lexicon})
+            # 缓存绑定在这一版的段和词表上，/reload 换掉的是整组，查询中途不会混用新旧两版
+            expand = lru_cache(maxsize=4096)(partial(self._expand_uncached, vocabulary))
+            search = lru_cache(maxsize=self.cache_size)(partial(self._search_uncached, segments, expand))
+            with self.lock:
+                old = self.segments
+                self.segments = segments
+                self.vocabulary = vocabulary
+                self._search = search
+                self._expand = expand
+            # 先关映射再删文件；再上一版的段早已没有查询在读
+            for seg in self.retired:
+                seg.close()
+            self.retired = old
+            remove_stale_segments(self.index_dir, {s.prefix for s in segments + old})
+            return True
+
+    def snapshot(self):
+        """当前这一版的 (段列表, 词表, 查询缓存, 词形展开缓存)"""
+        with self.lock:
+            return self.segments, self.vocabulary, self._search, self._expand
+
+    def stats(self):
+        segments, vocabulary, search, _ = self.snapshot()
+        return {
+            'segments': len(segments),
+            'sentences': sum(s.size for s in segments),
+            'terms': len(vocabulary),
+            'cache': search.cache_info()._asdict(),
+            'files': [{'file': s.file, 'source': s.source, 'window': s.window, 'sentences': s.size}
+                      for s in segments],
+        }
+
+    @staticmethod
+    def _prefix_range(vocab, prefix):
+        i = bisect.bisect_left(vocab, prefix)
+        while i < len(vocab) and vocab[i].startswith(prefix):
+            yield vocab[i]
+            i += 1
+
+    def _expand_uncached(self, vocabulary, term):
+        """查询词 → 词表中的实际词：前缀（词*）、俄文词形 / 转写变体（ru_match.py）"""
+        if term.endswith('*'):
+            return frozenset(self._prefix_range(vocabulary, term[:-1]))
+        pattern = compile_keywords([term])
+        # 变体的首字母（含转写写法、е / э / ё 互换），只扫描词表中以这些字母开头的区段
+        heads = set()
+        for variant in expand_keywords([term]):
+            head = variant[:1].lower()
+            heads.update(HEAD_VARIANTS.get(head, head))
+        return frozenset(t for head in heads for t in self._prefix_range(vocabulary, head) if pattern.fullmatch(t))
+
+    def _eval(self, node, seg, expand):
+        kind = node[0]
+        if kind == 'term':
+            ids = set()
+            for t in expand(node[1]):
+                ids.update(seg.postings(t))
+            return ids
+        if kind == 'phrase':
+            expansions = [expand(w) for w in node[1]]
+            candidates = None
+            for exp in expansions:
+                ids = set()
+                for t in exp:
+                    ids.update(seg.postings(t))
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return set()
+            return {i for i in candidates if _has_phrase(tokenize(seg.doc(i)['sentence']), expansions)}
+        if kind == 'and':
+            positives = [c for c in node[1] if c[0] != 'not']
+            negatives = [c[1] for c in node[1] if c[0] == 'not']
+            result = self._eval(positives[0], seg, expand) if positives else set(range(seg.size))
+            for child in positives[1:]:
+                if not result:
+                    break
+                result &= self._eval(child, seg, expand)
+            for child in negatives:
+                if not result:
+                    break
+                result -= self._eval(child, seg, expand)
+            return result
+        if kind == 'or':
+            result = set()
+            for child in node[1]:
+                result |= self._eval(child, seg, expand)
+            return result
+        if kind == 'not':
+            return set(range(seg.size)) - self._eval(node[1], seg, expand)
+        raise ValueError(kind)
+
+    def _search_uncached(self, segments, expand, query, source=None, window=None, date_from=None, date_to=None):
+        """返回命中的 (段号, 文档号) 元组，按来源 / 时间段 / 文件顺序排列，跨文件去重"""
+        tree = parse_query(query)
+        date_from = _normalize_date(date_from)
+        date_to = _normalize_date(date_to, end=True)
+        hits = []
+        seen = set()
+        for si, seg in enumerate(segments):
+            if source and seg.source != source:
+                continue
+            if window and seg.window != window:
+                continue
+            span = _window_span(seg.window)
+            if span and ((date_from and span[1] < date_from) or (date_to and span[0] > date_to)):
+                continue
+            for i in sorted(self._eval(tree, seg, expand)):
+                doc = seg.doc(i)
+                if doc['date'] and ((date_from and doc['date'] < date_from) or (date_to and doc['date'] > date_to)):
+                    continue
+                key = (doc['url'], dedup_key(doc['sentence']))
+                if key in seen:
+                    continue
+                seen.add(key)
+                hits.append((si, i))
+        return tree, tuple(hits)
+
+    def search(self, query, source=None, window=None, date_from=None, date_to=None,
+               width=CONTEXT_WIDTH, limit=DEFAULT_LIMIT, offset=0):
+        start = time.perf_counter()
+        segments, _, search, expand = self.snapshot()
+        tree, hits = search(query, source or None, window or None, date_from or None, date_to or None)
+        terms = set()
+        for t in _positive_terms(tree):
+            terms |= expand(t)
+        rows = []
+        for si, i in hits[offset:offset + limit]:
+            seg = segments[si]
+            doc = seg.doc(i)
+            row = {'source': seg.source, 'window': seg.window, 'file': seg.file, 'date': doc['date'],
+                   'url': doc['url'], 'title': doc['title']}
+            row.update(kwic(doc['sentence'], terms, width))
+            rows.append(row)
+        return {'query': query, 'total': len(hits), 'offset': offset,
+                'took_ms': round((time.perf_counter() - start) * 1000, 2), 'hits': rows}
+
+
+def _has_phrase(tokens, expansions):
+    n = len(expansions)
+    for i in range(len(tokens) - n + 1):
+        if all(tokens[i + k] in expansions[k] for k in range(n)):
+            return True
+    return False
+
+
+def kwic(sentence, terms, width=CONTEXT_WIDTH):
+    """第一个命中词前后各 width 个字符；没有单独的命中词（例如纯 NOT 查询）时返回句首"""
+    for m in TOKEN_RE.finditer(sentence):
+        if m.group(0).lower().replace('ё', 'е') in terms:
+            s, e = m.span()
+            left = sentence[max(0, s - width):s]
+            right = sentence[e:e + width]
+            return {'left': ('…' if s > width else '') + left, 'match': m.group(0),
+                    'right': right + ('…' if e + width < len(sentence) else '')}
+    return {'left': '', 'match': '', 'right': sentence[:width * 2]}
+
+
+# --- HTTP 服务 ---
+
+def make_handler(index):
+    class KwicHandler(BaseHTTPRequestHandler):
+        def _send(self, obj, code=200):
+            body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            p = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            if parts.path == '/search':
+                if not p.get('q'):
+                    self._send({'error': '缺少参数 q'}, 400)
+                    return
+                try:
+                    self._send(index.search(
+                        p['q'], source=p.get('source'), window=p.get('window'),
+                        date_from=p.get('from'), date_to=p.get('to'),
+                        width=int(p.get('width', CONTEXT_WIDTH)), limit=int(p.get('limit', DEFAULT_LIMIT)),
+                        offset=int(p.get('offset', 0))))
+                except ValueError as e:
+                    self._send({'error': str(e)}, 400)
+            elif parts.path == '/stats':
+                self._send(index.stats())
+            elif parts.path == '/reload':
+                self._send({'changed': index.refresh()})
+            else:
+                self._send({'error': 'not found'}, 404)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return KwicHandler
+
+
+def _watch(index, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            if index.refresh():
+                print(f"🔄 检测到语料变化，索引已更新：{index.stats()['sentences']} 句")
+        except Exception as e:
+            print(f"⚠️ 索引更新失败: {e}")
+
+
+def _print_result(result):
+    print(f"🔎 {result['query']}：共 {result['total']} 句，用时 {result['took_ms']} ms")
+    for row in result['hits']:
+        print(f"  [{row['source']}{row['window']} {row['date'] or '----------'}] "
+              f"{row['left']:>{CONTEXT_WIDTH + 1}}【{row['match']}】{row['right']}")
+        print(f"      {row['url']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='语料倒排索引与 KWIC 检索服务')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--index-dir', default=INDEX_DIR)
+    sub = parser.add_subparsers(dest='cmd')
+    sub.add_parser('build', help='建立 / 增量更新索引')
+    p_query = sub.add_parser('query', help='命令行查询')
+    p_query.add_argument('q')
+    p_query.add_argument('--source')
+    p_query.add_argument('--window')
+    p_query.add_argument('--from', dest='date_from')
+    p_query.add_argument('--to', dest='date_to')
+    p_query.add_argument('--limit', type=int, default=20)
+    p_serve = sub.add_parser('serve', help='启动 HTTP/JSON 服务')
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, default=PORT)
+    p_serve.add_argument('--watch', type=int, default=WATCH_INTERVAL, help='检查新 CSV 的间隔秒数，0 关闭')
+    args = parser.parse_args()
+
+    if args.cmd == 'build':
+        start = time.time()
+        manifest, rebuilt = build_index(args.data_dir, args.index_dir)
+        print(f"✓ 索引 {len(manifest)} 个文件，本次更新 {rebuilt} 个，用时 {time.time() - start:.2f} 秒")
+        return
+
+    if args.cmd == 'query':
+        index = CorpusIndex(args.data_dir, args.index_dir)
+        try:
+            result = index.search(args.q, source=args.source, window=args.window,
+                                  date_from=args.date_from, date_to=args.date_to, limit=args.limit)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        _print_result(result)
+        return
+
+    if args.cmd == 'serve':
+        index = CorpusIndex(args.data_dir, args.index_dir)
+        stats = index.stats()
+        print(f"📚 已加载 {stats['segments']} 个索引段，{stats['sentences']} 句，{stats['terms']} 个词")
+        if args.watch:
+            threading.Thread(target=_watch, args=(index, args.watch), daemon=True).start()
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(index))
+        print(f"🌐 检索服务: http://{args.host}:{args.port}/search?q=Huawei")
+        server.serve_forever()
+        return
+
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+抓取前的链接过滤：站点规则 + 可选的轻量打分器，只区分“文章页 / 导航、栏目等非文章页”。
+
+站点规则：文章链接的路径特征（例如 TASS 的 /栏目/数字ID）、页面导航/页脚位置。默认只用规则。
+打分器（LinkFilter(use_model=True)）：朴素贝叶斯，特征为域名、路径形状、标题词、在链接文件中的位置；
+训练样本取 数据/*链接/*.txt：在 数据/*数据/*.csv 里有产出的、或站点规则判为文章的是文章页，
+规则判为非文章的是非文章页，其余不作样本。不按“有没有关键词”打标签，否则学到的是关键词而不是页面类型。
+
+命令：
+    python link_filter.py train                      # 训练并保存 link_filter_model.json
+    python link_filter.py filter urls.txt --out urls_filtered.txt [--model]
+"""
+
+import argparse
+import csv
+import glob
+import json
+import math
+import os
+import re
+from urllib.parse import urlsplit
+
+import stage_profile
+from link_source import iter_links, canonical_url
+
+# --- 配置 ---
+MODEL_FILE = "link_filter_model.json"
+DATA_DIR = "数据"
+THRESHOLD = 0.2          # 打分器给出的文章页概率低于该值的链接直接丢弃
+HEAD_TAIL = 20           # 链接文件开头/末尾多少条视为“导航区”位置特征
+
+# 站点规则：article 命中视为文章；reject 命中直接丢弃
+SITE_RULES = {
+    'tass.ru': {
+        'article': re.compile(r'^/[a-z0-9\-]+/\d{5,}/?$'),
+        'reject': re.compile(r'^/[a-z0-9\-]*/?$'),
+    },
+    'russian.rt.com': {
+        'article': re.compile(r'/\d{5,}-[\w\-]+/?$'),
+        'reject': re.compile(r'^/(search|tag|trend|listing|about|schedule)\b|^/[a-z\-]*/?$'),
+    },
+    'www.kommersant.ru': {
+        'article': re.compile(r'^/doc/\d+/?$'),
+        'reject': re.compile(r'^/(search|rubric|theme|archive|lk|subscription)\b'),
+    },
+}
+
+# 导航 / 页脚等“页面框架”区域的特征
+CHROME_TAGS = {'nav', 'header', 'footer', 'aside'}
+CHROME_CLASS_RE = re.compile(r'menu|nav|footer|header|breadcrumb|sidebar|subscribe|social', re.I)
+
+DATE_SUFFIX_RE = re.compile(r'(\d{1,2}:\d{2}|\d{1,2} [а-яё]+(?: \d{4})?)$', re.I)
+WORD_RE = re.compile(r'\w+', re.U)
+
+
+def in_page_chrome(a_tag):
+    """判断 BeautifulSoup 的 <a> 是否位于导航栏 / 页眉 / 页脚等区域"""
+    for parent in a_tag.parents:
+        if parent.name in CHROME_TAGS:
+            return True
+        attrs = getattr(parent, 'attrs', None) or {}
+        marker = ' '.join(attrs.get('class', [])) + ' ' + (attrs.get('id') or '')
+        if marker.strip() and CHROME_CLASS_RE.search(marker):
+            return True
+    return False
+
+
+def rule_verdict(url):
+    """站点规则判断：返回 'article' / 'reject' / None（未知）"""
+    parts = urlsplit(url)
+    rules = SITE_RULES.get(parts.netloc.lower())
+    if not rules:
+        return None
+    if rules['article'].search(parts.path):
+        return 'article'
+    if rules['reject'].search(parts.path):
+        return 'reject'
+    return None
+
+
+def link_features(url, title='', position=None, total=None):
+    """抽取打分特征"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip('/')
+    segments = [s for s in path.split('/') if s]
+    feats = ['host:' + parts.netloc.lower(), 'depth:%d' % min(len(segments), 4)]
+    if segments:
+        feats.append('seg0:' + segments[0])
+        last = segments[-1]
+        shape = re.sub(r'\d+', 'D', re.sub(r'[a-z]+', 'a', last.lower()))
+        feats.append('shape:' + shape[:12])
+    title = title or ''
+    feats.append('tlen:%d' % min(len(title) // 20, 6))
+    feats.append('tdate:%d' % bool(DATE_SUFFIX_RE.search(title)))
+    feats.extend('w:' + w for w in WORD_RE.findall(title.lower()) if len(w) > 2)
+    if position is not None and total:
+        if position < HEAD_TAIL:
+            feats.append('pos:head')
+        elif position >= total - HEAD_TAIL:
+            feats.append('pos:tail')
+        else:
+            feats.append('pos:mid')
+    return feats
+
+
+class LinkScorer:
+    """朴素贝叶斯打分器，输出“链接是文章页”的概率"""
+
+    def __init__(self, counts=None, totals=None, docs=None):
+        self.counts = counts or {'1': {}, '0': {}}
+        self.totals = totals or {'1': 0, '0': 0}
+        self.docs = docs or {'1': 0, '0': 0}
+
+    def add(self, feats, label):
+        key = '1' if label else '0'
+        table = self.counts[key]
+        for f in feats:
+            table[f] = table.get(f, 0) + 1
+        self.totals[key] += len(feats)
+        self.docs[key] += 1
+
+    def probability(self, feats):
+        if not self.docs['1'] or not self.docs['0']:
+            return 0.5
+        vocab = len(set(self.counts['1']) | set(self.counts['0'])) or 1
+        logit = math.log(self.docs['1'] / self.docs['0'])
+        for f in feats:
+            p1 = (self.counts['1'].get(f, 0) + 1) / (self.totals['1'] + vocab)
+            p0 = (self.counts['0'].get(f, 0) + 1) / (self.totals['0'] + vocab)
+            logit += math.log(p1 / p0)
+        logit = max(-30.0, min(30.0, logit))
+        return 1.0 / (1.0 + math.exp(-logit))
+
+    def save(self, path=MODEL_FILE):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'counts': self.counts, 'totals': self.totals, 'docs': self.docs},
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls(data['counts'], data['totals'], data['docs'])
+
+
+class LinkFilter:
+    """规则 + 打分器组合：先按规则裁决，规则不确定时交给打分器；默认只用规则"""
+
+    def __init__(self, scorer=None, threshold=THRESHOLD, use_model=False):
+        if scorer is None and use_model:
+            scorer = LinkScorer.load()
+        self.scorer = scorer
+        self.threshold = threshold
+
+    def score(self, url, title='', position=None, total=None):
+        verdict = rule_verdict(url)
+        if verdict == 'reject':
+            return 0.0
+        prob = 0.5
+        if self.scorer is not None:
+            prob = self.scorer.probability(link_features(url, title, position, total))
+        if verdict == 'article':
+            prob = max(prob, self.threshold)
+        return prob
+
+    def keep(self, url, title='', position=None, total=None):
+        return self.score(url, title, position, total) >= self.threshold
+
+    def filter_links(self, links, reorder=True):
+        """
+        过滤并按相关性排序
+
+        参数:
+            links (list): (title, url) 列表，保持链接文件中的顺序
+            reorder (bool): 高分在前；False 时保持原顺序（输出按日期排列时用）
+        返回:
+            list: 保留的 (title, url)
+        """
+        total = len(links)
+        scored = []
+        for i, (title, url) in enumerate(links):
+            s = self.score(url, title, i, total)
+            if s >= self.threshold:
+                scored.append((s, i, title, url))
+        if reorder:
+            scored.sort(key=lambda x: (-x[0], x[1]))
+        return [(title, url) for _, _, title, url in scored]
+
+
+def _read_link_file(path):
+    # 不去重：行号位置是特征之一
+    return list(iter_links(path, dedup=False, verbose=False))
+
+
+def _read_output_urls(path):
+    urls = set()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) > 1:
+                urls.add(canonical_url(row[1]))
+    return urls
+
+
+def training_pairs(data_dir=DATA_DIR):
+    """配对 链接文件 ↔ 产出文件，例如 tass链接/20-21.txt ↔ tass数据/tass20-21.csv"""
+    pairs = []
+    for link_path in sorted(glob.glob(os.path.join(data_dir, '*链接', '*.txt'))):
+        folder = os.path.basename(os.path.dirname(link_path))
+        source = folder[:-len('链接')]
+        name = os.path.splitext(os.path.basename(link_path))[0]
+        if not name.startswith(source):
+            name = source + name
+        out_path = os.path.join(data_dir, source + '数据', name + '.csv')
+        if os.path.exists(out_path):
+            pairs.append((link_path, out_path))
+    return pairs
+
+
+def article_label(url, hits):
+    """训练标签：True 文章页，False 非文章页，None 无法判断（不作样本）"""
+    if canonical_url(url) in hits:
+        return True    # 有产出说明抓到了正文
+    verdict = rule_verdict(url)
+    if verdict is None:
+        return None    # 没有产出可能只是不含关键词，不能当作非文章页
+    return verdict == 'article'
+
+
+def train(data_dir=DATA_DIR, model_file=MODEL_FILE):
+    scorer = LinkScorer()
+    for link_path, out_path in training_pairs(data_dir):
+        links = _read_link_file(link_path)
+        hits = _read_output_urls(out_path)
+        counts = {True: 0, False: 0, None: 0}
+        for i, (title, url) in enumerate(links):
+            label = article_label(url, hits)
+            counts[label] += 1
+            if label is not None:
+                scorer.add(link_features(url, title, i, len(links)), label)
+        print(f"📚 {link_path}: {len(links)} 条，文章 {counts[True]}，非文章 {counts[False]}，不作样本 {counts[None]}")
+    scorer.save(model_file)
+    print(f"✓ 模型已保存: {model_file}（正样本 {scorer.docs['1']}，负样本 {scorer.docs['0']}）")
+    return scorer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抓取前链接过滤')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_train = sub.add_parser('train')
+    p_train.add_argument('--data', default=DATA_DIR)
+    p_filter = sub.add_parser('filter')
+    p_filter.add_argument('input')
+    p_filter.add_argument('--out', default='urls_filtered.txt')
+    p_filter.add_argument('--threshold', type=float, default=THRESHOLD)
+    p_filter.add_argument('--model', action='store_true', help='规则判断不了的链接交给打分器（先运行 train）')
+    args = parser.parse_args()
+
+    if args.cmd == 'train':
+        train(args.data)
+    else:
+        links = _read_link_file(args.input)
+        kept = LinkFilter(threshold=args.threshold, use_model=args.model).filter_links(links)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            for title, url in kept:
+                f.write(f"{title},{url}\n")
+        print(f"✓ {len(links)} 条链接保留 {len(kept)} 条，已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+链接文件读取：urls.txt 和 数据/*链接/*.txt 都是每行 `标题,链接`。
+
+原来的写法是 readlines() 整个读进内存再 line.split(',', 1)：标题里只要有逗号，
+标题的后半截就跑进了 URL，所以才有 `"https://" in url[8:]` 那段修补。这里改为：
+* 内存映射逐行读取，启动时间和内存与文件大小无关；
+* 从右边切出 URL（rsplit），修复粘连后校验，坏行给出文件名和行号并跳过，不再悄悄抓错地址；
+  产出的是原链接（请求就用它），规范化的 canonical_url 只作去重 / 比对的键；
+* 多个文件 / 通配符合并成一个去重的流，去重只存 8 字节摘要。
+
+用法（在其他脚本里）：
+    from link_source import iter_links, count_links
+    for title, url in iter_links('urls.txt'):
+        ...
+命令（检查链接文件）：
+    python link_source.py "数据/tass链接/*.txt" urls.txt
+"""
+
+import argparse
+import glob
+import hashlib
+import mmap
+import os
+import re
+from collections import namedtuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import stage_profile
+
+# 跟踪参数按名字精确匹配（另加 utm_* 前缀）；fromSite、from_page 之类会影响返回内容，不能去掉
+TRACKING_PARAMS = {'from', 'yclid', 'gclid', 'fbclid'}
+TRACKING_PREFIX = 'utm_'
+HOST_RE = re.compile(r'^[a-z0-9.-]+\.[a-z]{2,}(:\d+)?$|^(localhost|127\.0\.0\.1)(:\d+)?$')
+
+# 只有两个字段，和原来的 (title, url) 元组可以互换
+LinkRecord = namedtuple('LinkRecord', ['title', 'url'])
+
+
+def repair_url(url):
+    """去掉首尾空白、修复两个链接粘在一起（取后一个）；其余保持原样，用于请求"""
+    url = (url or '').strip()
+    if "https://" in url[8:]:
+        url = "https://" + url.split("https://")[-1]
+    return url
+
+
+def _is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIX)
+
+
+def canonical_url(url):
+    """
+    去重 / 比对用的键：修复粘连、统一 https、小写域名、去掉片段 / 跟踪参数 / 末尾斜杠。
+    改写后的地址不一定能请求到同一个页面，抓取时用原链接
+    """
+    url = repair_url(url)
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return url
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)]
+    path = parts.path.rstrip('/') or '/'
+    scheme = 'http' if parts.netloc.startswith(('127.0.0.1', 'localhost')) else 'https'
+    return urlunsplit((scheme, parts.netloc.lower(), path, urlencode(query), ''))
+
+
+def parse_line(line):
+    """
+    解析 `标题,链接` 一行
+
+    返回:
+        tuple: (LinkRecord 或 None, 问题说明 或 None)；空行返回 (None, None)
+    """
+    line = line.strip()
+    if not line:
+        return None, None
+    if ',' not in line:
+        return None, '没有逗号'
+    title, url = line.rsplit(',', 1)
+    url = url.strip()
+    if not url.startswith(('http://', 'https://')):
+        return None, f'不是链接: {url[:60]}'
+    url = repair_url(url)
+    parts = urlsplit(url)
+    if not HOST_RE.match(parts.netloc.lower()) or any(c.isspace() for c in url):
+        return None, f'链接不合法: {url[:60]}'
+    return LinkRecord(title.strip(), url), None
+
+
+def _iter_lines(path):
+    """内存映射逐行读取；空文件直接返回"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw in iter(mm.readline, b''):
+                yield raw.decode('utf-8', errors='replace').lstrip('﻿')
+
+
+def expand_paths(patterns):
+    """文件名和通配符展开为文件列表（保持给定顺序，通配符内部按名字排序）"""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    paths = []
+    for pattern in patterns:
+        matched = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(p for p in matched if p not in paths)
+    return paths
+
+
+def iter_links(patterns, dedup=True, verbose=True, problems=None):
+    """
+    依次读取多个链接文件，惰性产出 LinkRecord(title, url)
+
+    参数:
+        patterns (str|list): 文件名或通配符
+        dedup (bool): 按 canonical_url 去重（跨文件），产出的仍是原链接
+        verbose (bool): 打印坏行
+        problems (list): 传入列表时收集 (文件, 行号, 说明)
+    """
+    seen = set()
+    for path in expand_paths(patterns):
+        for lineno, line in enumerate(_iter_lines(path), 1):
+            record, problem = parse_line(line)
+            if problem:
+                if verbose:
+                    print(f"  ⚠️ {path}:{lineno} {problem}")
+                if problems is not None:
+                    problems.append((path, lineno, problem))
+                continue
+            if record is None:
+                continue
+            if dedup:
+                digest = hashlib.blake2b(canonical_url(record.url).encode('utf-8'), digest_size=8).digest()
+                if digest in seen:
+                    continue
+                seen.add(digest)
+            yield record
+
+
+def count_links(patterns):
+    """数非空行（用于显示进度），不解析内容"""
+    total = 0
+    for path in expand_paths(patterns):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for raw in iter(mm.readline, b''):
+                    total += bool(raw.strip())
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查链接文件：坏行、重复、规范化后的链接数')
+    parser.add_argument('patterns', nargs='+')
+    parser.add_argument('--out', help='把去重后的链接写到这个文件')
+    args = parser.parse_args()
+
+    problems = []
+    total = count_links(args.patterns)
+    records = iter_links(args.patterns, problems=problems)
+    kept = 0
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            for title, url in records:
+                f.write(f"{title},{url}\n")
+                kept += 1
+    else:
+        for _ in records:
+            kept += 1
+    print(f"\n📊 共 {total} 行：有效且不重复 {kept} 条，坏行 {len(problems)} 条，"
+          f"重复 {total - kept - len(problems)} 条")
+    if args.out:
+        print(f"✓ 已写入: {args.out}")
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
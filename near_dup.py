@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+近重复检测：同一条通稿会以不同 URL、在不同来源（TASS / RT / RT 的合作方文章）里出现，
+只改几个词。现有去重只有每篇文章内的 list(set(matches))，近似的句子照样重复计数。
+
+* 句子：64 位 SimHash，分成 4 段 16 位做 LSH 分桶——汉明距离 ≤ 3 的两条必有一段完全相同；
+* 文章（同一 URL 的标题 + 全部匹配语句）：MinHash 签名 + 分段 LSH，估计 Jaccard 相似度；
+* 候选对核实后用并查集聚成簇，只标记不删除：输出增加 句簇号 / 句近重复 / 文章簇号 / 文章近重复 四列；
+* 内存：分桶表是有上限的 LRU，不随语料增长；签名、并查集和每行的编号存在定长数组里，
+  随语料线性增长——每条句子约 33 字节，每篇文章约 520 字节，几百万条句子约一两百 MB。
+
+命令：
+    python near_dup.py 数据/*/*.csv --out-dir 去重结果
+    python near_dup.py 数据/tass数据/*.csv 数据/rt数据/*.csv --distance 3 --jaccard 0.6
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import re
+from array import array
+from collections import OrderedDict
+
+import stage_profile
+
+# --- 配置 ---
+SIMHASH_BANDS = 4            # 4 段 × 16 位：距离 ≤ 3 时至少一段相同
+MAX_DISTANCE = 3             # 句子近重复的汉明距离上限
+MIN_TOKENS = 5               # 少于这么多词的短句只认完全相同
+NUM_PERM = 64                # MinHash 置换数
+MINHASH_BANDS = 16           # 16 段 × 4 行：相似度约 0.5 以上的文章大概率成为候选
+SHINGLE = 3                  # 文章按 3 词窗口切片
+JACCARD = 0.6                # 文章近重复的估计 Jaccard 下限
+MAX_BUCKETS = 2_000_000      # 每个 LSH 表最多保留的分桶数（超出按 LRU 淘汰）
+BUCKET_CAP = 8               # 每个分桶最多保留的成员数
+
+SENTENCE_COLUMNS = ['匹配语料', '语句内容', '匹配语句']
+URL_COLUMNS = ['链接', '来源URL', '原链接']
+TITLE_COLUMNS = ['标题']
+OUTPUT_COLUMNS = ['句簇号', '句近重复', '文章簇号', '文章近重复']
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+MERSENNE = (1 << 61) - 1
+MASK64 = (1 << 64) - 1
+
+
+def tokens(text):
+    """小写、ё 统一为 е，切成词"""
+    return WORD_RE.findall(text.lower().replace('ё', 'е'))
+
+
+def _hash64(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(words):
+    """单词 + 相邻词对作为特征的 64 位 SimHash"""
+    features = list(words) + [a + ' ' + b for a, b in zip(words, words[1:])]
+    weights = [0] * 64
+    for feature in features:
+        h = _hash64(feature)
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    value = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            value |= 1 << bit
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class BandIndex:
+    """LSH 分桶表：键为 (段号, 段值)，LRU 淘汰，桶内只留最近 BUCKET_CAP 个成员"""
+
+    def __init__(self, max_buckets=MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+
+    def query_insert(self, item_id, band_keys):
+        candidates = set()
+        for key in band_keys:
+            members = self.buckets.get(key)
+            if members is None:
+                members = self.buckets[key] = []
+                if len(self.buckets) > self.max_buckets:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+                candidates.update(members)
+            members.append(item_id)
+            if len(members) > BUCKET_CAP:
+                del members[0]
+        return candidates
+
+
+class MinHasher:
+    """(a·x + b) mod p 形式的 NUM_PERM 个哈希函数"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        self.num_perm = num_perm
+        params = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f"{seed}:{i}".encode(), digest_size=16).digest()
+            a = int.from_bytes(digest[:8], 'big') % MERSENNE or 1
+            b = int.from_bytes(digest[8:], 'big') % MERSENNE
+            params.append((a, b))
+        self.params = params
+
+    def signature(self, words):
+        shingles = {' '.join(words[i:i + SHINGLE]) for i in range(max(1, len(words) - SHINGLE + 1))}
+        hashes = [_hash64(s) for s in shingles]
+        return [min((a * h + b) % MERSENNE for h in hashes) & 0xFFFFFFFF for a, b in self.params]
+
+
+class UnionFind:
+    """编号连续的并查集，根总是簇内最小的编号（即最早出现的那条）"""
+
+    def __init__(self):
+        self.parent = array('q')
+
+    def add(self):
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+
+class NearDupDetector:
+    """逐条喂入句子 / 文章，返回编号；全部喂完后用 sentence_cluster / article_cluster 查簇"""
+
+    def __init__(self, max_distance=MAX_DISTANCE, jaccard=JACCARD, max_buckets=MAX_BUCKETS):
+        self.max_distance = max_distance
+        self.jaccard = jaccard
+        self.sent_sigs = array('Q')
+        self.sent_short = bytearray()
+        self.sent_index = BandIndex(max_buckets)
+        self.sent_uf = UnionFind()
+        self.hasher = MinHasher()
+        self.art_sigs = array('L')
+        self.art_index = BandIndex(max_buckets)
+        self.art_uf = UnionFind()
+
+    def add_sentence(self, text):
+        words = tokens(text)
+        sig = simhash(words) if words else 0
+        short = len(words) < MIN_TOKENS
+        item_id = self.sent_uf.add()
+        self.sent_sigs.append(sig)
+        self.sent_short.append(short)
+        width = 64 // SIMHASH_BANDS
+        keys = [(band, sig >> (band * width) & ((1 << width) - 1)) for band in range(SIMHASH_BANDS)]
+        for other in self.sent_index.query_insert(item_id, keys):
+            limit = 0 if short or self.sent_short[other] else self.max_distance
+            if hamming(sig, self.sent_sigs[other]) <= limit:
+                self.sent_uf.union(item_id, other)
+        return item_id
+
+    def add_article(self, text):
+        sig = self.hasher.signature(tokens(text))
+        item_id = self.art_uf.add()
+        self.art_sigs.extend(sig)
+        rows = NUM_PERM // MINHASH_BANDS
+        keys = [(band, tuple(sig[band * rows:(band + 1) * rows])) for band in range(MINHASH_BANDS)]
+        for other in self.art_index.query_insert(item_id, keys):
+            other_sig = self.art_sigs[other * NUM_PERM:(other + 1) * NUM_PERM]
+            same = sum(1 for x, y in zip(sig, other_sig) if x == y)
+            if same / NUM_PERM >= self.jaccard:
+                self.art_uf.union(item_id, other)
+        return item_id
+
+    def sentence_cluster(self, item_id):
+        return self.sent_uf.find(item_id)
+
+    def article_cluster(self, item_id):
+        return self.art_uf.find(item_id)
+
+
+def _pick(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def _iter_rows(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        yield header
+        for row in reader:
+            yield row
+
+
+def scan(paths, detector):
+    """
+    第一遍：流式读取所有 CSV，计算签名并合并簇
+    返回每个文件的 (路径, 句编号数组, 文章编号数组)，没有语句的空行为 -1
+    """
+    ids = []
+    for path in paths:
+        rows = _iter_rows(path)
+        header = next(rows, None)
+        if header is None:
+            continue
+        s_col, u_col, t_col = _pick(header, SENTENCE_COLUMNS), _pick(header, URL_COLUMNS), _pick(header, TITLE_COLUMNS)
+        if s_col is None:
+            print(f"⚠️ {path} 没有语句列，跳过")
+            continue
+        file_sent = array('q')
+        file_art = array('q')
+        article_rows = []    # 当前文章（连续相同 URL）在 file_sent 中的位置
+        article_text = []
+        current_url = None
+
+        def close_article():
+            if article_rows:
+                art_id = detector.add_article(' '.join(article_text))
+                for pos in article_rows:
+                    file_art[pos] = art_id
+
+        for row in rows:
+            sentence = row[s_col].strip() if len(row) > s_col else ''
+            if not sentence:
+                file_sent.append(-1)
+                file_art.append(-1)
+                continue
+            url = row[u_col] if u_col is not None and len(row) > u_col else ''
+            if url != current_url:
+                close_article()
+                article_rows, article_text = [], []
+                if t_col is not None and len(row) > t_col:
+                    article_text.append(row[t_col])
+                current_url = url
+            article_rows.append(len(file_sent))
+            article_text.append(sentence)
+            file_sent.append(detector.add_sentence(sentence))
+            file_art.append(-1)
+        close_article()
+        ids.append((path, file_sent, file_art))
+    return ids
+
+
+def output_paths(paths, out_dir):
+    """保留输入文件相对公共目录的路径：数据/tass数据/x.csv → out_dir/tass数据/x.csv，不同子目录里的同名文件不会互相覆盖"""
+    if not paths:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    return [os.path.join(out_dir, os.path.relpath(os.path.abspath(p), root)) for p in paths]
+
+
+def write_flagged(ids, detector, out_dir):
+    """第二遍：按最终的簇重写每个文件，增加标记列；返回 (句子数, 近重复句子数, 文章数, 近重复文章数)"""
+    n_sent = n_sent_dup = 0
+    seen_articles = set()
+    dup_articles = set()
+    out_paths = output_paths([path for path, _, _ in ids], out_dir)
+    for (path, file_sent, file_art), out_path in zip(ids, out_paths):
+        os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+        rows = _iter_rows(path)
+        header = next(rows)
+        with open(out_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header + OUTPUT_COLUMNS)
+            for row, sent_id, art_id in zip(rows, file_sent, file_art):
+                if sent_id < 0:
+                    writer.writerow(row + ['', '', '', ''])
+                    continue
+                s_root = detector.sentence_cluster(sent_id)
+                a_root = detector.article_cluster(art_id)
+                n_sent += 1
+                n_sent_dup += s_root != sent_id
+                seen_articles.add(art_id)
+                if a_root != art_id:
+                    dup_articles.add(art_id)
+                writer.writerow(row + [s_root, '是' if s_root != sent_id else '否',
+                                       a_root, '是' if a_root != art_id else '否'])
+        print(f"  ✓ {out_path}")
+    return n_sent, n_sent_dup, len(seen_articles), len(dup_articles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='近重复句子 / 文章检测（只标记不删除）')
+    parser.add_argument('files', nargs='+', help='CSV 文件，可用通配符')
+    parser.add_argument('--out-dir', default='去重结果')
+    parser.add_argument('--distance', type=int, default=MAX_DISTANCE, help='句子 SimHash 汉明距离上限（≤3）')
+    parser.add_argument('--jaccard', type=float, default=JACCARD, help='文章估计 Jaccard 相似度下限')
+    parser.add_argument('--max-buckets', type=int, default=MAX_BUCKETS, help='每个分桶表的上限（控制内存）')
+    args = parser.parse_args()
+
+    paths = []
+    for pattern in args.files:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    if args.distance > MAX_DISTANCE:
+        print(f"⚠️ 4 段分桶只能保证找全距离 ≤ {MAX_DISTANCE} 的句子，更远的会有遗漏")
+
+    detector = NearDupDetector(args.distance, args.jaccard, args.max_buckets)
+    print(f"🔍 扫描 {len(paths)} 个文件...")
+    with stage_profile.stage('classify'):
+        ids = scan(paths, detector)
+    with stage_profile.stage('write'):
+        n_sent, n_sent_dup, n_art, n_art_dup = write_flagged(ids, detector, args.out_dir)
+    print(f"\n📊 句子 {n_sent} 条，其中近重复 {n_sent_dup} 条；"
+          f"文章 {n_art} 篇，其中近重复 {n_art_dup} 篇")
+    print(f"✓ 标记结果已写入: {args.out_dir}/")
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+紧凑的链接 / 结果容器。
+
+原来链接是字典列表（11.py 的 {'url':…, 'title':…}），结果是元组列表（extract_keywords*.py 的
+all_results）或列表的列表（11.py 的 final_data）：每一行都是一个独立的 Python 对象，
+同一个 URL / 标题在每条命中语句里重复出现。几十万篇文章时这部分占了大半内存。
+
+* StringPool：URL、标题、关键词只存一份，行里只记 4 字节编号；
+* LinkBatch / ResultBatch：按列存在 array 里，语句按 UTF-8 连续存放在一个 bytearray 中；
+* 遍历时才临时生成 LinkRecord / ResultRecord（__slots__，无 __dict__），阶段之间直接传整个批次。
+
+用法：
+    batch = ResultBatch()
+    batch.append(url, sentence, title=title, keyword=keyword)
+    for r in batch:
+        writer.writerow([r.article, r.url, r.title, r.sentence])
+"""
+
+from array import array
+
+from link_source import LinkRecord
+
+
+class StringPool:
+    """字符串驻留：同一字符串只保存一次，用连续编号引用"""
+
+    __slots__ = ('ids', 'strings')
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, s):
+        s = s or ''
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def __getitem__(self, i):
+        return self.strings[i]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class ResultRecord:
+    """一条命中语句；article 为文章序号（从 1 开始）"""
+
+    __slots__ = ('article', 'url', 'title', 'sentence', 'keyword')
+
+    def __init__(self, article, url, title, sentence, keyword):
+        self.article = article
+        self.url = url
+        self.title = title
+        self.sentence = sentence
+        self.keyword = keyword
+
+    def __repr__(self):
+        return f"ResultRecord({self.article}, {self.url!r}, {self.sentence[:30]!r}...)"
+
+
+class LinkBatch:
+    """按列存储的链接列表，按 URL 去重，遍历产出 LinkRecord(title, url)"""
+
+    def __init__(self, pool=None):
+        self.pool = pool or StringPool()
+        self.urls = array('I')
+        self.titles = array('I')
+        self.seen = set()
+
+    def add(self, title, url):
+        """新增一条链接；URL 已存在时返回 False"""
+        url_id = self.pool.intern(url)
+        if url_id in self.seen:
+            return False
+        self.seen.add(url_id)
+        self.urls.append(url_id)
+        self.titles.append(self.pool.intern(title))
+        return True
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __getitem__(self, i):
+        return LinkRecord(self.pool[self.titles[i]], self.pool[self.urls[i]])
+
+    def __iter__(self):
+        pool = self.pool
+        for url_id, title_id in zip(self.urls, self.titles):
+            yield LinkRecord(pool[title_id], pool[url_id])
+
+
+class ResultBatch:
+    """
+    按列存储的命中语句：文章序号 / URL / 标题 / 关键词为编号数组，
+    语句按 UTF-8 连续存放，offsets[i]:offsets[i+1] 为第 i 条
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool or StringPool()
+        self.articles = array('I')
+        self.urls = array('I')
+        self.titles = array('I')
+        self.keywords = array('I')
+        self.text = bytearray()
+        self.offsets = array('Q', [0])
+        self._last_url = None
+        self._article = 0
+
+    def append(self, url, sentence, title='', keyword='', article=None):
+        """
+        追加一条；article 不传时按 URL 变化自动递增（同一篇文章的语句连续追加）
+        """
+        pool = self.pool
+        url_id = pool.intern(url)
+        if article is None:
+            if url_id != self._last_url:
+                self._article += 1
+            article = self._article
+        self._last_url = url_id
+        self.articles.append(article)
+        self.urls.append(url_id)
+        self.titles.append(pool.intern(title))
+        self.keywords.append(pool.intern(keyword))
+        self.text += sentence.encode('utf-8')
+        self.offsets.append(len(self.text))
+
+    def extend(self, url, sentences, title='', keyword='', article=None):
+        """追加同一篇文章的多条语句"""
+        for sentence in sentences:
+            self.append(url, sentence, title, keyword, article)
+
+    def sentence(self, i):
+        return self.text[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __getitem__(self, i):
+        pool = self.pool
+        return ResultRecord(self.articles[i], pool[self.urls[i]], pool[self.titles[i]],
+                            self.sentence(i), pool[self.keywords[i]])
+
+    def __iter__(self):
+        for i in range(len(self.urls)):
+            yield self[i]
+
+    def article_count(self):
+        return len(set(self.urls))
+
+    def nbytes(self):
+        """数组和语句缓冲区占用的字节数（不含字符串池）"""
+        arrays = (self.articles, self.urls, self.titles, self.keywords, self.offsets)
+        return len(self.text) + sum(a.itemsize * len(a) for a in arrays)
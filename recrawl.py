@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+已抓文章的增量复查：只在文章正文真的变了时才重新提取语句。
+
+文章发布后常被补充、更正，原来只有两种选择：永远不再看，或者把 数据/*链接 全部重抓一遍。
+本脚本用 SQLite 记录每个 URL 的正文哈希、ETag / Last-Modified、上次检查时间和下次检查时间：
+* 复查用条件请求（If-None-Match / If-Modified-Since），304 直接跳过，不下载正文；
+* 拿到 200 时比较正文哈希，只有变化的文章才重新分句匹配，新增 / 删除的语句写入 RECRAWL_OUTPUT；
+* 复查间隔自适应：变了就缩短（× SHRINK），没变就拉长（× GROW）；本页检查次数少时向同栏目
+  （例如 tass.ru/ekonomika）的平均变化频率靠拢；新文章首次间隔短，老文章长；
+* 404 / 410 记为 gone，不再复查；其他错误稍后重试。
+
+命令：
+    python recrawl.py init                     # 从 数据/ 下的语料导入已抓文章
+    python recrawl.py run --limit 200          # 复查到期的文章（--max-minutes 限制时长）
+    python recrawl.py stats                    # 各栏目变化率、间隔，预计每天请求数与全量重抓对比
+"""
+
+import argparse
+import csv
+import datetime
+import glob
+import hashlib
+import math
+import os
+import random
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import crawl_metrics as metrics
+import hedged_fetch
+import stage_profile
+from corpus_import import iter_data_file
+from date_bucket import detect_window, window_range
+from ru_match import KeywordMatcher
+from stream_fetch import DEFAULT_HEADERS
+
+# --- 配置 ---
+DB_FILE = "recrawl.db"
+DATA_DIR = "数据"
+RECRAWL_OUTPUT = "recrawl_changes.csv"
+KEYWORDS = ["Huawei", "华为", "Хуавэй", "Hua wei"]
+DAY = 86400
+MIN_INTERVAL = 1 * DAY
+MAX_INTERVAL = 180 * DAY
+AGE_FACTOR = 0.1             # 首次复查间隔 = 文章年龄 × AGE_FACTOR（再限制在上下限之间）
+SHRINK = 0.5                 # 正文变化后间隔乘以这个数
+GROW = 1.6                   # 正文没变时间隔乘以这个数
+PRIOR_CHECKS = 3             # 本页比较次数少于这个数时参考同栏目的变化率
+ERROR_RETRY = 6 * 3600
+PAGE_DELAY = 2.0             # 同一站点两次请求之间的间隔（秒）
+FETCH_TIMEOUT = 20
+GONE_STATUS = (404, 410)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    title TEXT,
+    source TEXT,
+    section TEXT,
+    published TEXT,
+    body_hash TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    last_fetch REAL,
+    next_due REAL,
+    interval REAL,
+    checks INTEGER NOT NULL DEFAULT 0,
+    compared INTEGER NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'active',
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pages_due ON pages(status, next_due);
+CREATE TABLE IF NOT EXISTS sentences (
+    url TEXT NOT NULL,
+    sentence TEXT NOT NULL,
+    UNIQUE(url, sentence)
+);
+"""
+
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[。？！.!?])\s*')
+SPACE_RE = re.compile(r'\s+')
+
+
+def section_of(url):
+    """栏目 = 域名 + 路径第一段，例如 tass.ru/ekonomika"""
+    parts = urlsplit(url)
+    first = parts.path.strip('/').split('/', 1)[0]
+    return f"{parts.netloc}/{first}" if first else parts.netloc
+
+
+def body_hash(text):
+    return hashlib.sha1(SPACE_RE.sub(' ', text or '').strip().encode('utf-8')).hexdigest()
+
+
+def extract_sentences(text, matcher):
+    """与 shoudongtass_v4.extract_sentences 相同的分句和长度规则，直接作用于正文文本"""
+    matches = []
+    for s in SENTENCE_SPLIT_RE.split(text or ''):
+        s = s.strip()
+        if 15 < len(s) < 500 and matcher.search(s):
+            matches.append(s)
+    return list(dict.fromkeys(matches))
+
+
+def initial_interval(published, now=None):
+    """按文章年龄给首次复查间隔：新文章常被更新，老文章很少再改"""
+    now = now or time.time()
+    age = MAX_INTERVAL
+    if published:
+        try:
+            age = max(0.0, now - datetime.datetime.fromisoformat(published).timestamp())
+        except ValueError:
+            pass
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, age * AGE_FACTOR))
+
+
+def next_interval(interval, changed, section_rate=None, compared=0):
+    """
+    自适应复查间隔
+
+    参数:
+        changed (bool|None): 正文是否变化；None 表示首次检查（只建立基线）
+        section_rate (float): 同栏目已比较过的检查中正文变化的比例
+        compared (int): 本页已比较的次数
+    """
+    if changed is not None:
+        interval *= SHRINK if changed else GROW
+    if section_rate is not None and compared < PRIOR_CHECKS:
+        # 栏目变化率 r → 栏目建议间隔在上下限之间按对数插值，再与本页间隔取几何平均
+        span = math.log(MAX_INTERVAL / MIN_INTERVAL)
+        section_interval = MIN_INTERVAL * math.exp(span * (1 - min(1.0, section_rate)))
+        interval = math.sqrt(interval * section_interval)
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, interval))
+
+
+class RecrawlStore:
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def seed(self, articles):
+        """articles: {url: {'title', 'source', 'published', 'sentences'}}；已存在的 URL 忽略，返回新增数"""
+        now = time.time()
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        added = 0
+        for url, a in articles.items():
+            interval = initial_interval(a['published'], now)
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO pages (url, title, source, section, published, next_due, interval) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                # 首次到期时间在间隔内随机分散，避免同一天集中复查
+                (url, a['title'], a['source'], section_of(url), a['published'],
+                 now + random.uniform(0, interval), interval))
+            if cur.rowcount:
+                added += 1
+                conn.executemany("INSERT OR IGNORE INTO sentences (url, sentence) VALUES (?, ?)",
+                                 ((url, s) for s in a['sentences']))
+        conn.execute('COMMIT')
+        return added
+
+    def due(self, n, now=None):
+        rows = self.conn.execute(
+            "SELECT url, title, source, section, body_hash, etag, last_modified, interval, compared "
+            "FROM pages WHERE status = 'active' AND next_due <= ? ORDER BY next_due LIMIT ?",
+            (now or time.time(), n)).fetchall()
+        keys = ('url', 'title', 'source', 'section', 'body_hash', 'etag', 'last_modified', 'interval', 'compared')
+        return [dict(zip(keys, r)) for r in rows]
+
+    def section_rates(self):
+        """栏目 → 已比较的检查中正文变化的比例（没有比较过的栏目不返回）"""
+        rows = self.conn.execute(
+            "SELECT section, SUM(changes), SUM(compared) FROM pages GROUP BY section HAVING SUM(compared) > 0")
+        return {section: changes / compared for section, changes, compared in rows}
+
+    def sentences(self, url):
+        return {r[0] for r in self.conn.execute("SELECT sentence FROM sentences WHERE url = ?", (url,))}
+
+    def update(self, url, changed, interval, section_rate, compared, now, **fields):
+        """记录一次检查结果；changed 为 None 表示首次检查（建立基线）"""
+        interval = next_interval(interval, changed, section_rate, compared)
+        fields.update(last_fetch=now, next_due=now + interval, interval=interval, error=None)
+        sets = ', '.join(f"{k} = ?" for k in fields)
+        self.conn.execute(
+            f"UPDATE pages SET {sets}, checks = checks + 1, compared = compared + ?, changes = changes + ? "
+            "WHERE url = ?",
+            list(fields.values()) + [int(changed is not None), int(bool(changed)), url])
+        return interval
+
+    def fail(self, url, error, gone=False, now=None):
+        now = now or time.time()
+        if gone:
+            self.conn.execute("UPDATE pages SET status = 'gone', error = ?, last_fetch = ? WHERE url = ?",
+                              (error, now, url))
+        else:
+            self.conn.execute("UPDATE pages SET error = ?, next_due = ? WHERE url = ?",
+                              (error, now + ERROR_RETRY, url))
+
+    def replace_sentences(self, url, sentences):
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute("DELETE FROM sentences WHERE url = ?", (url,))
+        conn.executemany("INSERT OR IGNORE INTO sentences (url, sentence) VALUES (?, ?)",
+                         ((url, s) for s in sentences))
+        conn.execute('COMMIT')
+
+
+def load_articles(data_dir=DATA_DIR):
+    """从 数据/ 下的语料 CSV 收集已抓文章：URL → 标题、来源、发布日期、已提取的语句"""
+    articles = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, '*', '*.csv'))):
+        window = detect_window(path)
+        for r in iter_data_file(path):
+            url = r[5]
+            if not url.startswith('http'):
+                continue
+            a = articles.setdefault(url, {'title': r[6], 'source': r[1], 'published': r[7], 'sentences': []})
+            if not a['published'] and window:
+                # 标题里没有日期：用时间段的第一天近似（与 date_bucket.BUCKET_START 一致，只影响首次复查间隔）
+                a['published'] = window_range(window)[0].isoformat()
+            if r[8]:
+                a['sentences'].append(r[8])
+    return articles
+
+
+class ChangeWriter:
+    """变化的语句追加写入 CSV（文件不存在时先写表头）"""
+
+    HEADER = ['检查时间', '来源', '链接', '标题', '变化', '匹配语料']
+
+    def __init__(self, path=RECRAWL_OUTPUT):
+        new = not os.path.exists(path)
+        self.f = open(path, 'a', encoding='utf-8-sig', newline='')
+        self.writer = csv.writer(self.f)
+        if new:
+            self.writer.writerow(self.HEADER)
+
+    def write(self, page, kind, sentences):
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        for s in sentences:
+            self.writer.writerow([stamp, page['source'], page['url'], page['title'], kind, s])
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+def check_page(store, page, matcher, writer, section_rates):
+    """复查一篇文章，返回 'not_modified' / 'unchanged' / 'changed' / 'baseline' / 'gone' / 'error'"""
+    url = page['url']
+    host = urlsplit(url).netloc
+    headers = dict(DEFAULT_HEADERS)
+    if page['etag']:
+        headers['If-None-Match'] = page['etag']
+    if page['last_modified']:
+        headers['If-Modified-Since'] = page['last_modified']
+
+    now = time.time()
+    rate = section_rates.get(page['section'])
+    with metrics.timer('fetch', host):
+        outcome = hedged_fetch.fetch_stream(url, headers=headers, timeout=FETCH_TIMEOUT)
+    status = outcome['status']
+
+    if status == 304:
+        store.update(url, False, page['interval'], rate, page['compared'], now)
+        return 'not_modified'
+    if status in GONE_STATUS:
+        store.fail(url, f"status {status}", gone=True, now=now)
+        return 'gone'
+    if status != 200 or not outcome['text']:
+        store.fail(url, outcome['reason'] or 'empty body', now=now)
+        return 'error'
+
+    digest = body_hash(outcome['text'])
+    resp_headers = {k.lower(): v for k, v in outcome['headers'].items()}
+    fields = {'body_hash': digest, 'etag': resp_headers.get('etag'),
+              'last_modified': resp_headers.get('last-modified')}
+    if page['body_hash'] == digest:
+        store.update(url, False, page['interval'], rate, page['compared'], now, **fields)
+        return 'unchanged'
+
+    with metrics.timer('extract', host):
+        fresh = extract_sentences(outcome['text'], matcher)
+    old = store.sentences(url)
+    with metrics.timer('write'):
+        if page['body_hash'] is not None:
+            # 首次检查只建立基线：原语料的提取规则各不相同，不据此报告新增或删除
+            writer.write(page, '新增', [s for s in fresh if s not in old])
+            writer.write(page, '删除', sorted(old - set(fresh)))
+        store.replace_sentences(url, fresh)
+    changed = None if page['body_hash'] is None else True
+    store.update(url, changed, page['interval'], rate, page['compared'], now, **fields)
+    return 'baseline' if changed is None else 'changed'
+
+
+def run(store, limit=None, max_minutes=None):
+    matcher = KeywordMatcher(KEYWORDS)
+    writer = ChangeWriter()
+    section_rates = store.section_rates()
+    deadline = time.time() + max_minutes * 60 if max_minutes else None
+    counts = defaultdict(int)
+    pages = store.due(limit or 1 << 30)
+    print(f"🔁 到期待复查 {len(pages)} 篇")
+    last_host_fetch = {}
+    try:
+        for i, page in enumerate(pages, 1):
+            if deadline and time.time() > deadline:
+                print("⏰ 达到时长上限，剩余文章下次再查")
+                break
+            host = urlsplit(page['url']).netloc
+            if host in last_host_fetch:
+                metrics.sleep(max(0.0, PAGE_DELAY - (time.time() - last_host_fetch[host])), host)
+            result = check_page(store, page, matcher, writer, section_rates)
+            last_host_fetch[host] = time.time()
+            counts[result] += 1
+            print(f"[{i}/{len(pages)}] {result:<12} {page['url']}")
+    finally:
+        writer.close()
+    print("\n📊 本次复查：" + '，'.join(f"{k} {v}" for k, v in sorted(counts.items())))
+    if counts['changed']:
+        print(f"✓ 变化的语句已追加到 {RECRAWL_OUTPUT}")
+    return counts
+
+
+def print_stats(store):
+    conn = store.conn
+    now = time.time()
+    total, active, gone = conn.execute(
+        "SELECT COUNT(*), SUM(status = 'active'), SUM(status = 'gone') FROM pages").fetchone()
+    if not total:
+        print("数据库为空，先运行 python recrawl.py init")
+        return
+    due_now = conn.execute("SELECT COUNT(*) FROM pages WHERE status = 'active' AND next_due <= ?",
+                           (now,)).fetchone()[0]
+    due_day = conn.execute("SELECT COUNT(*) FROM pages WHERE status = 'active' AND next_due <= ?",
+                           (now + DAY,)).fetchone()[0]
+    per_day = conn.execute("SELECT SUM(86400.0 / interval) FROM pages WHERE status = 'active'").fetchone()[0] or 0
+    print(f"📚 共 {total} 篇（复查中 {active}，已下线 {gone or 0}）；现在到期 {due_now}，24 小时内到期 {due_day}")
+    print(f"📈 预计每天请求 {per_day:.0f} 次，全量重抓 {total} 次（{per_day / total:.1%}）")
+    print(f"\n{'栏目':<36}{'文章':>6}{'比较':>6}{'变化':>6}{'变化率':>8}{'中位间隔(天)':>14}")
+    rows = conn.execute("SELECT section, COUNT(*), SUM(compared), SUM(changes) FROM pages "
+                        "GROUP BY section ORDER BY COUNT(*) DESC").fetchall()
+    for section, n, compared, changes in rows:
+        intervals = [r[0] for r in conn.execute(
+            "SELECT interval FROM pages WHERE section = ? AND status = 'active' ORDER BY interval", (section,))]
+        median = intervals[len(intervals) // 2] / DAY if intervals else 0
+        rate = f"{changes / compared:.1%}" if compared else '-'
+        print(f"{section:<36}{n:>6}{compared:>6}{changes:>6}{rate:>8}{median:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='已抓文章的增量复查')
+    parser.add_argument('--db', default=DB_FILE)
+    sub = parser.add_subparsers(dest='cmd')
+    p_init = sub.add_parser('init', help='从语料 CSV 导入已抓文章')
+    p_init.add_argument('--data-dir', default=DATA_DIR)
+    p_run = sub.add_parser('run', help='复查到期的文章')
+    p_run.add_argument('--limit', type=int)
+    p_run.add_argument('--max-minutes', type=float)
+    sub.add_parser('stats', help='各栏目变化率与复查成本')
+    args = parser.parse_args()
+
+    store = RecrawlStore(args.db)
+    if args.cmd == 'init':
+        articles = load_articles(args.data_dir)
+        added = store.seed(articles)
+        print(f"✓ 语料中共 {len(articles)} 篇文章，新导入 {added} 篇")
+    elif args.cmd == 'run':
+        metrics.start_json_dump('metrics.jsonl')
+        run(store, args.limit, args.max_minutes)
+        metrics.print_summary()
+        hedged_fetch.print_stats()
+    elif args.cmd == 'stats':
+        print_stats(store)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+无头浏览器渲染池：给动态加载的网站（例如 TASS 搜索页的无限滚动）用。
+
+* 预热一组可复用的浏览器上下文，屏蔽图片 / 字体 / 媒体请求；
+* 自动点击“加载更多”或滚动到底，直到页面不再增长，返回最终 DOM；
+* 并发数按可用内存计算（每个上下文约 MB_PER_CONTEXT MB）。
+
+可选依赖：
+    pip install playwright && playwright install chromium
+
+命令：
+    python render_pool.py --demo                        # 本地带脚本加载的示例页，不访问外网
+    python render_pool.py harvest "https://tass.ru/search?search=Huawei" --out urls.txt
+第二条命令替代 README 中“手动滚动 + 控制台粘贴 JavaScript”的步骤。
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import stage_profile
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:
+    async_playwright = None
+
+# --- 配置 ---
+MB_PER_CONTEXT = 150         # 单个浏览器上下文大约占用的内存
+MAX_CONTEXTS = 8
+RECYCLE_AFTER = 50           # 每个上下文渲染多少页后重建，防止内存泄漏
+BLOCKED_RESOURCES = {'image', 'font', 'media'}
+LOAD_MORE_TEXTS = ['Загрузить ещё', 'Загрузить еще', 'Показать ещё', 'Показать еще', 'Load more']
+MAX_SCROLLS = 60
+SCROLL_PAUSE = 1.0           # 每次滚动 / 点击后等待新内容的时间（秒）
+NO_GROWTH_LIMIT = 3          # 连续多少次页面没有增长就认为加载完毕
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+
+# 点击“加载更多”按钮，找不到就滚到底；返回当前页面上的链接数
+SCROLL_JS = """
+(texts) => {
+    const nodes = Array.from(document.querySelectorAll('button, a, div[role=button], span'));
+    const btn = nodes.find(n => n.offsetParent !== null &&
+        texts.some(t => (n.innerText || '').trim().startsWith(t)));
+    if (btn) { btn.click(); } else { window.scrollTo(0, document.body.scrollHeight); }
+    return document.querySelectorAll('a').length;
+}
+"""
+
+# 与 README 第一步的控制台脚本相同：导出 `标题,链接`
+HARVEST_JS = """
+() => {
+    let links = [];
+    document.querySelectorAll('a').forEach(a => {
+        let href = a.getAttribute('href');
+        if (href && href.includes('/') && a.innerText.length > 10) {
+            links.push([a.innerText.replace(/\\n/g, ""), a.href]);
+        }
+    });
+    return links;
+}
+"""
+
+
+def pool_size_for_memory(mb_per_context=MB_PER_CONTEXT, max_contexts=MAX_CONTEXTS):
+    """按可用内存的一半计算上下文数量"""
+    available_mb = None
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    available_mb = int(line.split()[1]) // 1024
+                    break
+    except OSError:
+        pass
+    if available_mb is None:
+        return 2
+    return max(1, min(max_contexts, (available_mb // 2) // mb_per_context))
+
+
+class RenderPool:
+    """
+    同步接口的渲染池：内部在后台线程跑一个 asyncio 事件循环，
+    多个线程可以同时调用 render()，并发数不超过上下文数量。
+    """
+
+    def __init__(self, size=None, headless=True, max_scrolls=MAX_SCROLLS, scroll_pause=SCROLL_PAUSE):
+        if async_playwright is None:
+            raise RuntimeError("未安装 playwright：pip install playwright && playwright install chromium")
+        self.size = size or pool_size_for_memory()
+        self.headless = headless
+        self.max_scrolls = max_scrolls
+        self.scroll_pause = scroll_pause
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self._call(self._startup())
+
+    def _call(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def _startup(self):
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=self.headless)
+        self.contexts = asyncio.Queue()
+        for _ in range(self.size):
+            await self.contexts.put([await self._new_context(), 0])
+        print(f"🖥️ 渲染池已预热 {self.size} 个浏览器上下文")
+
+    async def _new_context(self):
+        context = await self.browser.new_context(user_agent=USER_AGENT, locale='ru-RU')
+
+        async def block(route):
+            if route.request.resource_type in BLOCKED_RESOURCES:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await context.route('**/*', block)
+        return context
+
+    async def _drive_loading(self, page):
+        """点击“加载更多” / 滚动到底，直到链接数和页面高度都不再增长"""
+        last = (-1, -1)
+        no_growth = 0
+        for _ in range(self.max_scrolls):
+            count = await page.evaluate(SCROLL_JS, LOAD_MORE_TEXTS)
+            await page.wait_for_timeout(int(self.scroll_pause * 1000))
+            height = await page.evaluate('document.body.scrollHeight')
+            if (count, height) == last:
+                no_growth += 1
+                if no_growth >= NO_GROWTH_LIMIT:
+                    break
+            else:
+                no_growth = 0
+            last = (count, height)
+
+    async def _render(self, url, load_more, evaluate):
+        slot = await self.contexts.get()
+        try:
+            if slot[1] >= RECYCLE_AFTER:
+                await slot[0].close()
+                slot[:] = [await self._new_context(), 0]
+            slot[1] += 1
+            page = await slot[0].new_page()
+            try:
+                await page.goto(url, wait_until='domcontentloaded', timeout=45000)
+                if load_more:
+                    await self._drive_loading(page)
+                if evaluate:
+                    return await page.evaluate(evaluate)
+                return await page.content()
+            finally:
+                await page.close()
+        finally:
+            self.contexts.put_nowait(slot)
+
+    def render(self, url, load_more=True, timeout=None):
+        """渲染页面并返回最终 DOM 的 HTML"""
+        return self._call(self._render(url, load_more, None), timeout)
+
+    def harvest_links(self, url, timeout=None):
+        """渲染并自动加载全部结果后导出 (title, url) 列表"""
+        return self._call(self._render(url, True, HARVEST_JS), timeout)
+
+    def close(self):
+        async def _shutdown():
+            while not self.contexts.empty():
+                context, _ = self.contexts.get_nowait()
+                await context.close()
+            await self.browser.close()
+            await self.playwright.stop()
+        self._call(_shutdown())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 本地示例页：每次滚动到底再用脚本追加 10 条结果，共 5 批 ---
+DEMO_PAGE = """<html><head><meta charset="utf-8"></head><body>
+<div id="list"></div><button id="more">Загрузить ещё</button>
+<script>
+let batch = 0;
+function load() {
+  if (batch >= 5) { document.getElementById('more').remove(); return; }
+  for (let i = 0; i < 10; i++) {
+    let a = document.createElement('a');
+    a.href = '/ekonomika/' + (100000 + batch * 10 + i);
+    a.innerText = 'Тестовая статья Huawei номер ' + (batch * 10 + i);
+    let p = document.createElement('p'); p.appendChild(a);
+    document.getElementById('list').appendChild(p);
+  }
+  batch++;
+}
+load();
+document.getElementById('more').onclick = () => setTimeout(load, 200);
+</script></body></html>"""
+
+
+class _DemoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = DEMO_PAGE.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='无头浏览器渲染池')
+    sub = parser.add_subparsers(dest='cmd')
+    p_harvest = sub.add_parser('harvest', help='自动滚动搜索页并导出链接')
+    p_harvest.add_argument('url')
+    p_harvest.add_argument('--out', default='urls.txt')
+    parser.add_argument('--demo', action='store_true', help='渲染本地示例页')
+    parser.add_argument('--size', type=int)
+    args = parser.parse_args()
+
+    if args.demo:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _DemoHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/search"
+        with RenderPool(size=args.size or 2, scroll_pause=0.5) as pool:
+            start = time.time()
+            links = pool.harvest_links(url)
+            print(f"✅ 加载完毕，共 {len(links)} 条链接，耗时 {time.time() - start:.1f} 秒")
+        return
+
+    if args.cmd == 'harvest':
+        with RenderPool(size=args.size or 1) as pool:
+            links = pool.harvest_links(args.url)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            for title, url in links:
+                f.write(f"{title},{url}\n")
+        print(f"✓ 共导出 {len(links)} 条链接至: {args.out}")
+        return
+
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+俄语关键词匹配：按词形变化和转写差异展开关键词，直接匹配俄文原文。
+
+shoudongtass_v2 ~ v4 把 TASS 页面送进 Google 翻译，一半原因是俄文里关键词写法太多，
+`kw.lower() in s.lower()` 只认一种：Хуавей、Хуавэя、Хуавэем 全部漏掉。这里在编译时把每个关键词展开成一个正则：
+* 西里尔字母关键词：去掉末尾的元音 / й / ь 得到词干，词干后接任意字母（Хуавэй → Хуавэя / Хуавэем …，
+  Путин → Путиным / путинский，санкции → санкций / санкциями），е / э / ё 互认（Хуавэй ↔ Хуавей）；
+  原关键词本身仍按子串匹配，命中范围是原来 `kw.lower() in s.lower()` 的超集；
+* 拉丁字母关键词：空格、连字符可有可无（Hua wei ↔ Huawei ↔ Hua-wei），并按 TRANSLITERATIONS 补上俄文写法；
+* 中文关键词：原样子串匹配。
+装了 pymorphy3 / pymorphy2 时可再按词元匹配（USE_LEMMAS），词元结果用 lru_cache 缓存。
+
+用法：
+    from ru_match import matcher_for
+    if matcher_for('Huawei', 'Хуавэй').search(sentence): ...
+命令：
+    python ru_match.py Huawei Хуавэй --text "Компания Хуавея представила ..."
+    python ru_match.py Huawei --file 数据/tass数据/tass20-21.csv     # 统计新旧匹配方式的命中差异
+"""
+
+import argparse
+import re
+from functools import lru_cache
+
+import stage_profile
+
+try:
+    import pymorphy3 as pymorphy
+except ImportError:
+    try:
+        import pymorphy2 as pymorphy
+    except ImportError:
+        pymorphy = None
+
+# --- 配置 ---
+USE_LEMMAS = False          # 额外按词元匹配（需要 pip install pymorphy3）
+# 拉丁字母关键词对应的俄文写法（小写），展开时一并加入
+TRANSLITERATIONS = {
+    'huawei': ['хуавэй'],
+    'hua wei': ['хуавэй'],
+}
+# 转写不统一的字母
+CHAR_CLASSES = {'е': '[еёэ]', 'ё': '[её]', 'э': '[эеё]'}
+# 词干去掉的词尾字母（只去一个：Китай → Кита-，不会缩成 Кит- 去匹配 кит / китов）
+STEM_STRIP = 'аеёиоуыэюяйь'
+
+CYRILLIC_RE = re.compile(r'[а-яё]', re.I)
+CJK_RE = re.compile(r'[一-鿿]')
+WORD_RE = re.compile(r'[а-яё]+', re.I)
+
+
+def _cyrillic_letters(word):
+    return ''.join(CHAR_CLASSES.get(c, re.escape(c)) for c in word)
+
+
+def cyrillic_pattern(word):
+    """一个俄文单词 → 词干 + 任意后续字母的正则（不含左边界）"""
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC_RE.match(word[-1]):
+        return _cyrillic_letters(word)
+    stem = word[:-1] if word[-1] in STEM_STRIP and len(word) > 2 else word
+    return f"{_cyrillic_letters(stem)}[а-яё]*"
+
+
+def keyword_pattern(keyword):
+    """单个关键词 → 正则片段"""
+    keyword = keyword.strip()
+    if CJK_RE.search(keyword):
+        return re.escape(keyword)
+    if CYRILLIC_RE.search(keyword):
+        words = [cyrillic_pattern(w) for w in keyword.split()]
+        # 词形从词首开始匹配；原关键词不加边界，保证不漏掉原来子串匹配能命中的句子
+        literal = _cyrillic_letters(keyword.lower().replace('ё', 'е'))
+        return r'(?<![а-яё])' + r'[\s\-]+'.join(words) + '|' + literal
+    parts = [re.escape(p) for p in re.split(r'[\s\-]+', keyword) if p]
+    return r'[\s\-]*'.join(parts)
+
+
+def expand_keywords(keywords):
+    """关键词列表加上 TRANSLITERATIONS 中的俄文写法，去重并保持顺序"""
+    expanded = []
+    for kw in keywords:
+        for variant in [kw] + TRANSLITERATIONS.get(kw.strip().lower(), []):
+            if variant.lower() not in (e.lower() for e in expanded):
+                expanded.append(variant)
+    return expanded
+
+
+def compile_keywords(keywords):
+    """全部关键词编译成一个不区分大小写的正则"""
+    fragments = [keyword_pattern(kw) for kw in expand_keywords(keywords)]
+    return re.compile('|'.join(f"(?:{f})" for f in fragments), re.I)
+
+
+@lru_cache(maxsize=200000)
+def lemma(word):
+    """俄文单词的词元（小写、ё→е）；没有安装 pymorphy 时原样返回"""
+    word = word.lower().replace('ё', 'е')
+    if _morph() is None:
+        return word
+    return _morph().parse(word)[0].normal_form.replace('ё', 'е')
+
+
+@lru_cache(maxsize=1)
+def _morph():
+    return pymorphy.MorphAnalyzer() if pymorphy is not None else None
+
+
+class KeywordMatcher:
+    """编译好的关键词匹配器；search() 返回命中的原文片段或 None"""
+
+    def __init__(self, keywords, use_lemmas=USE_LEMMAS):
+        self.keywords = list(keywords)
+        self.pattern = compile_keywords(self.keywords)
+        self.lemmas = set()
+        if use_lemmas and pymorphy is not None:
+            for kw in expand_keywords(self.keywords):
+                if CYRILLIC_RE.search(kw) and ' ' not in kw.strip():
+                    self.lemmas.add(lemma(kw.strip()))
+
+    def search(self, text):
+        if not text:
+            return None
+        m = self.pattern.search(text)
+        if m:
+            return m.group(0)
+        if self.lemmas:
+            for word in WORD_RE.findall(text):
+                if lemma(word) in self.lemmas:
+                    return word
+        return None
+
+    def findall(self, text):
+        return [m.group(0) for m in self.pattern.finditer(text or '')]
+
+    def __repr__(self):
+        return f"KeywordMatcher({self.keywords!r})"
+
+
+@lru_cache(maxsize=64)
+def matcher_for(*keywords):
+    """按关键词缓存编译好的匹配器，逐篇调用的提取函数直接用它"""
+    return KeywordMatcher(keywords)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='俄语关键词展开与匹配检查')
+    parser.add_argument('keywords', nargs='+')
+    parser.add_argument('--text', help='检查一段文本')
+    parser.add_argument('--file', help='逐行检查一个文本 / CSV 文件，对比原来的子串匹配')
+    parser.add_argument('--lemmas', action='store_true', help='同时按词元匹配（需要 pymorphy3）')
+    args = parser.parse_args()
+
+    matcher = KeywordMatcher(args.keywords, use_lemmas=args.lemmas)
+    print(f"🔤 展开后的关键词: {', '.join(expand_keywords(args.keywords))}")
+    print(f"🧩 正则: {matcher.pattern.pattern}")
+    if args.lemmas:
+        print(f"📚 词元: {sorted(matcher.lemmas) or '（未安装 pymorphy，跳过）'}")
+
+    if args.text:
+        print(f"\n命中: {matcher.findall(args.text) or matcher.search(args.text)}")
+
+    if args.file:
+        old = new = only_new = 0
+        samples = []
+        with open(args.file, 'r', encoding='utf-8-sig', errors='replace') as f:
+            for line in f:
+                hit_old = any(kw.lower() in line.lower() for kw in args.keywords)
+                hit_new = matcher.search(line) is not None
+                old += hit_old
+                new += hit_new
+                if hit_new and not hit_old:
+                    only_new += 1
+                    if len(samples) < 10:
+                        samples.append(line.strip()[:120])
+        print(f"\n📊 子串匹配 {old} 行，展开匹配 {new} 行，新增 {only_new} 行")
+        for s in samples:
+            print(f"  + {s}")
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
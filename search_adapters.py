@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+站内搜索的 JSON / XHR 适配器：替代“整页 HTML 翻页 + BeautifulSoup 找 <a href>”。
+
+extract_keywords.py / extract_keywords_v3.py 翻的是完整的搜索结果页，还要猜分页参数是 page 还是 p；
+11.py 已经说明 TASS 有带游标的 JSON 搜索接口。这里给有接口的来源各一个适配器：
+* 请求站点“加载更多”按钮背后的 XHR 接口，游标 / 偏移量在适配器内部处理；
+* 返回内容不做 DOM 解析，按字段取链接；
+* 产出 LinkRecord(title, url)，article_links() 返回与 extract_article_links 相同的 URL 列表；
+* 接口不可用（状态码异常、取不到链接）时自动回退到调用方传入的 HTML 翻页函数。
+
+目前只有 TASS（与 11.py 同一个接口，同样的 cookie / 请求头）。RT、生意人报没有核对过的接口，
+直接走 HTML 翻页；要接入新站点，先用浏览器开发者工具录下真实响应放进 tests/fixtures/search/，
+再在 ENDPOINTS / ADAPTERS 里加适配器并补测试。
+
+命令：
+    python search_adapters.py search tass "https://tass.ru/search?search=Huawei" --limit 50 --out tass.txt
+    python search_adapters.py record tass "https://tass.ru/search?search=Huawei" tass_page1.json   # 录下第一页响应
+    python search_adapters.py parse tass tass_page1.json                                           # 离线检查解析结果
+"""
+
+import argparse
+import html
+import json
+import re
+import time
+from urllib.parse import urljoin, urlsplit, parse_qsl
+
+import requests
+
+import crawl_metrics as metrics
+import stage_profile
+from link_filter import CHROME_TAGS
+from link_source import LinkRecord
+from stream_fetch import response_encoding
+
+# --- 配置 ---
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'X-Requested-With': 'XMLHttpRequest',
+}
+PAGE_DELAY = 1.0              # 两次翻页之间的间隔（秒）
+MAX_PAGES = 200
+
+# 11.py 使用的 cURL 信息，TASS 接口凭这些 cookie / 请求头返回结果；cookie 过期时在这里更新
+TASS_COOKIES = {
+    'spid': '1768719007602_ec7647d43c8221785c41e5e8a154c79b_0dfdfrbr7k084j27',
+    'domain_sid': 'gqjJ2jhW0FbDn3dJcilUO:1768719026120',
+    'ma_id_api': 'z2NSv23Rdi7/Vql34KxC5spuDJavtr8fv9GDKh/9fhaXSkHozbQ7haiXZH/89yYHxQlitSXeMCQvNdZnASSvrUJyArT3nacd9V+dqG+1BTSq/x9iH/v3n9oXK8a6GTFvnbMblBG2MioRajTztVsslqPZ/8wMGZsPn1RFrsiNi5Z2U34IwAEQj3S3wf+Q7MscVFa1BM75u88cvgLCDxVcx9++LJabxiQFspxPX+2uA7yD/ClVI5BcRtnfsu1N3oBdyfGh8O3our6U2O9J9Tchl1G9tlW0GKrsQmYToM2Cd+PytgoWY5epBkdN07n3P+Qj0cGxCIol7ABXa81g95B/VQ==',
+}
+TASS_HEADERS = {
+    'accept': '*/*',
+    'accept-language': 'en,zh-CN;q=0.9,zh;q=0.8',
+    'referer': 'https://tass.ru/',
+    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36',
+}
+
+# url 中的 {page} / {offset} / {size} 由适配器填入；params 为附加的查询参数（同样可用占位符）。
+# 只收录用真实响应核对过的接口（样本见 tests/fixtures/search/）
+ENDPOINTS = {
+    'tass': {
+        'host': 'tass.ru',
+        'url': 'https://tass.ru/tbp/api/v1/search',
+        'params': {'limit': '{size}', 'lang': 'ru'},
+        'size': 30,
+        'headers': TASS_HEADERS,
+        'cookies': TASS_COOKIES,
+    },
+}
+
+ANCHOR_RE = re.compile(r'<a\b[^>]*?href=["\']([^"\']+)["\'][^>]*>(.*?)</a>', re.S | re.I)
+TAG_RE = re.compile(r'<[^>]+>')
+JSONP_RE = re.compile(r'^[\w$.]+\s*\(')
+# 片段里的导航 / 页眉 / 页脚 / 侧栏整块去掉，与 link_filter.in_page_chrome 对应
+CHROME_BLOCK_RE = re.compile(r'<(%s)\b.*?</\1\s*>' % '|'.join(sorted(CHROME_TAGS)), re.S | re.I)
+
+
+class AdapterError(Exception):
+    """接口不可用，调用方应回退到 HTML 翻页"""
+
+
+def _load_json(text):
+    """容错的 JSON 解析：去掉 )]}' 之类的前缀、JSONP 包装；HTML 或其他内容返回 None"""
+    text = (text or '').strip()
+    if text.startswith(")]}'"):
+        text = text[4:].lstrip(',\n ')
+    elif JSONP_RE.match(text):
+        text = text[text.index('(') + 1:text.rindex(')')]
+    if not text.startswith(('{', '[')):
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _clean_title(fragment):
+    return ' '.join(html.unescape(TAG_RE.sub(' ', fragment or '')).split())
+
+
+def links_from_fragment(fragment, base_url):
+    """HTML 片段里用正则取 (标题, 链接)，不建 DOM；导航 / 侧栏等区块里的链接跳过"""
+    for href, inner in ANCHOR_RE.findall(CHROME_BLOCK_RE.sub(' ', fragment or '')):
+        yield _clean_title(inner), urljoin(base_url, html.unescape(href))
+
+
+def _find_key(obj, keys, depth=0):
+    if depth > 3:
+        return None
+    if isinstance(obj, dict):
+        for k in keys:
+            if k in obj:
+                return obj[k]
+        for value in obj.values():
+            found = _find_key(value, keys, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+
+class SearchAdapter:
+    """翻页适配器基类：page / offset 翻页；子类实现 parse_page，可覆盖游标处理"""
+
+    name = ''
+
+    def __init__(self, endpoint=None, session=None, headers=None, cookies=None):
+        self.endpoint = endpoint or ENDPOINTS[self.name]
+        self.session = session or requests
+        self.headers = headers or self.endpoint.get('headers') or HEADERS
+        self.cookies = cookies if cookies is not None else self.endpoint.get('cookies')
+
+    def first_cursor(self):
+        return 1
+
+    def request(self, search_params, cursor):
+        size = self.endpoint.get('size', 20)
+        fill = {'page': cursor, 'offset': (cursor - 1) * size, 'size': size}
+        params = dict(search_params)
+        for k, v in self.endpoint.get('params', {}).items():
+            params[k] = v.format(**fill)
+        return self.endpoint['url'].format(**fill), params
+
+    def parse_page(self, body, base_url, cursor=None):
+        """
+        解析一页响应；不是接口响应（例如整页 HTML）时抛出 AdapterError
+
+        返回:
+            tuple: (LinkRecord 列表, 下一页游标 或 None)
+        """
+        raise NotImplementedError
+
+    def iter_records(self, search_url, limit=None):
+        """按页请求接口并产出去重的 LinkRecord；第一页就失败时抛出 AdapterError"""
+        search_params = dict(parse_qsl(urlsplit(search_url).query, keep_blank_values=True))
+        host = self.endpoint['host']
+        cursor = self.first_cursor()
+        seen = set()
+        pages = 0
+        while cursor is not None and pages < MAX_PAGES:
+            url, params = self.request(search_params, cursor)
+            start = time.time()
+            try:
+                response = self.session.get(url, params=params, headers=self.headers,
+                                            cookies=self.cookies, timeout=15)
+            except requests.exceptions.RequestException as e:
+                if not pages:
+                    raise AdapterError(str(e))
+                print(f"  ⚠️ 第 {pages + 1} 页请求失败: {e}")
+                break
+            metrics.record_fetch(host, response.status_code, time.time() - start, len(response.content))
+            if response.status_code != 200:
+                if not pages:
+                    raise AdapterError(f"状态码 {response.status_code}")
+                print(f"  ⚠️ 第 {pages + 1} 页状态码 {response.status_code}，停止翻页")
+                break
+            response.encoding = response_encoding(response)
+            try:
+                records, cursor = self.parse_page(response.text, url, cursor)
+            except AdapterError:
+                if not pages:
+                    raise
+                print(f"  ⚠️ 第 {pages + 1} 页不是接口响应，停止翻页")
+                break
+            pages += 1
+            if pages == 1 and not records:
+                raise AdapterError("第一页没有解析到文章链接")
+            new = [r for r in records if r.url not in seen]
+            print(f"  📡 {self.name} 第 {pages} 页：{len(new)} 个新链接，累计 {len(seen) + len(new)}")
+            if not new:
+                break
+            for record in new:
+                seen.add(record.url)
+                yield record
+                if limit and len(seen) >= limit:
+                    return
+            if cursor is not None:
+                metrics.sleep(PAGE_DELAY, host)
+
+
+class TassAdapter(SearchAdapter):
+    """TASS 的搜索接口（见 11.py）：游标为上一页返回的 search_after"""
+
+    name = 'tass'
+
+    def first_cursor(self):
+        return ''
+
+    def request(self, search_params, cursor):
+        url, params = super().request({}, 1)
+        params['search'] = search_params.get('search') or search_params.get('q', '')
+        if cursor:
+            params['search_after'] = cursor
+        return url, params
+
+    def parse_page(self, body, base_url, cursor=None):
+        data = _load_json(body)
+        if not isinstance(data, dict):
+            raise AdapterError("接口返回的不是 JSON（cookie 过期时常见整页 HTML）")
+        result = data.get('result') or {}
+        records = []
+        for item in result.get('contents', []):
+            path = item.get('url', '')
+            if path:
+                records.append(LinkRecord(item.get('title', ''), urljoin('https://tass.ru', path)))
+        if not result.get('has_more', False) or not result.get('search_after'):
+            return records, None
+        return records, result['search_after']
+
+
+ADAPTERS = {'tass': TassAdapter}
+
+
+def adapter_for(url):
+    """按站点取适配器；没有接口适配器的站点返回 None"""
+    host = urlsplit(url).netloc.lower()
+    for name, conf in ENDPOINTS.items():
+        if host == conf['host']:
+            return ADAPTERS[name]()
+    return None
+
+
+def article_links(search_url, limit=None, fallback=None):
+    """
+    与 extract_article_links 相同的返回值（URL 列表）：先走接口，失败或没有接口时调用 fallback(search_url, limit)
+    """
+    adapter = adapter_for(search_url)
+    if adapter is not None:
+        try:
+            links = [r.url for r in adapter.iter_records(search_url, limit)]
+            if links:
+                print(f"找到 {len(links)} 个链接（{adapter.name} 搜索接口）")
+                return links
+        except AdapterError as e:
+            print(f"⚠️ {adapter.name} 搜索接口不可用（{e}），改用 HTML 翻页")
+    if fallback is None:
+        return []
+    return fallback(search_url, limit=limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='站内搜索 JSON / XHR 适配器')
+    sub = parser.add_subparsers(dest='cmd')
+    p_search = sub.add_parser('search', help='通过接口抓取搜索结果链接')
+    p_search.add_argument('source', choices=sorted(ADAPTERS))
+    p_search.add_argument('url', help='站内搜索页地址（关键词、日期等参数从这里读取）')
+    p_search.add_argument('--limit', type=int)
+    p_search.add_argument('--out', help='写成 `标题,链接` 文件')
+    p_parse = sub.add_parser('parse', help='离线解析一份录制下来的接口响应')
+    p_parse.add_argument('source', choices=sorted(ADAPTERS))
+    p_parse.add_argument('file')
+    p_record = sub.add_parser('record', help='请求接口第一页并把原始响应存成文件（用作测试样本）')
+    p_record.add_argument('source', choices=sorted(ADAPTERS))
+    p_record.add_argument('url', help='站内搜索页地址')
+    p_record.add_argument('file')
+    args = parser.parse_args()
+
+    if args.cmd == 'record':
+        adapter = ADAPTERS[args.source]()
+        search_params = dict(parse_qsl(urlsplit(args.url).query, keep_blank_values=True))
+        url, params = adapter.request(search_params, adapter.first_cursor())
+        response = requests.get(url, params=params, headers=adapter.headers, cookies=adapter.cookies, timeout=15)
+        with open(args.file, 'wb') as f:
+            f.write(response.content)
+        print(f"✓ 状态码 {response.status_code}，{len(response.content)} 字节，"
+              f"Content-Type: {response.headers.get('Content-Type')}，已写入 {args.file}")
+        return
+
+    if args.cmd == 'parse':
+        adapter = ADAPTERS[args.source]()
+        with open(args.file, 'r', encoding='utf-8', errors='replace') as f:
+            records, cursor = adapter.parse_page(f.read(), 'https://' + adapter.endpoint['host'] + '/')
+        for title, url in records:
+            print(f"{title[:60]},{url}")
+        print(f"\n📊 共 {len(records)} 条链接，下一页游标: {cursor!r}")
+        return
+
+    if args.cmd == 'search':
+        adapter = ADAPTERS[args.source]()
+        records = list(adapter.iter_records(args.url, args.limit))
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                for title, url in records:
+                    f.write(f"{title},{url}\n")
+            print(f"✓ 共 {len(records)} 条链接，已写入 {args.out}")
+        return
+
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
@@ -4,6 +4,8 @@ import re
 import time
 import random
 from bs4 import BeautifulSoup
+import stage_profile
+from link_source import iter_links, count_links
 
 # --- 配置 ---
 INPUT_FILE = "urls.txt"      # 你刚才保存链接的文件
@@ -46,23 +48,21 @@ def main():
         
         # 读取你保存的链接文件
         try:
-            with open(INPUT_FILE, 'r', encoding='utf-8') as f_in:
-                lines = f_in.readlines()
+            total = count_links(INPUT_FILE)
         except FileNotFoundError:
             print(f"🛑 找不到 {INPUT_FILE}，请先执行第一步提取链接。")
             return
 
         count = 1
-        for i, line in enumerate(lines):
-            if ',' not in line: continue
+        for i, (title, url) in enumerate(iter_links(INPUT_FILE)):
+            print(f"[{i+1}/{total}] 正在提取: {title[:20]}...")
             
-            title, url = line.strip().split(',', 1)
-            print(f"[{i+1}/{len(lines)}] 正在提取: {title[:20]}...")
-            
-            sentences = extract_sentences(url)
-            for s in sentences:
-                writer.writerow([count, url, title, s])
-                count += 1
+            with stage_profile.stage('extract'):
+                sentences = extract_sentences(url)
+            with stage_profile.stage('write'):
+                for s in sentences:
+                    writer.writerow([count, url, title, s])
+                    count += 1
             
             # 每 10 篇保存一次，防止程序崩溃丢失数据
             if (i + 1) % 10 == 0:
@@ -72,4 +72,5 @@ def main():
     print(f"✨ 任务完成！语料已存入 {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage_profile.from_argv():
+        main()
\ No newline at end of file
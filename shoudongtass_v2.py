@@ -5,6 +5,8 @@ import time
 import random
 from bs4 import BeautifulSoup
 from urllib.parse import quote
+import stage_profile
+from link_source import iter_links, count_links
 
 # --- 配置 ---
 INPUT_FILE = "urls.txt"
@@ -68,18 +70,13 @@ def main():
         writer = csv.writer(f_out)
         writer.writerow(['序号', '原链接', '标题', '匹配语料'])
 
-        with open(INPUT_FILE, 'r', encoding='utf-8') as f_in:
-            lines = [line.strip() for line in f_in.readlines() if ',' in line]
-
+        total = count_links(INPUT_FILE)
         count = 1
-        for i, line in enumerate(lines):
-            title, url = line.split(',', 1)
-            # 修复 URL
-            if "https://" in url[8:]: url = "https://" + url.split("https://")[-1]
-
-            print(f"[{i+1}/{len(lines)}] 正在通过 Google 访问: {title[:20]}...")
+        for i, (title, url) in enumerate(iter_links(INPUT_FILE)):
+            print(f"[{i+1}/{total}] 正在通过 Google 访问: {title[:20]}...")
             
-            sentences = get_via_google_translate(url)
+            with stage_profile.stage('extract'):
+                sentences = get_via_google_translate(url)
             
             if sentences:
                 for s in sentences:
@@ -96,4 +93,5 @@ def main():
     print(f"✨ 任务结束。")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage_profile.from_argv():
+        main()
\ No newline at end of file
@@ -5,12 +5,16 @@ import time
 import random
 from bs4 import BeautifulSoup
 from urllib.parse import quote
+import stage_profile
+from link_source import iter_links, count_links
+from ru_match import KeywordMatcher
 
 # --- 配置 ---
 INPUT_FILE = "urls.txt"
 OUTPUT_FILE = "huawei_corpus_google.csv"
 # 匹配英俄文及翻译后的中文关键词
 KEYWORDS = ["Huawei", "华为", "Хуавэй"]
+MATCHER = KeywordMatcher(KEYWORDS)
 
 def get_via_google_translate(original_url):
     """通过 Google 翻译中转访问"""
@@ -60,7 +64,7 @@ def get_via_google_translate(original_url):
         matches = []
         for s in sentences:
             s_clean = s.strip()
-            if any(kw.lower() in s_clean.lower() for kw in KEYWORDS):
+            if MATCHER.search(s_clean):
                 if len(s_clean) > 10: # 过滤掉太短的碎片
                     matches.append(s_clean)
         
@@ -78,25 +82,15 @@ def main():
             writer = csv.writer(f_out)
             writer.writerow(['序号', '原链接', '标题', '匹配语料'])
 
-            with open(INPUT_FILE, 'r', encoding='utf-8') as f_in:
-                # 过滤掉不含逗号或空的行
-                lines = [l.strip() for l in f_in.readlines() if ',' in l]
-
-            total = len(lines)
+            # 逐行读取，坏行（链接不合法）会打印出来并跳过
+            total = count_links(INPUT_FILE)
             count = 1
             
-            for i, line in enumerate(lines):
-                parts = line.split(',', 1)
-                title = parts[0]
-                url = parts[1]
-                
-                # 自动修复畸形链接
-                if "https://" in url[8:]:
-                    url = "https://" + url.split("https://")[-1]
-
+            for i, (title, url) in enumerate(iter_links(INPUT_FILE)):
                 print(f"[{i+1}/{total}] 访问: {title[:20]}...", end=" ", flush=True)
                 
-                sentences = get_via_google_translate(url)
+                with stage_profile.stage('extract'):
+                    sentences = get_via_google_translate(url)
                 
                 if sentences:
                     for s in sentences:
@@ -118,4 +112,5 @@ def main():
     print(f"\n✨ 任务结束。结果已保存至: {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage_profile.from_argv():
+        main()
\ No newline at end of file
@@ -1,16 +1,50 @@
-import requests
+import contextlib
 import csv
+import datetime
+import os
 import re
 import time
 import random
 from bs4 import BeautifulSoup
-from urllib.parse import quote
+from urllib.parse import quote, urlsplit
+import hedged_fetch
+from proxy_pool import ProxyPool, load_proxies
+from link_filter import LinkFilter
+from date_bucket import BucketWriter, DateContext, split_title_date, extract_published_date, detect_window
+import crawl_metrics as metrics
+import stage_profile
+from link_source import iter_links, count_links
+from ru_match import KeywordMatcher
 
 # --- 配置 ---
 INPUT_FILE = "urls.txt"
 OUTPUT_FILE = "huawei_corpus_final.csv"
-# 涵盖所有翻译可能，确保匹配不漏
+# 涵盖所有翻译可能，确保匹配不漏；俄文变格 / 转写写法由 ru_match.py 自动展开
 KEYWORDS = ["Huawei", "华为", "Хуавэй", "Hua wei"]
+MATCHER = KeywordMatcher(KEYWORDS)
+# 是否经 Google 翻译中转；False 时直接抓取原文并按俄文词形匹配，不再受翻译服务限流
+USE_TRANSLATION = True
+# Google 翻译中转入口
+TRANSLATE_ENDPOINT = "https://translate.google.com/translate"
+# 流式模式：只读到正文容器闭合为止，不再下载整个中转页面
+STREAM_MODE = True
+# 出口代理列表（见 proxy_pool.py），文件不存在时只用本机 IP
+PROXY_FILE = "proxies.txt"
+# 抓取前按站点规则过滤导航 / 页脚等非文章链接
+FILTER_LINKS = True
+# 规则判断不了的链接再交给打分器（需先运行 python link_filter.py train）
+FILTER_MODEL = False
+# 按标题日期自动分文件：tass20-21.csv / tass21-22.csv / …，一次抓取产出所有年份
+SPLIT_BY_BUCKET = False
+OUTPUT_PREFIX = "tass"
+# 链接文件所属时间段（如 "20-21"）：无年份的标题日期按它推断，时间段外的日期丢弃；None 时从文件名识别
+HARVEST_WINDOW = None
+# 链接文件的采集日期：标题里只有“18:30”的即当天，“12 января”按它推断年份；
+# 换链接文件时一并修改，None 时取链接文件的修改日期
+HARVEST_DATE = "2026-01-19"
+# 运行指标：METRICS_PORT 不为 None 时开放 http://localhost:端口/metrics
+METRICS_PORT = None
+METRICS_FILE = "metrics.jsonl"
 
 # 备选 User-Agent 池，每次重试更换身份
 UA_POOL = [
@@ -19,11 +53,21 @@ UA_POOL = [
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
 ]
 
-def get_with_retry(url):
-    """遇到 429 不放弃，死磕到底直到拿到内容"""
-    encoded_url = quote(url, safe='')
-    # 设为翻译成英文 (tl=en)，因为英文分句更准，且对原始关键词保留最好
-    translate_url = f"https://translate.google.com/translate?sl=auto&tl=en&u={encoded_url}"
+def get_with_retry(url, pool=None):
+    """
+    遇到 429 不放弃，死磕到底直到拿到内容；pool 为代理池时每次重试自动换出口
+
+    返回:
+        tuple: (正文或整页 HTML, 含发布日期元数据的 HTML 片段)；失败时为 (None, None)
+    """
+    if USE_TRANSLATION:
+        encoded_url = quote(url, safe='')
+        # 设为翻译成英文 (tl=en)，因为英文分句更准，且对原始关键词保留最好
+        translate_url = f"{TRANSLATE_ENDPOINT}?sl=auto&tl=en&u={encoded_url}"
+        host = 'translate.google.com'
+    else:
+        translate_url = url
+        host = urlsplit(url).netloc
     
     retry_count = 0
     max_retries = 5 # 单篇最大重试次数，防止死循环
@@ -39,19 +83,38 @@ def get_with_retry(url):
             wait_time = random.uniform(6, 10) + (retry_count * 20) # 越错等越久
             if retry_count > 0:
                 print(f"\n⏳ 第 {retry_count} 次重试，正在休眠 {int(wait_time)} 秒...")
-            time.sleep(wait_time)
+            metrics.sleep(wait_time, host, reason='retry' if retry_count else 'pacing')
             
-            response = requests.get(translate_url, headers=headers, timeout=30)
+            if STREAM_MODE:
+                outcome = hedged_fetch.fetch_stream(translate_url, headers=headers, timeout=30, pool=pool)
+                if outcome['status'] == 200 and len(outcome['text']) > 200:
+                    if outcome['truncated']:
+                        print(f"✂️  已截断 ({outcome['reason']})", end=" ")
+                    return outcome['text'], outcome['date_markup']
+                if outcome['status'] == 429:
+                    print(f"🛑 触发 429 限制，{host} 正在赶人...")
+                elif outcome['status'] == 200:
+                    print("⚠️  页面加载不全，准备重试...")
+                retry_count += 1
+                continue
+
+            if pool is not None:
+                response = pool.get(translate_url, headers=headers, timeout=30)
+            else:
+                start = time.time()
+                response = hedged_fetch.get(translate_url, headers=headers, timeout=30)
+                metrics.record_fetch(host, response.status_code,
+                                     time.time() - start, len(response.content))
             
             if response.status_code == 200:
                 # 检查内容是否包含正常的翻译框架，防止拿到空的 200 页面
                 if "google-src-active" in response.text or "result-container" in response.text or len(response.text) > 5000:
-                    return response.text
+                    return response.text, response.text
                 else:
                     print("⚠️  页面加载不全，准备重试...")
             
             if response.status_code == 429:
-                print("🛑 触发 429 限制，Google 正在赶人...")
+                print(f"🛑 触发 429 限制，{host} 正在赶人...")
                 retry_count += 1
                 continue
             
@@ -62,7 +125,7 @@ def get_with_retry(url):
             print(f"❌ 网络异常: {e}")
             retry_count += 1
             
-    return None
+    return None, None
 
 def extract_sentences(html):
     if not html: return []
@@ -80,42 +143,90 @@ def extract_sentences(html):
     for s in sentences:
         s_clean = s.strip()
         # 只要命中任何一个关键词就保留
-        if any(kw.lower() in s_clean.lower() for kw in KEYWORDS):
+        if MATCHER.search(s_clean):
             if 15 < len(s_clean) < 500:
                 matches.append(s_clean)
     
     return list(set(matches))
 
+def harvest_date(path):
+    """HARVEST_DATE，未设置时取链接文件的修改日期"""
+    if HARVEST_DATE:
+        return datetime.date.fromisoformat(HARVEST_DATE)
+    return datetime.date.fromtimestamp(os.path.getmtime(path))
+
 def main():
     print("🔥 启动‘死磕重试’模式。目标：语料完整提取。")
+    proxies = load_proxies(PROXY_FILE)
+    pool = ProxyPool(proxies) if proxies else None
+    if pool:
+        print(f"🌐 已加载 {len(proxies)} 个出口代理")
     
-    with open(OUTPUT_FILE, 'w', encoding='utf-8-sig', newline='') as f_out:
-        writer = csv.writer(f_out)
-        writer.writerow(['序号', '链接', '标题', '匹配语料'])
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    stop_dump = metrics.start_json_dump(METRICS_FILE) if METRICS_FILE else None
 
-        with open(INPUT_FILE, 'r', encoding='utf-8') as f_in:
-            lines = [l.strip() for l in f_in.readlines() if ',' in l]
+    buckets = BucketWriter(OUTPUT_PREFIX, ['序号', '链接', '标题', '匹配语料']) if SPLIT_BY_BUCKET else None
+    context = DateContext(reference=harvest_date(INPUT_FILE),
+                          window=HARVEST_WINDOW or detect_window(INPUT_FILE) or None)
 
-        count = 1
-        for i, line in enumerate(lines):
-            title, url = line.split(',', 1)
-            if "https://" in url[8:]: url = "https://" + url.split("https://")[-1]
+    # 按时间段分文件时不再写合并文件，免得留下只有表头的空文件
+    with (open(OUTPUT_FILE, 'w', encoding='utf-8-sig', newline='') if buckets is None
+          else contextlib.nullcontext()) as f_out:
+        if f_out is not None:
+            writer = csv.writer(f_out)
+            writer.writerow(['序号', '链接', '标题', '匹配语料'])
+
+        # 链接逐条读取，不整个载入内存；总数单独数一遍行，只用于进度显示和过滤器的位置特征
+        total = count_links(INPUT_FILE)
+        link_filter = LinkFilter(use_model=FILTER_MODEL) if FILTER_LINKS else None
+        skipped = 0
 
-            print(f"[{i+1}/{len(lines)}] 处理: {title[:20]}...", end=" ", flush=True)
+        count = 1
+        for i, (title, url) in enumerate(iter_links(INPUT_FILE)):
+            # 每条链接都要解析日期（包括被过滤掉的），链接文件按时间倒序，上下文靠它推断年份
+            clean_title, published = split_title_date(title, context)
+            if link_filter is not None and not link_filter.keep(url, title, i, total):
+                skipped += 1
+                continue
+            print(f"[{i+1}/{total}] 处理: {title[:20]}...", end=" ", flush=True)
             
-            html_content = get_with_retry(url)
-            sentences = extract_sentences(html_content)
+            with metrics.timer('fetch', 'tass.ru'):
+                html_content, date_markup = get_with_retry(url, pool)
+            with metrics.timer('extract', 'tass.ru'):
+                sentences = extract_sentences(html_content)
+            metrics.observe('crawl_sentences_per_article', len(sentences), host='tass.ru')
             
             if sentences:
-                for s in sentences:
-                    writer.writerow([count, url, title, s])
-                    count += 1
+                if buckets is not None:
+                    with metrics.timer('write'):
+                        published = published or extract_published_date(date_markup)
+                        for s in sentences:
+                            label = buckets.write(published, [url, clean_title, s])
+                        buckets.flush()
+                    print(f"✅ 成功拿回 {len(sentences)} 条 → {label}")
+                    continue
+                with metrics.timer('write'):
+                    for s in sentences:
+                        writer.writerow([count, url, title, s])
+                        count += 1
+                    f_out.flush() # 每一篇都强制保存一次，防断电
                 print(f"✅ 成功拿回 {len(sentences)} 条")
-                f_out.flush() # 每一篇都强制保存一次，防断电
             else:
                 print("❓ 依然未匹配 (可能该文确实无关键词)")
 
-    print(f"\n✨ 任务彻底完成！结果已存入 {OUTPUT_FILE}")
+    if skipped:
+        print(f"🧹 链接过滤：跳过 {skipped} 条")
+    if buckets is not None:
+        buckets.close()
+        for label, n in sorted(buckets.counts.items()):
+            print(f"📅 {buckets.path_for(label)}: {n} 条")
+    if stop_dump is not None:
+        stop_dump.set()
+    metrics.print_summary()
+    hedged_fetch.print_stats()
+    print(f"\n✨ 任务彻底完成！结果已存入 {OUTPUT_PREFIX + '*.csv' if buckets is not None else OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with stage_profile.from_argv():
+        main()
\ No newline at end of file
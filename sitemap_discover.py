@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基于 sitemap / 存档页的文章发现，替代站内搜索翻页。
+
+站内搜索是限流和人机验证最严的接口，结果数还有上限；sitemap 是可缓存的静态文件。
+本模块流式解析站点的 sitemap 索引和按日期分片的子 sitemap（或按天的存档页），
+按发布日期窗口、URL 规则和标题关键词过滤，输出与 数据/*链接/*.txt 相同的 `标题,链接` 文件。
+只有新闻 sitemap（news:）带标题和发布日期；普通 sitemap 的条目先查当天存档页的标题，
+再不行就只下载文章页 <head> 取 <title> 和 meta 发布日期（结果缓存在 sitemap_cache/titles.jsonl）。
+
+命令：
+    python sitemap_discover.py tass --start 2021-01-01 --end 2021-12-31 --keyword Huawei --out tass21-22.txt
+    python sitemap_discover.py kommersant --archive --start 2025-02-01 --end 2025-02-07
+"""
+
+import argparse
+import datetime
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+import crawl_metrics as metrics
+from date_bucket import extract_published_date
+from link_filter import rule_verdict, in_page_chrome
+from link_source import canonical_url
+import stage_profile
+
+# --- 配置 ---
+CACHE_DIR = "sitemap_cache"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+}
+
+TITLE_CACHE = os.path.join(CACHE_DIR, "titles.jsonl")
+TITLE_DELAY = 0.5               # 逐篇取标题时的请求间隔（秒）
+HEAD_BYTE_CAP = 256 * 1024      # 取标题只读到 </head> 或这么多字节
+
+# sitemap 索引地址以 robots.txt 中的 Sitemap: 行为准，这里的 index 只是兜底；
+# archive 为按天存档页模板（{date} 替换为 YYYY-MM-DD），站点改版时在这里调整
+SOURCES = {
+    'tass': {
+        'host': 'https://tass.ru',
+        'index': ['https://tass.ru/sitemap.xml'],
+        'archive': None,
+    },
+    'rt': {
+        'host': 'https://russian.rt.com',
+        'index': ['https://russian.rt.com/sitemap.xml'],
+        'archive': None,
+    },
+    'kommersant': {
+        'host': 'https://www.kommersant.ru',
+        'index': ['https://www.kommersant.ru/sitemap.xml'],
+        'archive': 'https://www.kommersant.ru/archive/news/day/{date}',
+    },
+}
+
+SM_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+NEWS_NS = '{http://www.google.com/schemas/sitemap-news/0.9}'
+# 子 sitemap 地址里的日期，例如 sitemap-2021-03.xml、/2021/03/05/
+URL_DATE_RE = re.compile(r'(20\d{2})[-_/](\d{2})(?:[-_/](\d{2}))?')
+ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.I | re.S)
+OG_TITLE_RE = re.compile(r'<meta[^>]+property=["\']og:title["\'][^>]+content=["\']([^"\']+)', re.I)
+
+
+def _parse_date(text):
+    m = ISO_DATE_RE.search(text or '')
+    if not m:
+        return None
+    try:
+        return datetime.date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    except ValueError:
+        return None
+
+
+def _url_period(url):
+    """子 sitemap 地址里的日期范围 (起, 止)，没有日期返回 None"""
+    m = URL_DATE_RE.search(url)
+    if not m:
+        return None
+    year, month = int(m.group(1)), int(m.group(2))
+    if not 1 <= month <= 12:
+        return None
+    if m.group(3):
+        try:
+            day = datetime.date(year, month, int(m.group(3)))
+        except ValueError:
+            return None
+        return day, day
+    first = datetime.date(year, month, 1)
+    last = (first + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+    return first, last
+
+
+def _cache_paths(url):
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, key + '.xml'), os.path.join(CACHE_DIR, key + '.json')
+
+
+def fetch_cached(url, immutable=False):
+    """
+    下载到本地缓存（流式写盘），带 ETag / Last-Modified 条件请求
+
+    参数:
+        immutable (bool): 历史月份的子 sitemap 不会再变，已缓存则直接用
+    返回:
+        str: 缓存文件路径，失败返回 None
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    body_path, meta_path = _cache_paths(url)
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if immutable and os.path.exists(body_path):
+            return body_path
+
+    headers = dict(HEADERS)
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    try:
+        response = requests.get(url, headers=headers, timeout=30, stream=True)
+    except requests.exceptions.RequestException as e:
+        print(f"  ❌ 下载失败 {url}: {e}")
+        return body_path if os.path.exists(body_path) else None
+
+    if response.status_code == 304 and os.path.exists(body_path):
+        response.close()
+        return body_path
+    if response.status_code != 200:
+        print(f"  ⚠️ {url} 状态码 {response.status_code}")
+        response.close()
+        return None
+
+    raw = response.raw
+    raw.decode_content = True
+    tmp_path = body_path + '.part'
+    with open(tmp_path, 'wb') as f:
+        for chunk in iter(lambda: raw.read(64 * 1024), b''):
+            f.write(chunk)
+    response.close()
+    os.replace(tmp_path, body_path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'url': url, 'etag': response.headers.get('ETag'),
+                   'last_modified': response.headers.get('Last-Modified')}, f)
+    return body_path
+
+
+def iter_sitemap(path):
+    """
+    流式解析 sitemap 文件（支持 .gz），逐条产出
+    {'kind': 'sitemap'|'url', 'loc', 'lastmod', 'published', 'title'}，
+    published / title 只有新闻 sitemap 才有；解析完的节点立即从根节点摘下释放
+    """
+    with open(path, 'rb') as f:
+        head = f.read(2)
+    opener = gzip.open if head == b'\x1f\x8b' else open
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    with opener(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    continue
+                tag = elem.tag.replace(SM_NS, '')
+                if tag not in ('sitemap', 'url'):
+                    continue
+                loc = (elem.findtext(SM_NS + 'loc') or '').strip()
+                lastmod = elem.findtext(SM_NS + 'lastmod')
+                news = elem.find(NEWS_NS + 'news')
+                title = ''
+                published = None
+                if news is not None:
+                    title = (news.findtext(NEWS_NS + 'title') or '').strip()
+                    published = _parse_date(news.findtext(NEWS_NS + 'publication_date'))
+                yield {'kind': tag, 'loc': loc, 'lastmod': _parse_date(lastmod),
+                       'published': published, 'title': title}
+                # clear() 只清空内容，节点仍挂在根节点下；已处理的兄弟节点一并摘掉
+                elem.clear()
+                del root[:]
+
+
+def robots_sitemaps(host):
+    """从 robots.txt 读取 Sitemap: 行"""
+    try:
+        response = requests.get(host.rstrip('/') + '/robots.txt', headers=HEADERS, timeout=15)
+    except requests.exceptions.RequestException:
+        return []
+    if response.status_code != 200:
+        return []
+    return [line.split(':', 1)[1].strip() for line in response.text.splitlines()
+            if line.lower().startswith('sitemap:')]
+
+
+class TitleResolver:
+    """
+    给没有 news:title 的 sitemap 条目补标题（和发布日期）：
+    先查当天存档页（SOURCES 里配置了 archive 的站点），再只下载文章页 <head>；结果写入 TITLE_CACHE
+    """
+
+    def __init__(self, source, cache_file=TITLE_CACHE):
+        self.source = source
+        self.cache_file = cache_file
+        self.cache = {}
+        self.archive_days = {}
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        self.cache[item['url']] = (item['title'], _parse_date(item['published']))
+
+    def from_archive(self, url, day):
+        if day is None or not SOURCES[self.source]['archive']:
+            return None
+        if day not in self.archive_days:
+            self.archive_days[day] = {canonical_url(u): t for t, u in discover_from_archive(self.source, day, day)}
+        return self.archive_days[day].get(canonical_url(url))
+
+    def resolve(self, url, day=None):
+        """返回 (标题, 发布日期)；day 为已知的发布日期，用来定位存档页"""
+        title = self.from_archive(url, day)
+        if title:
+            return title, day
+        if url not in self.cache:
+            title, published = fetch_head_title(url)
+            self.cache[url] = (title, published)
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            with open(self.cache_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'url': url, 'title': title,
+                                    'published': published.isoformat() if published else None},
+                                   ensure_ascii=False) + '\n')
+            metrics.sleep(TITLE_DELAY, SOURCES[self.source]['host'])
+        title, published = self.cache[url]
+        return title, day or published
+
+
+def fetch_head_title(url):
+    """只下载文章页 <head>，返回 (标题, meta 中的发布日期)；失败返回 ('', None)"""
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=20, stream=True)
+    except requests.exceptions.RequestException as e:
+        print(f"  ⚠️ 取标题失败 {url}: {e}")
+        return '', None
+    if response.status_code != 200:
+        response.close()
+        return '', None
+    head = b''
+    for chunk in response.iter_content(chunk_size=16 * 1024):
+        head += chunk
+        if b'</head>' in head.lower() or len(head) >= HEAD_BYTE_CAP:
+            break
+    response.close()
+    head_html = head.decode('utf-8', errors='replace')
+    m = OG_TITLE_RE.search(head_html) or TITLE_RE.search(head_html)
+    title = re.sub(r'\s+', ' ', html.unescape(m.group(1))).strip() if m else ''
+    return title, extract_published_date(head_html)
+
+
+def discover_from_sitemaps(source, start, end, keywords=None):
+    """
+    遍历 sitemap 索引，产出发布日期在窗口内的文章 (title, url)
+
+    发布日期依次取 news:publication_date、文章地址里的日期、子 sitemap 的日期范围、文章页 meta；
+    lastmod 只用来排除（最后修改早于窗口起点的文章不可能在窗口内发布）。
+
+    参数:
+        source (str): SOURCES 中的站点名
+        start, end (datetime.date): 日期窗口（含两端）
+        keywords (list): 标题关键词，为空则不按标题过滤
+    """
+    conf = SOURCES[source]
+    pending = robots_sitemaps(conf['host']) or list(conf['index'])
+    seen_maps = set()
+    this_month = datetime.date.today().replace(day=1)
+    keywords = [k.lower() for k in (keywords or [])]
+    titles = TitleResolver(source)
+
+    while pending:
+        sm_url = pending.pop(0)
+        if sm_url in seen_maps:
+            continue
+        seen_maps.add(sm_url)
+        period = _url_period(sm_url)
+        if period and (period[1] < start or period[0] > end):
+            continue
+        immutable = bool(period and period[1] < this_month)
+        path = fetch_cached(sm_url, immutable=immutable)
+        if path is None:
+            continue
+        print(f"🗺️ 解析 {sm_url}")
+        for entry in iter_sitemap(path):
+            if entry['kind'] == 'sitemap':
+                # 子 sitemap 的 lastmod 早于窗口起点，说明其中没有窗口内的文章
+                if entry['lastmod'] and entry['lastmod'] < start:
+                    continue
+                pending.append(entry['loc'])
+                continue
+            if entry['lastmod'] and entry['lastmod'] < start:
+                continue
+            if rule_verdict(entry['loc']) == 'reject':
+                continue
+            published = entry['published']
+            if published is None:
+                url_period = _url_period(entry['loc'])
+                if url_period and url_period[0] == url_period[1]:
+                    published = url_period[0]
+            if published is not None and not (start <= published <= end):
+                continue
+            # 子 sitemap 整段都在窗口内时不必逐篇确认日期
+            inside = published is not None or bool(period and start <= period[0] and period[1] <= end)
+            title = entry['title']
+            if not title or not inside:
+                title, published = titles.resolve(entry['loc'], published)
+                if not inside and (published is None or not (start <= published <= end)):
+                    continue
+            if keywords and not any(k in title.lower() for k in keywords):
+                continue
+            yield title, entry['loc']
+
+
+def discover_from_archive(source, start, end, keywords=None):
+    """按天遍历存档页，产出 (title, url)"""
+    template = SOURCES[source]['archive']
+    if not template:
+        print(f"🛑 {source} 未配置存档页模板")
+        return
+    keywords = [k.lower() for k in (keywords or [])]
+    day = start
+    while day <= end:
+        page_url = template.format(date=day.isoformat())
+        path = fetch_cached(page_url, immutable=day < datetime.date.today())
+        day += datetime.timedelta(days=1)
+        if path is None:
+            continue
+        with open(path, 'rb') as f:
+            soup = BeautifulSoup(f.read(), 'html.parser')
+        for a_tag in soup.find_all('a', href=True):
+            if in_page_chrome(a_tag):
+                continue
+            url = urljoin(page_url, a_tag['href']).split('?')[0]
+            if rule_verdict(url) != 'article':
+                continue
+            title = a_tag.get_text(" ", strip=True)
+            if keywords and not any(k in title.lower() for k in keywords):
+                continue
+            yield title, url
+
+
+def write_link_file(links, output_file):
+    """写成 `标题,链接` 格式，URL 去重"""
+    seen = set()
+    count = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for title, url in links:
+            if url in seen:
+                continue
+            seen.add(url)
+            f.write(f"{title.replace(chr(10), ' ')},{url}\n")
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='sitemap / 存档页文章发现')
+    parser.add_argument('source', choices=sorted(SOURCES))
+    parser.add_argument('--start', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--keyword', action='append', help='标题关键词，可重复')
+    parser.add_argument('--archive', action='store_true', help='使用按天存档页而不是 sitemap')
+    parser.add_argument('--out', help='输出链接文件')
+    args = parser.parse_args()
+
+    start = datetime.date.fromisoformat(args.start)
+    end = datetime.date.fromisoformat(args.end)
+    output_file = args.out or f"{args.source}_{args.start}_{args.end}.txt"
+    if args.archive:
+        links = discover_from_archive(args.source, start, end, args.keyword)
+    else:
+        links = discover_from_sitemaps(args.source, start, end, args.keyword)
+    count = write_link_file(links, output_file)
+    print(f"\n✓ 共发现 {count} 篇文章，已写入 {output_file}")
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分阶段性能剖析：回答“慢在哪里”——BeautifulSoup、re.split、get_text、写 CSV 还是休眠。
+
+所有入口脚本都支持 --profile 开关：
+    python shoudongtass_v4.py --profile              # 等同 --profile=full
+    python extract_keywords.py --profile=full        # cProfile + tracemalloc，开销较大，适合短跑
+    python work_queue.py work --profile=sample       # 定时采样调用栈，开销很小，可用于长时间的正式运行
+    python 11.py --profile --profile-dir=prof_tass   # 指定输出目录（默认 profile_时间戳/）
+
+阶段由 crawl_metrics.timer(...) 或 stage_profile.stage(...) 划分，阶段外的时间记在 run 下。
+输出（运行结束时写出）：
+    <阶段>.prof / <阶段>.txt    full 模式：cProfile 统计（可用 snakeviz / flameprof 画火焰图）和按累计时间排序的前 30 项
+    <阶段>.folded              sample 模式：折叠调用栈，可直接交给 flamegraph.pl 或 speedscope
+    allocations.txt            full 模式：每个阶段的内存峰值 + 运行结束时分配最多的代码位置
+    summary.txt                每个阶段的次数和耗时
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+# --- 配置 ---
+SAMPLE_INTERVAL = 0.01        # 采样模式：每隔多少秒抓一次调用栈
+TRACE_FRAMES = 10             # tracemalloc 记录的调用栈深度
+TOP_N = 30
+
+_active = None                # 当前生效的剖析器，由 from_argv() 设置
+
+
+class NullProfiler:
+    """未开启 --profile 时的空实现"""
+
+    def enter(self, name):
+        pass
+
+    def exit(self, name):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class StageProfiler:
+    """
+    按阶段剖析。每个线程维护自己的阶段栈，只有最内层阶段在计时，
+    嵌套阶段的时间不会重复计入外层。
+    """
+
+    def __init__(self, mode='full', out_dir=None, interval=SAMPLE_INTERVAL):
+        self.mode = mode
+        self.out_dir = out_dir or time.strftime('profile_%Y%m%d_%H%M%S')
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stacks = {}            # 线程 id -> 阶段栈
+        self.profiles = {}          # (阶段, 线程 id) -> cProfile.Profile
+        self.calls = Counter()      # 阶段 -> 进入次数
+        self.seconds = Counter()    # 阶段 -> 累计耗时（含嵌套）
+        self.peaks = {}             # 阶段 -> tracemalloc 峰值（字节）
+        self.samples = Counter()    # 折叠调用栈 -> 采样次数
+        self.stopped = threading.Event()
+        self.sampler = None
+
+    # --- 阶段进出 ---
+    def enter(self, name):
+        tid = threading.get_ident()
+        with self.lock:
+            stack = self.stacks.setdefault(tid, [])
+            outer = stack[-1] if stack else None
+            stack.append([name, time.time(), 0])    # [阶段, 开始时间, 进入内层前的内存峰值]
+            self.calls[name] += 1
+        if self.mode == 'full':
+            if outer is not None:
+                self._profile(outer[0], tid).disable()
+                # reset_peak 会清掉外层已经达到的峰值，先记下来，外层退出时再取最大值
+                outer[2] = max(outer[2], tracemalloc.get_traced_memory()[1])
+            self._profile(name, tid).enable()
+            tracemalloc.reset_peak()
+
+    def exit(self, name):
+        tid = threading.get_ident()
+        with self.lock:
+            stack = self.stacks.get(tid) or []
+            if not stack or stack[-1][0] != name:
+                return
+            _, started, saved_peak = stack.pop()
+            outer = stack[-1] if stack else None
+            self.seconds[name] += time.time() - started
+        if self.mode == 'full':
+            self._profile(name, tid).disable()
+            peak = max(saved_peak, tracemalloc.get_traced_memory()[1])
+            self.peaks[name] = max(self.peaks.get(name, 0), peak)
+            if outer is not None:
+                self._profile(outer[0], tid).enable()
+
+    def _profile(self, name, tid):
+        key = (name, tid)
+        prof = self.profiles.get(key)
+        if prof is None:
+            prof = self.profiles[key] = cProfile.Profile()
+        return prof
+
+    # --- 采样模式 ---
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self.lock:
+                stages = {tid: stack[-1][0] for tid, stack in self.stacks.items() if stack}
+            for tid, frame in frames.items():
+                if tid == own:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stage = stages.get(tid, 'idle')
+                self.samples[';'.join([stage] + names[::-1])] += 1
+
+    # --- 开始 / 结束 ---
+    def start(self):
+        if self.mode == 'full':
+            tracemalloc.start(TRACE_FRAMES)
+        else:
+            self.sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self.sampler.start()
+        self.enter('run')
+        print(f"🔬 性能剖析已开启（{self.mode}），结果将写入 {self.out_dir}/")
+
+    def stop(self):
+        self.exit('run')
+        self.stopped.set()
+        if self.sampler is not None:
+            self.sampler.join()
+        snapshot = None
+        if self.mode == 'full':
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        self.write(snapshot)
+
+    def write(self, snapshot=None):
+        os.makedirs(self.out_dir, exist_ok=True)
+        if self.mode == 'full':
+            by_stage = {}
+            for (name, _), prof in self.profiles.items():
+                by_stage.setdefault(name, []).append(prof)
+            for name, profs in by_stage.items():
+                stats = pstats.Stats(profs[0])
+                for prof in profs[1:]:
+                    stats.add(prof)
+                stats.dump_stats(os.path.join(self.out_dir, f"{name}.prof"))
+                buf = io.StringIO()
+                pstats.Stats(os.path.join(self.out_dir, f"{name}.prof"), stream=buf) \
+                    .sort_stats('cumulative').print_stats(TOP_N)
+                with open(os.path.join(self.out_dir, f"{name}.txt"), 'w', encoding='utf-8') as f:
+                    f.write(buf.getvalue())
+            with open(os.path.join(self.out_dir, 'allocations.txt'), 'w', encoding='utf-8') as f:
+                f.write("# 各阶段内存峰值（tracemalloc，单位 MB）\n")
+                for name, peak in sorted(self.peaks.items(), key=lambda kv: -kv[1]):
+                    f.write(f"{name}\t{peak / 1048576:.2f}\n")
+                if snapshot is not None:
+                    f.write(f"\n# 运行结束时分配最多的 {TOP_N} 个代码位置\n")
+                    for stat in snapshot.statistics('traceback')[:TOP_N]:
+                        f.write(f"{stat.size / 1024:.1f} KiB\t{stat.count} 块\n")
+                        for line in stat.traceback.format(limit=3):
+                            f.write(f"    {line}\n")
+        else:
+            by_stage = {}
+            for stack, count in self.samples.items():
+                by_stage.setdefault(stack.split(';', 1)[0], []).append((stack, count))
+            for name, rows in by_stage.items():
+                with open(os.path.join(self.out_dir, f"{name}.folded"), 'w', encoding='utf-8') as f:
+                    for stack, count in rows:
+                        f.write(f"{stack} {count}\n")
+
+        with open(os.path.join(self.out_dir, 'summary.txt'), 'w', encoding='utf-8') as f:
+            f.write("阶段\t次数\t耗时(秒)\n")
+            for name, secs in self.seconds.most_common():
+                f.write(f"{name}\t{self.calls[name]}\t{secs:.3f}\n")
+        print(f"🔬 性能剖析结果已写入 {self.out_dir}/")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        self.stop()
+        _active = None
+        return False
+
+
+def from_argv(argv=None):
+    """
+    从命令行取出 --profile[=full|sample] 和 --profile-dir=目录（取出后从 argv 中删除，
+    不影响脚本自己的参数解析），返回剖析器；没有 --profile 时返回 NullProfiler
+    """
+    global _active
+    argv = sys.argv if argv is None else argv
+    mode = None
+    out_dir = None
+    rest = []
+    for arg in argv:
+        if arg == '--profile':
+            mode = 'full'
+        elif arg.startswith('--profile='):
+            mode = arg.split('=', 1)[1] or 'full'
+        elif arg.startswith('--profile-dir='):
+            out_dir = arg.split('=', 1)[1]
+        else:
+            rest.append(arg)
+    argv[:] = rest
+    if mode is None:
+        return NullProfiler()
+    if mode not in ('full', 'sample'):
+        print(f"⚠️ 未知的剖析模式 {mode}，改用 full")
+        mode = 'full'
+    _active = StageProfiler(mode, out_dir)
+    return _active
+
+
+@contextmanager
+def stage(name):
+    """划分一个阶段；未开启 --profile 时什么也不做"""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    profiler.enter(name)
+    try:
+        yield
+    finally:
+        profiler.exit(name)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+流式抓取：边下载边解析，正文所在的外层元素闭合或达到字节上限就停止读取。
+
+用法（在其他脚本里）：
+    from stream_fetch import fetch_article_stream
+    outcome = fetch_article_stream(url)
+    print(outcome['text'], outcome['truncated'])
+"""
+
+import re
+import time
+import codecs
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+
+import crawl_metrics as metrics
+import stage_profile
+
+# --- 配置 ---
+CHUNK_SIZE = 16 * 1024
+
+# 各站点正文容器（class 正则），与 11.py / shoudongtass.py 中的选择器保持一致
+ARTICLE_CONTAINERS = {
+    'tass.ru': re.compile(r'article__text|text-block|news-text'),
+    'tass.com': re.compile(r'article__text|text-block|news-text'),
+    'russian.rt.com': re.compile(r'article__text|article__summary'),
+    'www.kommersant.ru': re.compile(r'doc__body|article_text_wrapper'),
+}
+
+# 单站点字节上限：Google 翻译中转页面体积最大，单独放宽
+HOST_BYTE_CAPS = {
+    'translate.google.com': 3 * 1024 * 1024,
+    'tass.ru': 1536 * 1024,
+    'russian.rt.com': 1536 * 1024,
+    'www.kommersant.ru': 1536 * 1024,
+}
+DEFAULT_BYTE_CAP = 2 * 1024 * 1024
+
+# 这些标签没有闭合标签，不计入嵌套深度
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+}
+
+
+CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+
+def response_encoding(response):
+    """
+    响应的字符集：只认 Content-Type 里明确写出的 charset，否则按 utf-8。
+    requests 对不带 charset 的 text/html 默认给 ISO-8859-1，俄文会变成乱码。
+    """
+    m = CHARSET_RE.search(response.headers.get('Content-Type', ''))
+    if m:
+        try:
+            return codecs.lookup(m.group(1)).name
+        except LookupError:
+            pass
+    return 'utf-8'
+
+
+def target_host(url):
+    """取真实目标站点：Google 翻译中转链接取 u= 参数里的站点"""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host == 'translate.google.com':
+        inner = dict(parse_qsl(parts.query)).get('u')
+        if inner:
+            return urlsplit(inner).netloc.lower()
+    return host
+
+
+class ArticleStreamParser(HTMLParser):
+    """
+    增量解析器：只收集正文容器内的文本。正文可能分成几个并列的容器
+    （RT 的 article__summary 与 article__text），所以一个容器闭合后继续找后面的，
+    直到包住第一个容器的外层元素闭合才标记 done。
+    container_re 为 None 时收集整页文本（去掉 script/style）；
+    始终没找到容器时回退为整页文本。
+    """
+
+    def __init__(self, container_re=None):
+        super().__init__(convert_charrefs=True)
+        self.container_re = container_re
+        self.stack = []          # 容器内部打开的标签
+        self.outer = []          # 容器外打开的标签
+        self.wrapper_depth = None    # 第一个容器的外层元素在 outer 中的深度
+        self.inside = container_re is None
+        self.skip_depth = 0
+        self.parts = []
+        self.page_parts = []     # 容器外文本，找不到容器时兜底
+        self.date_tags = []      # 容器外的 <meta>/<time> 原文，供 date_bucket.extract_published_date 取发布日期
+        self.done = False
+        self.found = container_re is None
+
+    def _boundary(self):
+        # 标签边界补空格，行内标签（<a>、<span>）两侧的文字不会粘成一个词；
+        # 不能在 handle_data 里补——流式喂入时一段文字可能在分块处被拆成两次回调
+        if self.inside:
+            self.parts.append(' ')
+        elif not self.found:
+            self.page_parts.append(' ')
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        self._boundary()
+        if tag in ('meta', 'time') and not self.inside:
+            raw = self.get_starttag_text()
+            if tag == 'time' or 'ublished' in raw:
+                self.date_tags.append(raw)
+        if not self.inside:
+            cls = dict(attrs).get('class') or ''
+            if self.container_re.search(cls):
+                self.inside = True
+                self.stack = [tag]
+                if not self.found:
+                    self.found = True
+                    self.wrapper_depth = len(self.outer)
+                    self.page_parts = []
+            elif tag not in VOID_TAGS:
+                self.outer.append(tag)
+            return
+        if self.container_re is not None and tag not in VOID_TAGS:
+            self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        self._boundary()
+        if self.container_re is None:
+            return
+        # 容错：跳过未闭合的子标签，直到找到匹配的那一层
+        stack = self.stack if self.inside else self.outer
+        if tag in stack:
+            while stack:
+                if stack.pop() == tag:
+                    break
+        if self.inside:
+            if not self.stack:
+                self.inside = False
+                self.done = self.wrapper_depth == 0
+        elif self.found and len(self.outer) < self.wrapper_depth:
+            self.done = True
+
+    def handle_data(self, data):
+        if self.done or self.skip_depth or not data.strip():
+            return
+        if self.inside:
+            self.parts.append(data)
+        elif not self.found:
+            self.page_parts.append(data)
+
+    def text(self):
+        parts = self.parts if self.found else self.page_parts
+        return re.sub(r'\s+', ' ', ''.join(parts)).strip()
+
+
+def fetch_article_stream(url, headers=None, timeout=20, byte_cap=None,
+                         container_re=None, session=None, proxies=None, pool=None):
+    """
+    流式下载并解析正文。
+
+    参数:
+        url (str): 文章链接（可以是 Google 翻译中转链接）
+        byte_cap (int): 字节上限，默认按站点取 HOST_BYTE_CAPS
+        container_re: 正文容器 class 正则，默认按站点取 ARTICLE_CONTAINERS
+        pool: proxy_pool.ProxyPool，给定时由代理池选出口并回报结果
+
+    返回:
+        dict: url / status / text / bytes / truncated / reason /
+              found_container / elapsed / first_text_at / date_markup
+    """
+    host = urlsplit(url).netloc.lower()
+    if byte_cap is None:
+        byte_cap = HOST_BYTE_CAPS.get(host, DEFAULT_BYTE_CAP)
+    if container_re is None:
+        container_re = ARTICLE_CONTAINERS.get(target_host(url))
+
+    outcome = {
+        'url': url, 'status': None, 'text': '', 'bytes': 0,
+        'truncated': False, 'reason': None, 'found_container': False,
+        'elapsed': 0.0, 'first_text_at': None, 'headers': {}, 'date_markup': '',
+    }
+    start = time.time()
+    getter = session.get if session is not None else requests.get
+    state = None
+    if pool is not None:
+        state = pool.wait_pick(host)
+        if state is None:
+            outcome['reason'] = 'no proxy available'
+            return outcome
+        proxies = state.proxies_arg()
+        outcome['proxy'] = state.proxy
+    try:
+        response = getter(url, headers=headers or DEFAULT_HEADERS, timeout=timeout,
+                          stream=True, proxies=proxies)
+    except requests.exceptions.RequestException as e:
+        outcome['reason'] = f'error: {e}'
+        outcome['elapsed'] = time.time() - start
+        if state is not None:
+            pool.report(state, elapsed=outcome['elapsed'], error=e)
+        metrics.record_fetch(host, 'error', outcome['elapsed'])
+        return outcome
+
+    if state is not None:
+        pool.report(state, status=response.status_code, elapsed=time.time() - start)
+    outcome['status'] = response.status_code
+    outcome['headers'] = dict(response.headers)
+    if response.status_code != 200:
+        response.close()
+        outcome['reason'] = f'status {response.status_code}'
+        outcome['elapsed'] = time.time() - start
+        metrics.record_fetch(host, response.status_code, outcome['elapsed'])
+        return outcome
+
+    parser = ArticleStreamParser(container_re)
+    decoder = codecs.getincrementaldecoder(response_encoding(response))(errors='replace')
+    try:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if not chunk:
+                continue
+            outcome['bytes'] += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if outcome['first_text_at'] is None and parser.parts:
+                outcome['first_text_at'] = time.time() - start
+            if parser.done:
+                outcome['reason'] = 'container closed'
+                break
+            if outcome['bytes'] >= byte_cap:
+                outcome['truncated'] = True
+                outcome['reason'] = f'byte cap {byte_cap}'
+                break
+        else:
+            parser.feed(decoder.decode(b'', final=True))
+            outcome['reason'] = 'eof'
+    except requests.exceptions.RequestException as e:
+        outcome['truncated'] = True
+        outcome['reason'] = f'error: {e}'
+    finally:
+        response.close()
+
+    # found_container 为 False 时说明选择器失效，调用方可回退到整页解析
+    outcome['found_container'] = parser.found
+    outcome['text'] = parser.text()
+    outcome['date_markup'] = ''.join(parser.date_tags)
+    outcome['elapsed'] = time.time() - start
+    metrics.record_fetch(host, 200, outcome['elapsed'], outcome['bytes'])
+    if outcome['truncated']:
+        metrics.inc('crawl_truncated_total', host=host)
+    return outcome
+
+
+def main():
+    url = "https://tass.ru/ekonomika/26126381"
+    outcome = fetch_article_stream(url)
+    print(f"状态: {outcome['status']} | 读取 {outcome['bytes']} 字节 | 原因: {outcome['reason']}")
+    print(f"截断: {outcome['truncated']} | 首段文本耗时: {outcome['first_text_at']}")
+    print(outcome['text'][:300])
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+corpus_import：外部排序去重——分段排序写盘、多路归并，同键只保留来源 / 时间段 / 行号最靠前的一条。
+"""
+
+import csv
+import os
+from collections import Counter
+
+import corpus_import
+from corpus_import import KIND, NORM, ROW, SOURCE, URL, dedup, dedup_key, merge_runs, sorted_runs
+
+KEY = corpus_import._dedup_sort_key
+
+
+def _record(source, window, row, url, text):
+    return ['corpus', source, window, f'{source}{window}.csv', row, url, 'Huawei', '', text, 'Huawei',
+            dedup_key(text) if text else '']
+
+
+def _write_csv(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['序号', '链接', '标题', '匹配语料'])
+        for i, (url, text) in enumerate(rows, 1):
+            writer.writerow([i, url, 'Huawei', text])
+
+
+def test_sorted_runs_are_sorted_and_merge_in_order(tmp_path):
+    records = [_record('tass', '20-21', i, f'https://tass.ru/ekonomika/{(7 * i) % 10}', f'Huawei {i}')
+               for i in range(1, 11)]
+    runs = sorted_runs(iter(records), KEY, str(tmp_path), 'test', run_size=3)
+    assert len(runs) == 4
+    merged = list(merge_runs(runs, KEY))
+    assert merged == sorted(records, key=KEY)
+
+
+def test_dedup_keeps_first_across_runs(tmp_path):
+    url = 'https://tass.ru/ekonomika/1'
+    records = [
+        _record('rt', '20-21', 1, url, 'Huawei  представила сеть.'),
+        _record('tass', '20-21', 5, url, 'huawei представила сеть.'),
+        _record('tass', '20-21', 2, url, 'Huawei представила сеть.'),
+        _record('tass', '20-21', 3, url, ''),
+        _record('tass', '20-21', 4, 'https://tass.ru/ekonomika/2', 'Huawei представила сеть.'),
+    ]
+    runs = sorted_runs(iter(records), KEY, str(tmp_path), 'test', run_size=2)
+    stats = Counter()
+    kept = list(dedup(merge_runs(runs, KEY), stats))
+
+    # 大小写 / 空白不同也算重复；TASS 排在 RT 前，同来源取行号小的
+    assert [(r[SOURCE], r[ROW], r[URL]) for r in kept] == [
+        ('tass', 2, url), ('tass', 4, 'https://tass.ru/ekonomika/2')]
+    tass, rt = ('corpus', 'tass', '20-21'), ('corpus', 'rt', '20-21')
+    assert stats[tass + ('原始行数',)] == 4
+    assert stats[tass + ('空行',)] == 1
+    assert stats[tass + ('重复',)] == 1
+    assert stats[tass + ('保留',)] == 2
+    assert stats[rt + ('重复',)] == 1
+    assert all(r[KIND] == 'corpus' and r[NORM] for r in kept)
+
+
+def test_build_merges_supplement_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    a = ('https://tass.ru/ekonomika/1', 'Компания Huawei представила сеть.')
+    b = ('https://tass.ru/ekonomika/2', 'Huawei открыла центр в Москве.')
+    _write_csv(os.path.join('数据', 'tass数据', 'tass20-21.csv'), [a, b])
+    _write_csv(os.path.join('数据', 'tass数据', 'tass20-21补.csv'), [b, a, b])
+
+    corpus_import.build('数据', '数据汇总', run_size=2)
+    with open(os.path.join('数据汇总', 'corpus.csv'), encoding='utf-8-sig') as f:
+        rows = list(csv.DictReader(f))
+    assert [(r['序号'], r['链接'], r['原文件']) for r in rows] == [
+        ('1', a[0], os.path.join('数据', 'tass数据', 'tass20-21.csv')),
+        ('2', b[0], os.path.join('数据', 'tass数据', 'tass20-21.csv'))]
+    with open(os.path.join('数据汇总', 'summary.csv'), encoding='utf-8-sig') as f:
+        summary = list(csv.DictReader(f))
+    assert [(r['文件数'], r['原始行数'], r['重复'], r['保留'], r['文章数']) for r in summary] == [
+        ('2', '5', '3', '2', '2')]
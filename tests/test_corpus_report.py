@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+corpus_report：链接文件与输出对账——导航链接不计入搜索结果，没有命中的文章计为漏检，失败的链接单独计数。
+"""
+
+import os
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+import corpus_report
+
+NAV = ['https://tass.ru/ekonomika', 'https://tass.ru/politika']
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8-sig' if path.endswith('.csv') else 'utf-8') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    root = str(tmp_path / '数据')
+    for window, articles in (('20-21', [1, 2, 3, 4]), ('21-22', [5, 6]), ('22-23', [7])):
+        lines = [f'Экономика,{NAV[0]}', f'Политика,{NAV[1]}']
+        lines += [f'Статья {n},https://tass.ru/ekonomika/{n}' for n in articles]
+        _write(os.path.join(root, 'tass链接', f'{window}.txt'), '\n'.join(lines) + '\n')
+    # 20-21：文章 1 两条命中，文章 2 一条，文章 3、4 没有命中
+    _write(os.path.join(root, 'tass数据', 'tass20-21.csv'),
+           '序号,链接,标题,匹配语料\n'
+           '1,https://tass.ru/ekonomika/1,Статья 1,Huawei представила сеть.\n'
+           '2,https://tass.ru/ekonomika/1,Статья 1,Хуавэй открыла центр.\n'
+           '3,https://tass.ru/ekonomika/2,Статья 2,Акции huawei выросли.\n')
+    _write(os.path.join(root, 'tass数据', 'tass21-22.csv'),
+           '序号,链接,标题,匹配语料\n'
+           '1,https://tass.ru/ekonomika/5,Статья 5,Huawei и ZTE.\n'
+           '2,https://tass.ru/ekonomika/6,Статья 6,\n')
+    return root
+
+
+def test_miss_counts(data_dir):
+    outputs = corpus_report.load_outputs(data_dir)
+    links = corpus_report.load_links(data_dir)
+    failed = pd.DataFrame({'url': ['https://tass.ru/ekonomika/4'], 'title': ['Статья 4'],
+                           'error': ['timeout'], 'attempts': [5]})
+    assert links['chrome'].sum() == 6
+
+    stats, missed, keyword_counts, distribution = corpus_report.reconcile(outputs, links, failed)
+    row = stats.loc[('tass', '20-21')]
+    assert (row['links'], row['chrome'], row['search_results']) == (6, 2, 4)
+    assert (row['articles'], row['sentences'], row['missed'], row['failed']) == (2, 3, 2, 1)
+    assert row['hit_rate'] == pytest.approx(0.5)
+
+    # 只有空语句的文章算漏检
+    row = stats.loc[('tass', '21-22')]
+    assert (row['articles'], row['missed'], row['failed']) == (1, 1, 0)
+    row = stats.loc[('tass', '22-23')]
+    assert (row['articles'], row['missed']) == (0, 1)
+
+    assert sorted(zip(missed['window'], missed['line'], missed['url'], missed['failed'])) == [
+        ('20-21', 5, 'https://tass.ru/ekonomika/3', False),
+        ('20-21', 6, 'https://tass.ru/ekonomika/4', True),
+        ('21-22', 4, 'https://tass.ru/ekonomika/6', False),
+        ('22-23', 3, 'https://tass.ru/ekonomika/7', False),
+    ]
+    assert keyword_counts.loc[('tass', '20-21'), 'Huawei'] == 2
+    assert keyword_counts.loc[('tass', '20-21'), 'Хуавэй'] == 1
+    assert distribution.loc[('tass', '20-21')].to_dict() == {'1': 1, '2-3': 1, '4-5': 0, '6-10': 0, '>10': 0}
+
+
+def test_too_few_files_means_no_chrome(tmp_path):
+    root = str(tmp_path / '数据')
+    _write(os.path.join(root, 'rt链接', 'rt20-21.txt'), f'Экономика,{NAV[0]}\n')
+    _write(os.path.join(root, 'rt链接', 'rt21-22.txt'), f'Экономика,{NAV[0]}\n')
+    assert not corpus_report.load_links(root)['chrome'].any()
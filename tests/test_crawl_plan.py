@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+crawl_plan：不发请求的部分——时间段拆分、结果总数解析、各阶段估算和并发 / 分片建议。
+"""
+
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+pytest.importorskip('requests')
+
+import crawl_plan
+from crawl_plan import estimate, split_windows, suggest, _parse_total
+
+RT_SEARCH = 'https://russian.rt.com/search?q=Huawei&type=News&df=2020-06-15&dt=2022-03-01'
+
+
+def _found(total=None, per_page=10, has_more=False, urls=(), latency=0.5, nbytes=50_000):
+    return {'total': total, 'per_page': per_page, 'has_more': has_more, 'urls': list(urls),
+            'latency': latency, 'bytes': nbytes, 'status': 200}
+
+
+def test_split_windows_follows_buckets():
+    windows = split_windows(RT_SEARCH)
+    assert [label for label, _ in windows] == ['20-21', '21-22', '22-23']
+    ranges = [(q['df'], q['dt'], q['q']) for q in (dict(parse_qsl(urlsplit(u).query)) for _, u in windows)]
+    assert ranges == [('2020-06-15', '2020-12-31', 'Huawei'),
+                      ('2021-01-01', '2021-12-31', 'Huawei'),
+                      ('2022-01-01', '2022-03-01', 'Huawei')]
+
+
+@pytest.mark.parametrize('url', [
+    'https://russian.rt.com/search?q=Huawei',                       # 没有日期参数
+    'https://russian.rt.com/search?q=Huawei&df=2020-01-01&dt=bad',  # 日期格式不对
+    'https://tass.ru/search?search=Huawei',                         # 没有配置日期参数的站点
+])
+def test_split_windows_without_dates(url):
+    assert split_windows(url) == [('', url)]
+
+
+@pytest.mark.parametrize('text, total', [
+    ('Результатов: около 1 234 по запросу', 1234),
+    ('Результатов: около 12 345', 12345),
+    ('Найдено: 143 1 2 3 Следующая', 143),
+    ('Найдено 7', 7),
+    ('Ничего не найдено', None),
+])
+def test_parse_total(text, total):
+    assert _parse_total(text) == total
+
+
+def test_estimate_known_total():
+    seen = {'https://tass.ru/ekonomika/1', 'https://tass.ru/ekonomika/2'}
+    urls = ['https://tass.ru/ekonomika/%d' % i for i in range(1, 11)]
+    row = estimate('20-21', _found(total=95, urls=urls), seen, pacing=(1.0, 0.5),
+                   history={'latency': 2.0, 'bytes': 1000})
+    assert row['total_known']
+    assert row['seen_share'] == pytest.approx(0.2)
+    assert row['new_articles'] == 76
+    assert row['discover'] == {'requests': 10, 'bytes': 500_000, 'seconds': pytest.approx(10 * 1.5)}
+    assert row['fetch'] == {'requests': 76, 'bytes': 76_000, 'seconds': pytest.approx(76 * 2.5)}
+    assert row['extract']['seconds'] == pytest.approx(76 * crawl_plan.CPU_PER_ARTICLE)
+
+
+def test_estimate_unknown_total_and_limit():
+    row = estimate('', _found(has_more=True), set())
+    assert not row['total_known']
+    assert row['total'] == 10 * crawl_plan.UNKNOWN_PAGES
+    assert estimate('', _found(per_page=7), set())['total'] == 7
+    limited = estimate('', _found(total=500), set(), limit=25)
+    assert (limited['total'], limited['discover']['requests']) == (25, 3)
+
+
+def _row(discover, fetch, articles):
+    return {'discover': {'seconds': discover}, 'fetch': {'seconds': fetch},
+            'extract': {'seconds': 0.0}, 'new_articles': articles}
+
+
+def test_suggest():
+    rows = [_row(600, 3600 * 3, 2000), _row(600, 3600 * 3, 2000)]
+    assert suggest(rows, 0) is None
+    advice = suggest(rows, 1.0)
+    # 留给抓取的 40 分钟要并行 9 路：单出口最多 4 路并发，分 3 片
+    assert advice['feasible']
+    assert (advice['concurrency'], advice['shards'], advice['shard_size']) == (4, 3, 1334)
+    assert advice['wall_seconds'] == pytest.approx(1200 + 3600 * 6 / 12)
+    assert suggest(rows, 20)['shards'] == 1
+    assert not suggest(rows, 0.3)['feasible']
+
+
+def test_plan_stops_at_limit(monkeypatch):
+    probed = []
+
+    def fake_probe(url):
+        probed.append(url)
+        return _found(total=30)
+
+    monkeypatch.setattr(crawl_plan, 'probe', fake_probe)
+    monkeypatch.setattr(crawl_plan.metrics, 'sleep', lambda seconds, host=None: None)
+    rows, advice = crawl_plan.plan([RT_SEARCH], limit=45, seen=set(), history={})
+    assert [(r['window'], r['total']) for r in rows] == [('20-21', 30), ('21-22', 15)]
+    assert len(probed) == 2
+    assert advice is None
+
+
+@pytest.mark.parametrize('argv, budget', [
+    (['11.py'], None),
+    (['11.py', '--plan'], 0.0),
+    (['11.py', '--plan', '--budget=2'], 2.0),
+    (['11.py', '--plan', '--budget', '1.5'], 1.5),
+])
+def test_requested(argv, budget):
+    assert crawl_plan.requested(argv) == budget
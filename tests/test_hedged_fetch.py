@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+hedged_fetch：按站点样本推算连接 / 读取超时；对冲落败的结果一定被关闭。
+"""
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+
+import hedged_fetch
+from hedged_fetch import HedgedFetcher
+
+HOST = 'tass.ru'
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+def _fetcher(latency, hedge=True):
+    fetcher = HedgedFetcher(hedge=hedge, max_workers=4)
+    for _ in range(hedged_fetch.MIN_SAMPLES):
+        fetcher.tracker.add(HOST, latency)
+    return fetcher
+
+
+def _scripted(*steps):
+    """依次执行的请求：(耗时, 状态码)"""
+    steps = list(steps)
+    made = []
+    lock = threading.Lock()
+
+    def fn(timeout):
+        with lock:
+            delay, code = steps[len(made)]
+            response = FakeResponse(code)
+            made.append(response)
+        time.sleep(delay)
+        return response
+    return fn, made
+
+
+def _call(fetcher, fn):
+    return fetcher.call(HOST, fn, timeout=10, ok=lambda r: r.status_code == 200,
+                        discard=lambda r: r.close())
+
+
+def test_timeouts_without_samples_fall_back():
+    fetcher = HedgedFetcher(hedge=False)
+    assert fetcher.timeout_for(HOST, 10) == (hedged_fetch.CONNECT_TIMEOUT, 10)
+    assert fetcher.timeout_for(HOST, 2) == (2, 2)
+
+
+def test_timeouts_follow_host_percentiles():
+    fast = _fetcher(0.2, hedge=False)
+    assert fast.timeout_for(HOST, 30) == (hedged_fetch.MIN_CONNECT_TIMEOUT, hedged_fetch.MIN_READ_TIMEOUT)
+
+    slow = _fetcher(2.5, hedge=False)
+    connect, read = slow.timeout_for(HOST, 30)
+    assert connect == pytest.approx(2.5 * hedged_fetch.CONNECT_FACTOR)
+    assert connect > hedged_fetch.CONNECT_TIMEOUT
+    assert read == pytest.approx(2.5 * hedged_fetch.READ_FACTOR)
+    assert slow.timeout_for(HOST, 4) == (4, 4)
+
+
+def test_slow_primary_is_closed_when_backup_wins():
+    fetcher = _fetcher(0.01)
+    fn, made = _scripted((0.6, 200), (0.0, 200))
+    winner = _call(fetcher, fn)
+    assert winner is made[1]
+    assert made[0].closed.wait(2)
+    assert not winner.closed.is_set()
+    assert fetcher.budget.wins[HOST] == 1
+
+
+def test_failed_primary_is_closed_when_backup_wins_later():
+    fetcher = _fetcher(0.01)
+    fn, made = _scripted((0.3, 503), (0.4, 200))
+    winner = _call(fetcher, fn)
+    assert winner is made[1]
+    assert made[0].closed.wait(2)
+
+
+def test_slow_backup_is_closed_when_primary_wins():
+    fetcher = _fetcher(0.01)
+    fn, made = _scripted((0.3, 200), (0.6, 200))
+    winner = _call(fetcher, fn)
+    assert winner is made[0]
+    assert made[1].closed.wait(2)
+    assert not winner.closed.is_set()
+
+
+def test_both_failed_returns_primary_and_closes_backup():
+    fetcher = _fetcher(0.01)
+    fn, made = _scripted((0.3, 503), (0.0, 502))
+    result = _call(fetcher, fn)
+    assert result is made[0]
+    assert made[1].closed.is_set()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+kwic_server：查询解析的错误处理、索引刷新（并发 / 旧段文件的清理）。
+"""
+
+import os
+import threading
+
+import pytest
+
+import kwic_server
+from kwic_server import CorpusIndex, parse_query
+
+ROWS = [
+    ('https://russian.rt.com/news/800001-huawei', 'Huawei и 5G', 'Компания Huawei представила сеть 5G в Москве.'),
+    ('https://russian.rt.com/news/800002-zte', 'ZTE', 'Компания ZTE тоже показала новые смартфоны.'),
+]
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write('序号,链接,标题,匹配语料\n')
+        for i, (url, title, sentence) in enumerate(rows, 1):
+            f.write(f'{i},{url},{title},"{sentence}"\n')
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    data_dir = tmp_path / '数据'
+    (data_dir / 'rt数据').mkdir(parents=True)
+    _write_csv(data_dir / 'rt数据' / 'rt20-21.csv', ROWS)
+    return str(data_dir), str(tmp_path / '语料索引')
+
+
+@pytest.mark.parametrize('query', ['Huawei NOT', 'NOT', 'Huawei -5G NOT (', '"', '(', 'Huawei OR'])
+def test_incomplete_queries_raise_value_error(query):
+    with pytest.raises(ValueError):
+        parse_query(query)
+
+
+def test_query_tree():
+    assert parse_query('Huawei -5G') == ('and', [('term', 'huawei'), ('not', ('term', '5g'))])
+
+
+def test_search(corpus):
+    index = CorpusIndex(*corpus)
+    assert index.search('Huawei 5G')['total'] == 1
+    assert index.search('Компания')['total'] == 2
+    with pytest.raises(ValueError):
+        index.search('Huawei NOT')
+
+
+def test_concurrent_refresh_and_old_segments_removed(corpus):
+    data_dir, index_dir = corpus
+    index = CorpusIndex(data_dir, index_dir)
+    first = index.snapshot()[0][0].prefix
+
+    _write_csv(os.path.join(data_dir, 'rt数据', 'rt20-21.csv'), ROWS[:1])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(index.refresh())) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 只有一个线程真正重建，其余看到的是已更新的清单
+    assert results.count(True) == 1
+    assert index.search('Компания')['total'] == 1
+    # 刚换下来的段还可能有查询在读，文件先保留
+    assert os.path.exists(first + '.docs')
+
+    _write_csv(os.path.join(data_dir, 'rt数据', 'rt20-21.csv'), ROWS[1:])
+    assert index.refresh()
+    assert not os.path.exists(first + '.docs')
+    names = {os.path.splitext(n)[0] for n in os.listdir(index_dir) if n.startswith('seg_')}
+    live = {os.path.basename(s.prefix) for s in index.snapshot()[0] + index.retired}
+    assert names == live
+
+
+def test_build_removes_stale_segments(corpus):
+    data_dir, index_dir = corpus
+    kwic_server.build_index(data_dir, index_dir, verbose=False)
+    _write_csv(os.path.join(data_dir, 'rt数据', 'rt20-21.csv'), ROWS[:1])
+    manifest, rebuilt = kwic_server.build_index(data_dir, index_dir, verbose=False)
+    assert rebuilt == 2    # 新段 + 删掉的旧段
+    names = {os.path.splitext(n)[0] for n in os.listdir(index_dir) if n.startswith('seg_')}
+    assert names == {os.path.basename(e['segment']) for e in manifest.values()}
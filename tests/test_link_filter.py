@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+link_filter：默认只按站点规则过滤；打分器按文章页 / 非文章页训练，不会丢掉没有关键词的文章。
+"""
+
+import os
+
+import pytest
+
+import link_filter
+from link_filter import LinkFilter, LinkScorer, link_features, rule_verdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, '数据')
+
+pytestmark = pytest.mark.skipif(not link_filter.training_pairs(DATA_DIR), reason='没有 数据/ 训练样本')
+
+
+@pytest.fixture(scope='module')
+def scorer(tmp_path_factory):
+    model_file = str(tmp_path_factory.mktemp('model') / 'link_filter_model.json')
+    link_filter.train(DATA_DIR, model_file)
+    return LinkScorer.load(model_file)
+
+
+def _known_articles():
+    """数据/*链接 里的文章链接，以及其中没有产出（不含关键词）的那部分"""
+    articles, without_hits = [], []
+    for link_path, out_path in link_filter.training_pairs(DATA_DIR):
+        links = link_filter._read_link_file(link_path)
+        hits = link_filter._read_output_urls(out_path)
+        for i, (title, url) in enumerate(links):
+            if rule_verdict(url) != 'article':
+                continue
+            item = (url, title, i, len(links))
+            articles.append(item)
+            if link_filter.canonical_url(url) not in hits:
+                without_hits.append(item)
+    return articles, without_hits
+
+
+def test_model_keeps_known_articles(scorer):
+    articles, without_hits = _known_articles()
+    assert articles and without_hits
+    for url, title, i, total in articles:
+        prob = scorer.probability(link_features(url, title, i, total))
+        assert prob >= link_filter.THRESHOLD, url
+
+
+def test_model_rejects_navigation(scorer):
+    chrome = []
+    for link_path, _ in link_filter.training_pairs(DATA_DIR):
+        links = link_filter._read_link_file(link_path)
+        chrome += [(url, title, i, len(links)) for i, (title, url) in enumerate(links)
+                   if rule_verdict(url) == 'reject']
+    assert chrome
+    for url, title, i, total in chrome:
+        assert scorer.probability(link_features(url, title, i, total)) < link_filter.THRESHOLD, url
+
+
+def test_default_filter_uses_rules_only():
+    lf = LinkFilter()
+    assert lf.scorer is None
+    assert not lf.keep('https://tass.ru/ekonomika')
+    assert lf.keep('https://tass.ru/ekonomika/26126381')
+    # 规则判断不了的链接保留
+    assert lf.keep('https://tassphoto.com/ru')
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+link_source：链接行解析、去重键。
+"""
+
+from link_source import canonical_url, iter_links, parse_line
+
+
+def test_only_exact_tracking_params_are_dropped():
+    url = 'https://russian.rt.com/news/800001-huawei?from=rss&utm_source=x&fromSite=a&from_page=2&gclid=1'
+    assert canonical_url(url) == 'https://russian.rt.com/news/800001-huawei?fromSite=a&from_page=2'
+
+
+def test_canonical_key_normalises():
+    assert canonical_url('http://TASS.ru/ekonomika/26126381/#top') == 'https://tass.ru/ekonomika/26126381'
+
+
+def test_parse_line_keeps_original_url():
+    record, problem = parse_line('Заголовок, с запятой,http://tass.ru/ekonomika/26126381/?fromSite=a\n')
+    assert problem is None
+    assert record.title == 'Заголовок, с запятой'
+    assert record.url == 'http://tass.ru/ekonomika/26126381/?fromSite=a'
+
+
+def test_glued_urls_are_repaired():
+    record, _ = parse_line('Заголовок,https://tass.ru/xhttps://tass.ru/ekonomika/1')
+    assert record.url == 'https://tass.ru/ekonomika/1'
+
+
+def test_bad_lines():
+    assert parse_line('   ') == (None, None)
+    assert parse_line('без ссылки')[1] == '没有逗号'
+    assert parse_line('Заголовок,ftp://tass.ru/1')[1].startswith('不是链接')
+    assert parse_line('Заголовок,https://tass ru/1')[1].startswith('链接不合法')
+
+
+def test_iter_links_dedups_by_key_but_yields_originals(tmp_path):
+    path = tmp_path / 'links.txt'
+    path.write_text('﻿A,http://tass.ru/ekonomika/1/\n'
+                    'B,https://tass.ru/ekonomika/1?utm_source=x\n'
+                    'плохая строка\n'
+                    'C,https://tass.ru/ekonomika/2?fromSite=a\n', encoding='utf-8')
+    problems = []
+    records = list(iter_links(str(path), verbose=False, problems=problems))
+    assert [r.url for r in records] == ['http://tass.ru/ekonomika/1/', 'https://tass.ru/ekonomika/2?fromSite=a']
+    assert len(problems) == 1
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+near_dup：不同子目录里的同名文件分别写出，不互相覆盖。
+"""
+
+import csv
+import os
+
+import near_dup
+from near_dup import NearDupDetector
+
+SENTENCE = 'Компания Huawei представила новую сеть пятого поколения в Москве сегодня'
+
+
+def _write_csv(path, url, sentence):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['序号', '链接', '标题', '匹配语料'])
+        writer.writerow([1, url, 'Huawei', sentence])
+
+
+def test_same_name_in_different_folders(tmp_path):
+    data = tmp_path / '数据'
+    tass = str(data / 'tass数据' / '20-21.csv')
+    rt = str(data / 'rt数据' / '20-21.csv')
+    _write_csv(tass, 'https://tass.ru/ekonomika/1', SENTENCE)
+    _write_csv(rt, 'https://russian.rt.com/news/2-huawei', SENTENCE + '.')
+
+    out_dir = str(tmp_path / '去重结果')
+    detector = NearDupDetector()
+    ids = near_dup.scan([tass, rt], detector)
+    assert near_dup.write_flagged(ids, detector, out_dir) == (2, 1, 2, 1)
+
+    with open(os.path.join(out_dir, 'tass数据', '20-21.csv'), encoding='utf-8-sig') as f:
+        tass_rows = list(csv.reader(f))
+    with open(os.path.join(out_dir, 'rt数据', '20-21.csv'), encoding='utf-8-sig') as f:
+        rt_rows = list(csv.reader(f))
+    assert tass_rows[1][1] == 'https://tass.ru/ekonomika/1'
+    assert tass_rows[1][-3] == '否'
+    assert rt_rows[1][1] == 'https://russian.rt.com/news/2-huawei'
+    assert rt_rows[1][-3] == '是'
+
+
+def test_output_paths_single_folder():
+    assert near_dup.output_paths(['数据/tass数据/a.csv', '数据/tass数据/b.csv'], 'out') == \
+        [os.path.join('out', 'a.csv'), os.path.join('out', 'b.csv')]
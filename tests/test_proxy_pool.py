@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+proxy_pool：经本机假代理真实发请求，验证哪些结果记在代理头上、何时冷却。
+"""
+
+import socket
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+import proxy_pool
+from proxy_pool import ProxyPool, start_stand_in_proxies
+
+# 假代理直接应答 http:// 请求，不会真正访问该地址
+URL = 'http://tass.ru/ekonomika/26126381'
+
+
+def _dead_proxy():
+    """一个没有人监听的本机端口"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f'http://127.0.0.1:{port}'
+
+
+def _state(pool, proxy):
+    return next(s for s in pool.states if s.proxy == proxy)
+
+
+def _get_through(pool, proxy, times):
+    """强制经指定代理请求 times 次，返回状态码列表"""
+    state = _state(pool, proxy)
+    codes = []
+    for _ in range(times):
+        try:
+            response = requests.get(URL, proxies=state.proxies_arg(), timeout=5)
+        except requests.exceptions.RequestException as e:
+            pool.report(state, elapsed=0.01, error=e)
+            codes.append(None)
+            continue
+        pool.report(state, status=response.status_code, elapsed=response.elapsed.total_seconds())
+        codes.append(response.status_code)
+    return codes
+
+
+def test_target_404_does_not_count_against_proxy():
+    fast, notfound = start_stand_in_proxies(('fast', 'notfound'))
+    pool = ProxyPool([fast, notfound], rate_per_min=600)
+
+    assert _get_through(pool, notfound, 5) == [404] * 5
+    state = _state(pool, notfound)
+    assert state.failures == 0
+    assert state.successes == 5
+    assert state.benched_until == 0.0
+
+
+@pytest.mark.parametrize('mode, code', [('broken', 502), ('auth', 407)])
+def test_proxy_side_statuses_count_as_failures(mode, code):
+    proxy, = start_stand_in_proxies((mode,))
+    pool = ProxyPool([proxy], rate_per_min=600)
+
+    assert _get_through(pool, proxy, 1) == [code]
+    state = _state(pool, proxy)
+    assert state.failures == 1
+    assert state.successes == 0
+
+
+def test_5xx_benches_after_consecutive_failures():
+    proxy, = start_stand_in_proxies(('broken',))
+    pool = ProxyPool([proxy], rate_per_min=600)
+
+    _get_through(pool, proxy, proxy_pool.MAX_CONSECUTIVE_FAILS - 1)
+    assert _state(pool, proxy).benched_until == 0.0
+    _get_through(pool, proxy, 1)
+    assert _state(pool, proxy).benched_until > 0
+    assert pool.pick('tass.ru') is None
+
+
+def test_407_and_429_bench_immediately():
+    auth, = start_stand_in_proxies(('auth',))
+    pool = ProxyPool([auth], rate_per_min=600)
+    _get_through(pool, auth, 1)
+    assert _state(pool, auth).benched_until > 0
+
+    state = pool.states[0]
+    state.benched_until = 0.0
+    pool.report(state, status=429, elapsed=0.01)
+    assert state.benched_until > 0
+    assert state.count_429(state.benched_until) == 1
+
+
+def test_connection_error_counts_and_benches():
+    dead = _dead_proxy()
+    pool = ProxyPool([dead], rate_per_min=600)
+
+    assert _get_through(pool, dead, proxy_pool.MAX_CONSECUTIVE_FAILS) == [None] * proxy_pool.MAX_CONSECUTIVE_FAILS
+    state = _state(pool, dead)
+    assert state.failures == proxy_pool.MAX_CONSECUTIVE_FAILS
+    assert state.benched_until > 0
+
+
+def test_request_errors_unrelated_to_proxy_are_neutral():
+    pool = ProxyPool(['direct'])
+    state = pool.states[0]
+    pool.report(state, error=requests.exceptions.TooManyRedirects('loop'))
+    assert (state.successes, state.failures) == (0, 0)
+
+
+def test_pool_get_prefers_healthy_proxy():
+    fast, broken = start_stand_in_proxies(('fast', 'broken'))
+    pool = ProxyPool([fast, broken], rate_per_min=600)
+
+    codes = [pool.get(URL, timeout=5).status_code for _ in range(10)]
+    assert codes.count(502) <= proxy_pool.MAX_CONSECUTIVE_FAILS
+    assert codes[-1] == 200
+    assert _state(pool, fast).failures == 0
+    assert _state(pool, fast).score(0) > _state(pool, broken).score(0)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+records：StringPool 驻留、LinkBatch 去重、ResultBatch 按列存储后逐条取回与原数据一致。
+"""
+
+from link_source import LinkRecord
+from records import LinkBatch, ResultBatch, StringPool
+
+ROWS = [
+    ('https://tass.ru/ekonomika/1', 'Huawei и 5G', 'Компания Huawei представила сеть 5G.', 'Huawei'),
+    ('https://tass.ru/ekonomika/1', 'Huawei и 5G', 'Хуавэй — крупнейший поставщик.', 'Хуавэй'),
+    ('https://russian.rt.com/news/2-huawei', '', '华为发布了新手机。😀', '华为'),
+    ('https://tass.ru/ekonomika/1', 'Huawei и 5G', '', 'Huawei'),
+]
+
+
+def test_string_pool_interns_once():
+    pool = StringPool()
+    a = pool.intern('https://tass.ru/ekonomika/1')
+    assert pool.intern('https://tass.ru/ekonomika/1') == a
+    assert pool.intern(None) == pool.intern('')
+    assert len(pool) == 2
+    assert pool[a] == 'https://tass.ru/ekonomika/1'
+
+
+def test_result_batch_round_trip():
+    batch = ResultBatch()
+    for url, title, sentence, keyword in ROWS:
+        batch.append(url, sentence, title=title, keyword=keyword)
+
+    assert len(batch) == len(ROWS)
+    assert [(r.url, r.title, r.sentence, r.keyword) for r in batch] == ROWS
+    assert batch[2].sentence == '华为发布了新手机。😀'
+    # URL 变化时文章序号递增，回到旧 URL 视为新的一篇
+    assert [r.article for r in batch] == [1, 1, 2, 3]
+    assert batch.article_count() == 2
+    # URL / 标题 / 关键词只存一份
+    assert len(batch.pool) == len({s for row in ROWS for s in (row[0], row[1], row[3])})
+    assert batch.nbytes() == len(batch.text) + 4 * 4 * len(ROWS) + 8 * (len(ROWS) + 1)
+
+
+def test_result_batch_extend_and_explicit_article():
+    batch = ResultBatch()
+    batch.extend('https://tass.ru/ekonomika/1', ['a', 'b'], title='T', keyword='Huawei', article=7)
+    assert [(r.article, r.sentence, r.title, r.keyword) for r in batch] == [
+        (7, 'a', 'T', 'Huawei'), (7, 'b', 'T', 'Huawei')]
+
+
+def test_link_batch_dedups_by_url_and_shares_pool():
+    pool = StringPool()
+    links = LinkBatch(pool)
+    assert links.add('Huawei', 'https://tass.ru/ekonomika/1')
+    assert not links.add('Другой заголовок', 'https://tass.ru/ekonomika/1')
+    assert links.add('ZTE', 'https://tass.ru/ekonomika/2')
+    assert list(links) == [LinkRecord('Huawei', 'https://tass.ru/ekonomika/1'),
+                           LinkRecord('ZTE', 'https://tass.ru/ekonomika/2')]
+    assert links[1].url == 'https://tass.ru/ekonomika/2'
+
+    results = ResultBatch(pool)
+    results.append('https://tass.ru/ekonomika/1', 'Huawei', title='Huawei')
+    assert results.urls[0] == pool.intern('https://tass.ru/ekonomika/1')
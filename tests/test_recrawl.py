@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+recrawl：复查间隔的自适应，以及 check_page 在 304 / 未变 / 变化 / 下线时的处理（请求用假的 fetch_stream 代替）。
+"""
+
+import csv
+
+import pytest
+
+pytest.importorskip('requests')
+
+import recrawl
+from recrawl import DAY, MAX_INTERVAL, MIN_INTERVAL, ChangeWriter, RecrawlStore, next_interval
+from ru_match import KeywordMatcher
+
+URL = 'https://tass.ru/ekonomika/26126381'
+BODY = 'Компания Huawei представила новую сеть в Москве. Погода была хорошей весь день.'
+EDITED = BODY + ' Позже Huawei уточнила сроки запуска сети.'
+
+
+def test_next_interval_grows_and_shrinks():
+    assert next_interval(10 * DAY, False) == pytest.approx(10 * DAY * recrawl.GROW)
+    assert next_interval(10 * DAY, True) == pytest.approx(10 * DAY * recrawl.SHRINK)
+    # 首次检查只建立基线，间隔不变
+    assert next_interval(10 * DAY, None) == 10 * DAY
+
+
+def test_next_interval_is_clamped():
+    assert next_interval(MIN_INTERVAL, True) == MIN_INTERVAL
+    assert next_interval(MAX_INTERVAL, False) == MAX_INTERVAL
+
+
+def test_next_interval_leans_on_section_rate_only_for_new_pages():
+    busy = next_interval(30 * DAY, None, section_rate=1.0, compared=0)
+    quiet = next_interval(30 * DAY, None, section_rate=0.0, compared=0)
+    assert busy < 30 * DAY < quiet
+    assert busy == pytest.approx((30 * DAY * MIN_INTERVAL) ** 0.5)
+    # 本页已比较足够多次后不再参考栏目
+    assert next_interval(30 * DAY, None, section_rate=1.0, compared=recrawl.PRIOR_CHECKS) == 30 * DAY
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    store = RecrawlStore(str(tmp_path / 'recrawl.db'))
+    store.seed({URL: {'title': 'Huawei', 'source': 'tass', 'published': '2021-03-05',
+                      'sentences': ['Компания Huawei представила новую сеть в Москве.']}})
+    out = str(tmp_path / 'changes.csv')
+    writer = ChangeWriter(out)
+    responses = []
+    sent_headers = []
+
+    def fake_fetch_stream(url, headers=None, timeout=None):
+        sent_headers.append(headers)
+        status, text = responses.pop(0)
+        return {'url': url, 'status': status, 'text': text, 'reason': None,
+                'headers': {'ETag': '"v1"'} if status == 200 else {}}
+
+    monkeypatch.setattr(recrawl.hedged_fetch, 'fetch_stream', fake_fetch_stream)
+
+    def check(status, text=''):
+        responses.append((status, text))
+        page = store.due(1, now=float('inf'))[0]
+        return recrawl.check_page(store, page, KeywordMatcher(recrawl.KEYWORDS), writer, {}), page
+
+    yield store, check, sent_headers, writer, out
+    writer.close()
+
+
+def _row(store):
+    return store.conn.execute(
+        "SELECT status, compared, changes, interval, etag FROM pages WHERE url = ?", (URL,)).fetchone()
+
+
+def _changes(writer, out):
+    writer.f.flush()
+    with open(out, encoding='utf-8-sig') as f:
+        return [(r[4], r[5]) for r in list(csv.reader(f))[1:]]
+
+
+def test_check_page_branches(env):
+    store, check, sent_headers, writer, out = env
+
+    result, page = check(200, BODY)
+    assert result == 'baseline'
+    assert _row(store)[:3] == ('active', 0, 0)
+    assert _changes(writer, out) == []
+
+    result, page = check(200, BODY)
+    assert result == 'unchanged'
+    assert sent_headers[-1]['If-None-Match'] == '"v1"'
+    status, compared, changes, interval, _ = _row(store)
+    assert (compared, changes) == (1, 0)
+    assert interval == pytest.approx(min(MAX_INTERVAL, page['interval'] * recrawl.GROW))
+
+    result, page = check(304)
+    assert result == 'not_modified'
+    assert _row(store)[1:3] == (2, 0)
+
+    result, page = check(200, EDITED)
+    assert result == 'changed'
+    status, compared, changes, interval, _ = _row(store)
+    assert (compared, changes) == (3, 1)
+    assert interval == pytest.approx(max(MIN_INTERVAL, page['interval'] * recrawl.SHRINK))
+    assert _changes(writer, out) == [('新增', 'Позже Huawei уточнила сроки запуска сети.')]
+    assert store.sentences(URL) == {'Компания Huawei представила новую сеть в Москве.',
+                                    'Позже Huawei уточнила сроки запуска сети.'}
+
+    result, page = check(404)
+    assert result == 'gone'
+    assert _row(store)[0] == 'gone'
+    assert store.due(1, now=float('inf')) == []
+
+
+def test_load_articles_uses_window_start(tmp_path):
+    folder = tmp_path / 'tass数据'
+    folder.mkdir()
+    with open(folder / 'tass21-22.csv', 'w', encoding='utf-8-sig', newline='') as f:
+        f.write('序号,链接,标题,匹配语料\n1,https://tass.ru/ekonomika/1,Huawei,Huawei представила сеть.\n')
+    articles = recrawl.load_articles(str(tmp_path))
+    assert articles['https://tass.ru/ekonomika/1']['published'] == '2021-01-01'
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""render_pool 与 extract_keywords 的渲染接入：本地静态页面，不访问外网"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import render_pool
+
+ARTICLE_PAGE = """<html><head><meta charset="utf-8"></head><body>
+<div class="article__text"><p>Компания Huawei представила новый смартфон в Москве.</p></div>
+<div id="feed"></div><button id="more">Показать ещё</button>
+<script>
+function next() {
+  document.getElementById('feed').innerHTML += '<p>Соседняя статья: Huawei упомянута в рекомендациях.</p>';
+}
+document.getElementById('more').onclick = next;
+window.onscroll = next;
+</script></body></html>"""
+
+PAGES = {'/search': render_pool.DEMO_PAGE, '/article': ARTICLE_PAGE}
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        page = PAGES.get(self.path)
+        body = (page or 'not found').encode('utf-8')
+        self.send_response(200 if page else 404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture(scope='module')
+def pool():
+    try:
+        pool = render_pool.RenderPool(size=1, scroll_pause=0.2)
+    except Exception as e:  # 没装 playwright 或浏览器
+        pytest.skip(f'无法启动无头浏览器: {e}')
+    yield pool
+    pool.close()
+
+
+class FakeRenderer:
+    """记录 render() 调用参数，返回固定 HTML"""
+
+    def __init__(self, html):
+        self.html = html
+        self.calls = []
+
+    def render(self, url, load_more=True, timeout=None):
+        self.calls.append((url, load_more))
+        return self.html
+
+
+def _extract_keywords():
+    pytest.importorskip('bs4')
+    pytest.importorskip('requests')
+    import extract_keywords
+    return extract_keywords
+
+
+def test_article_pages_render_without_load_more():
+    ek = _extract_keywords()
+    renderer = FakeRenderer(ARTICLE_PAGE)
+    sentences = ek.extract_sentences_with_keyword('https://russian.rt.com/news/1-x', 'Huawei', renderer=renderer)
+    assert renderer.calls == [('https://russian.rt.com/news/1-x', False)]
+    assert any('смартфон' in s for s in sentences)
+
+
+def test_listing_pages_render_with_load_more():
+    ek = _extract_keywords()
+    html = '<nav><a href="/about">О нас</a></nav>' + ''.join(
+        f'<p><a href="/news/{100000 + i}-huawei">Статья {i}</a></p>' for i in range(12))
+    renderer = FakeRenderer(html)
+    links = ek.extract_article_links('https://russian.rt.com/search?q=Huawei', limit=10, renderer=renderer)
+    assert renderer.calls == [('https://russian.rt.com/search?q=Huawei', True)]
+    assert len(links) == 10
+    assert all('/news/' in link for link in links)
+
+
+def test_harvest_loads_every_batch(site, pool):
+    links = pool.harvest_links(site + '/search')
+    assert len({url for _, url in links}) == 50
+
+
+def test_render_without_load_more_keeps_first_batch(site, pool):
+    html = pool.render(site + '/search', load_more=False)
+    assert html.count('/ekonomika/') == 10
+
+
+def test_article_render_does_not_pull_in_neighbours(site, pool):
+    assert 'Соседняя статья' not in pool.render(site + '/article', load_more=False)
+    assert 'Соседняя статья' in pool.render(site + '/article', load_more=True)
+
+
+def test_extract_article_links_with_browser(site, pool):
+    ek = _extract_keywords()
+    links = ek.extract_article_links(site + '/search', renderer=pool)
+    assert len(links) == 50
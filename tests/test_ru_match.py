@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""ru_match：展开后的正则不能比原来的 `kw.lower() in s.lower()` 少命中"""
+
+import csv
+import glob
+import os
+
+import pytest
+
+from ru_match import KeywordMatcher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILES = sorted(glob.glob(os.path.join(ROOT, '数据', '**', '*.csv'), recursive=True))
+# 抓取脚本里实际用过的关键词，外加几个常见变格的俄文词
+KEYWORD_SETS = [
+    ['Huawei', '华为', 'Хуавэй', 'Hua wei'],
+    ['Huawei'],
+    ['Путин'],
+    ['санкции'],
+    ['санкция'],
+    ['Китай'],
+    ['Россия'],
+    ['5G'],
+]
+
+
+@pytest.mark.parametrize('keyword, text', [
+    ('Путин', 'Встреча с Путиным'),
+    ('Путин', 'путинский курс'),
+    ('санкция', 'под санкциями'),
+    ('санкции', 'из-за санкций США'),
+    ('санкции', 'о санкциях'),
+    ('Хуавэй', 'смартфоны Хуавея'),
+    ('Хуавэй', 'компания Хуавей'),
+    ('Huawei', 'с компанией Хуавэем'),
+    ('Hua wei', 'Hua-Wei'),
+])
+def test_inflected_forms(keyword, text):
+    assert KeywordMatcher([keyword]).search(text)
+
+
+@pytest.mark.parametrize('keyword, text', [
+    ('Китай', 'стая китов'),
+    ('Китай', 'Никита Михалков'),
+    ('Путин', 'путь'),
+])
+def test_stem_needs_word_start(keyword, text):
+    assert KeywordMatcher([keyword]).search(text) is None
+
+
+@pytest.mark.skipif(not DATA_FILES, reason='没有 数据/ 语料')
+@pytest.mark.parametrize('keywords', KEYWORD_SETS, ids=lambda kws: '+'.join(kws))
+def test_no_hit_lost_against_substring_match(keywords):
+    matcher = KeywordMatcher(keywords)
+    lost = []
+    for path in DATA_FILES:
+        with open(path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+            for row in csv.reader(f):
+                for cell in row:
+                    if any(kw.lower() in cell.lower() for kw in keywords) and not matcher.search(cell):
+                        lost.append((os.path.basename(path), cell[:80]))
+    assert not lost, lost[:5]
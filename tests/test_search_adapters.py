@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+search_adapters：按样本解析，不访问外网。
+
+tests/fixtures/search/ 中的 TASS 样本按 11.py 使用的接口报文结构（result.contents / has_more / search_after）整理，
+链接和标题取自 数据/tass链接；能访问 TASS 时用 `python search_adapters.py record tass …` 录下的真实响应替换。
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('requests')
+
+import crawl_metrics as metrics
+import search_adapters
+from search_adapters import AdapterError, TassAdapter
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'search')
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.text = body
+        self.content = body.encode('utf-8')
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'application/json; charset=utf-8'}
+        self.encoding = None
+
+
+class FakeSession:
+    """按 search_after 返回对应的样本页，记录请求参数"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.calls.append(dict(params or {}))
+        self.kwargs = kwargs
+        page = self.pages[(params or {}).get('search_after', '')]
+        return FakeResponse(_fixture(page) if page.endswith('.json') else page)
+
+
+def test_tass_first_page():
+    records, cursor = TassAdapter().parse_page(_fixture('tass_page1.json'), 'https://tass.ru/tbp/api/v1/search')
+    assert len(records) == 30
+    assert all(r.url.startswith('https://tass.ru/') for r in records)
+    assert records[0].title.startswith('"Авито"')
+    assert cursor and cursor.startswith('1764547200000_')
+
+
+def test_tass_last_page_has_no_cursor():
+    records, cursor = TassAdapter().parse_page(_fixture('tass_page2.json'), 'https://tass.ru/tbp/api/v1/search')
+    assert len(records) == 12
+    assert cursor is None
+
+
+def test_tass_pages_through_search_after(monkeypatch):
+    monkeypatch.setattr(metrics, 'PACING_ENABLED', False)
+    cursor = TassAdapter().parse_page(_fixture('tass_page1.json'), '')[1]
+    session = FakeSession({'': 'tass_page1.json', cursor: 'tass_page2.json'})
+    records = list(TassAdapter(session=session).iter_records('https://tass.ru/search?search=Huawei'))
+    assert len(records) == 42
+    assert len({r.url for r in records}) == 42
+    assert [c.get('search') for c in session.calls] == ['Huawei', 'Huawei']
+    assert session.calls[1]['search_after'] == cursor
+
+
+def test_tass_sends_the_same_cookies_as_11py(monkeypatch):
+    monkeypatch.setattr(metrics, 'PACING_ENABLED', False)
+    session = FakeSession({'': 'tass_page2.json'})
+    list(TassAdapter(session=session).iter_records('https://tass.ru/search?search=Huawei'))
+    assert session.kwargs['cookies'] == search_adapters.TASS_COOKIES
+    assert session.kwargs['headers']['referer'] == 'https://tass.ru/'
+
+
+def test_full_html_page_is_rejected(monkeypatch):
+    monkeypatch.setattr(metrics, 'PACING_ENABLED', False)
+    page = '<!DOCTYPE html><html><body><a href="/ekonomika/1">热门</a></body></html>'
+    with pytest.raises(AdapterError):
+        TassAdapter().parse_page(page, 'https://tass.ru/tbp/api/v1/search')
+    # 第二页才变成整页 HTML 时停止翻页，保留第一页的结果
+    cursor = TassAdapter().parse_page(_fixture('tass_page1.json'), '')[1]
+    session = FakeSession({'': 'tass_page1.json', cursor: page})
+    records = list(TassAdapter(session=session).iter_records('https://tass.ru/search?search=Huawei'))
+    assert len(records) == 30
+
+
+def test_sites_without_adapter_use_html_paging(monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError('没有适配器的站点不应请求接口')
+
+    monkeypatch.setattr(search_adapters.requests, 'get', no_network)
+    assert isinstance(search_adapters.adapter_for('https://tass.ru/search?search=Huawei'), TassAdapter)
+    for url in ('https://russian.rt.com/search?q=Huawei', 'https://www.kommersant.ru/search/results?search_query=Huawei'):
+        assert search_adapters.adapter_for(url) is None
+        fallback_calls = []
+        links = search_adapters.article_links(url, limit=5,
+                                              fallback=lambda u, limit: fallback_calls.append(u) or ['x'])
+        assert links == ['x'] and fallback_calls == [url]
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+stage_profile：嵌套阶段的内存峰值。
+"""
+
+import tracemalloc
+
+import stage_profile
+
+
+def test_inner_stage_keeps_outer_peak(tmp_path):
+    profiler = stage_profile.StageProfiler(out_dir=str(tmp_path))
+    tracemalloc.start()
+    try:
+        profiler.enter('outer')
+        big = bytearray(20_000_000)
+        del big
+        profiler.enter('inner')
+        small = bytearray(1_000_000)
+        del small
+        profiler.exit('inner')
+        profiler.exit('outer')
+    finally:
+        tracemalloc.stop()
+
+    assert profiler.peaks['outer'] >= 20_000_000
+    assert 1_000_000 <= profiler.peaks['inner'] < 20_000_000
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+stream_fetch：按 RT 文章页的结构解析，不访问外网。
+
+tests/fixtures/stream/rt_article.html 按 russian.rt.com 文章页的标记整理（article 外层里
+article__summary、article__cover、article__text 并列，后面还有“читайте также”块和页脚），
+正文文字为示例；能访问 RT 时用真实页面替换。
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+import stream_fetch
+from stream_fetch import ARTICLE_CONTAINERS, ArticleStreamParser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'stream')
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _parse(html, container_re, chunk=97):
+    parser = ArticleStreamParser(container_re)
+    for i in range(0, len(html), chunk):
+        parser.feed(html[i:i + chunk])
+        if parser.done:
+            break
+    return parser
+
+
+def test_rt_collects_summary_and_body():
+    parser = _parse(_fixture('rt_article.html'), ARTICLE_CONTAINERS['russian.rt.com'])
+    text = parser.text()
+    assert parser.found and parser.done
+    assert 'Эксперты прокомментировали' in text
+    assert 'выпустит новые смартфоны' in text
+    assert 'ограничения против Huawei' in text
+    # 外层 article 闭合即停：“читайте также”块和页脚不收
+    assert 'Читайте также' not in text
+    assert 'ТВ-Новости' not in text
+    assert 'Новости Экономика' not in text
+
+
+def test_inline_tags_do_not_glue_words():
+    text = _parse(_fixture('rt_article.html'), ARTICLE_CONTAINERS['russian.rt.com']).text()
+    assert 'Компания Huawei заявила' in text
+    assert 'представитель компании на пресс-конференции в Пекине' in text
+
+
+def test_single_container_stops_when_wrapper_closes():
+    html = ('<html><body><div class="page"><div class="article__text"><p>Первый абзац.</p>'
+            '<p>Второй <b>абзац</b>.</p></div></div><div class="footer">подвал</div></body></html>')
+    parser = _parse(html, ARTICLE_CONTAINERS['tass.ru'], chunk=10)
+    assert parser.done
+    assert parser.text() == 'Первый абзац. Второй абзац .'
+
+
+def test_no_container_falls_back_to_page_text():
+    parser = _parse('<html><body><p>Просто текст</p><script>x=1</script></body></html>',
+                    ARTICLE_CONTAINERS['tass.ru'])
+    assert not parser.found
+    assert parser.text() == 'Просто текст'
+
+
+@pytest.fixture
+def rt_server():
+    body = _fixture('rt_article.html').encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/russia/article/123-huawei'
+    server.shutdown()
+
+
+def test_fetch_article_stream_rt_page(rt_server):
+    outcome = stream_fetch.fetch_article_stream(
+        rt_server, container_re=ARTICLE_CONTAINERS['russian.rt.com'], pool=None)
+    assert outcome['status'] == 200
+    assert outcome['reason'] == 'container closed'
+    assert outcome['found_container']
+    assert 'Эксперты прокомментировали' in outcome['text']
+    assert 'ограничения против Huawei' in outcome['text']
+    assert 'article:published_time' in outcome['date_markup']
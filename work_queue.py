@@ -0,0 +1,414 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多机分布式抓取：SQLite 持久化任务队列 + 租约（lease）机制。
+
+1. 协调端导入链接文件，建立任务队列（URL 为主键，天然去重）：
+    python work_queue.py init "数据/tass链接/*.txt"
+2. 协调端开放 HTTP 接口，供其他机器上的 worker 领取任务：
+    python work_queue.py serve --port 8765
+3. 任意多台机器 / 进程启动 worker：
+    python work_queue.py work --server http://协调端IP:8765
+   同一台机器也可以直接连数据库：
+    python work_queue.py work --db crawl_queue.db
+4. 查看进度、导出结果：
+    python work_queue.py status
+    python work_queue.py export --out huawei_corpus_queue.csv
+
+worker 领取任务时拿到一个有时限的租约，处理期间后台线程定时续约（心跳）；
+机器宕机后租约过期，任务会被其他 worker 自动重新领取。
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+import stage_profile
+from link_source import iter_links
+
+# --- 配置 ---
+DB_FILE = "crawl_queue.db"
+LEASE_SECONDS = 120       # 单个租约时长
+BATCH_SIZE = 5            # 每次领取的任务数
+MAX_ATTEMPTS = 5          # 单条链接最大尝试次数，超过记为 failed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT UNIQUE NOT NULL,
+    title TEXT,
+    source TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, lease_until);
+CREATE TABLE IF NOT EXISTS results (
+    task_id INTEGER NOT NULL,
+    sentence TEXT NOT NULL,
+    UNIQUE(task_id, sentence)
+);
+"""
+
+
+class SqliteQueue:
+    """基于 SQLite 的租约队列，同一台机器上的多个进程可以直接共享"""
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add_links(self, links, source=None):
+        """批量导入 (title, url)，重复 URL 自动忽略，返回新增数量"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO tasks (url, title, source, updated) VALUES (?, ?, ?, ?)",
+            ((url, title, source, now) for title, url in links))
+        added = conn.total_changes - before
+        conn.execute('COMMIT')
+        return added
+
+    def lease(self, owner, n=BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+        """领取最多 n 个任务：pending 或租约已过期的 leased"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        # 多次租约过期仍未完成的任务（例如总让 worker 卡死的页面）直接记为 failed
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', error = 'lease expired', updated = ? "
+            "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+            (now, now, MAX_ATTEMPTS))
+        rows = conn.execute(
+            "SELECT id, url, title FROM tasks "
+            "WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+            "ORDER BY id LIMIT ?", (now, n)).fetchall()
+        conn.executemany(
+            "UPDATE tasks SET status = 'leased', owner = ?, lease_until = ?, "
+            "attempts = attempts + 1, updated = ? WHERE id = ?",
+            ((owner, now + lease_seconds, now, row[0]) for row in rows))
+        conn.execute('COMMIT')
+        return [{'id': r[0], 'url': r[1], 'title': r[2]} for r in rows]
+
+    def heartbeat(self, owner, urls, lease_seconds=LEASE_SECONDS):
+        """续约：只续自己仍持有的任务，返回续约成功的数量"""
+        if not urls:
+            return 0
+        conn = self._conn()
+        now = time.time()
+        cur = conn.executemany(
+            "UPDATE tasks SET lease_until = ?, updated = ? "
+            "WHERE url = ? AND owner = ? AND status = 'leased'",
+            ((now + lease_seconds, now, url, owner) for url in urls))
+        return cur.rowcount
+
+    def complete(self, owner, url, sentences):
+        """提交结果；租约已被他人接手时丢弃，返回是否成功"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute(
+            "SELECT id FROM tasks WHERE url = ? AND owner = ? AND status = 'leased'",
+            (url, owner)).fetchone()
+        if row is None:
+            conn.execute('ROLLBACK')
+            return False
+        conn.executemany(
+            "INSERT OR IGNORE INTO results (task_id, sentence) VALUES (?, ?)",
+            ((row[0], s) for s in sentences))
+        conn.execute(
+            "UPDATE tasks SET status = 'done', lease_until = NULL, error = NULL, updated = ? "
+            "WHERE id = ?", (time.time(), row[0]))
+        conn.execute('COMMIT')
+        return True
+
+    def fail(self, owner, url, error, max_attempts=MAX_ATTEMPTS):
+        """失败：未超过最大次数则放回队列，否则标记 failed"""
+        conn = self._conn()
+        conn.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "owner = NULL, lease_until = NULL, error = ?, updated = ? "
+            "WHERE url = ? AND owner = ? AND status = 'leased'",
+            (max_attempts, str(error)[:500], time.time(), url, owner))
+
+    def stats(self):
+        conn = self._conn()
+        now = time.time()
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        counts['expired'] = conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status = 'leased' AND lease_until < ?",
+            (now,)).fetchone()[0]
+        counts['sentences'] = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return counts
+
+    def export_csv(self, output_file):
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT t.url, t.title, r.sentence FROM results r JOIN tasks t ON t.id = r.task_id "
+            "ORDER BY t.id, r.rowid")
+        count = 0
+        with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['序号', '链接', '标题', '匹配语料'])
+            for count, (url, title, sentence) in enumerate(rows, 1):
+                writer.writerow([count, url, title, sentence])
+        return count
+
+
+class RemoteQueue:
+    """通过协调端 HTTP 接口访问队列，接口与 SqliteQueue 相同"""
+
+    def __init__(self, server):
+        self.server = server.rstrip('/')
+
+    def _post(self, path, payload):
+        data = json.dumps(payload).encode('utf-8')
+        req = Request(self.server + path, data=data, headers={'Content-Type': 'application/json'})
+        with urlopen(req, timeout=30) as resp:
+            return json.loads(resp.read().decode('utf-8'))
+
+    def lease(self, owner, n=BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+        return self._post('/lease', {'owner': owner, 'n': n, 'lease_seconds': lease_seconds})
+
+    def heartbeat(self, owner, urls, lease_seconds=LEASE_SECONDS):
+        return self._post('/heartbeat', {'owner': owner, 'urls': urls, 'lease_seconds': lease_seconds})
+
+    def complete(self, owner, url, sentences):
+        return self._post('/complete', {'owner': owner, 'url': url, 'sentences': sentences})
+
+    def fail(self, owner, url, error, max_attempts=MAX_ATTEMPTS):
+        return self._post('/fail', {'owner': owner, 'url': url, 'error': str(error)})
+
+    def stats(self):
+        with urlopen(self.server + '/stats', timeout=30) as resp:
+            return json.loads(resp.read().decode('utf-8'))
+
+
+def make_handler(queue):
+    class QueueHandler(BaseHTTPRequestHandler):
+        def _send(self, obj, code=200):
+            body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._send(queue.stats())
+            else:
+                self._send({'error': 'not found'}, 404)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            p = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+            if self.path == '/lease':
+                self._send(queue.lease(p['owner'], p.get('n', BATCH_SIZE),
+                                       p.get('lease_seconds', LEASE_SECONDS)))
+            elif self.path == '/heartbeat':
+                self._send(queue.heartbeat(p['owner'], p.get('urls', []),
+                                           p.get('lease_seconds', LEASE_SECONDS)))
+            elif self.path == '/complete':
+                self._send(queue.complete(p['owner'], p['url'], p.get('sentences', [])))
+            elif self.path == '/fail':
+                self._send(queue.fail(p['owner'], p['url'], p.get('error', '')))
+            else:
+                self._send({'error': 'not found'}, 404)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return QueueHandler
+
+
+class Heartbeat(threading.Thread):
+    """后台续约线程：定时为当前持有的任务续租"""
+
+    def __init__(self, queue, owner, lease_seconds):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.held = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            with self.lock:
+                urls = list(self.held)
+            try:
+                self.queue.heartbeat(self.owner, urls, self.lease_seconds)
+            except Exception as e:
+                print(f"⚠️ 心跳失败: {e}")
+
+
+def process_task(task, via_translate=False, pool=None):
+    """抓取单条链接并返回匹配句子，沿用 shoudongtass_v4 的匹配规则"""
+    import shoudongtass_v4 as v4
+    import crawl_metrics as metrics
+    import hedged_fetch
+
+    host = urlsplit(task['url']).netloc
+    with metrics.timer('fetch', host):
+        if via_translate:
+            content, _ = v4.get_with_retry(task['url'], pool=pool)
+            if content is None:
+                raise RuntimeError('Google 翻译中转多次重试失败')
+        else:
+            outcome = hedged_fetch.fetch_stream(task['url'], timeout=30, pool=pool)
+            if outcome['status'] != 200:
+                raise RuntimeError(outcome['reason'])
+            content = outcome['text']
+    with metrics.timer('extract', host):
+        return v4.extract_sentences(content)
+
+
+def run_worker(queue, owner, lease_seconds=LEASE_SECONDS, batch=BATCH_SIZE,
+               via_translate=False, idle_exit=True, pool=None):
+    hb = Heartbeat(queue, owner, lease_seconds)
+    hb.start()
+    done = 0
+    print(f"🚀 worker {owner} 启动")
+    try:
+        while True:
+            tasks = queue.lease(owner, batch, lease_seconds)
+            if not tasks:
+                if idle_exit:
+                    print("🏁 队列已空，worker 退出。")
+                    break
+                time.sleep(10)
+                continue
+            with hb.lock:
+                hb.held.update(t['url'] for t in tasks)
+            for task in tasks:
+                print(f"[{owner}] 处理: {task['title'][:20]}...", end=" ", flush=True)
+                try:
+                    sentences = process_task(task, via_translate, pool)
+                    if queue.complete(owner, task['url'], sentences):
+                        done += 1
+                        print(f"✅ 提交 {len(sentences)} 条")
+                    else:
+                        print("⚠️ 租约已失效，结果丢弃")
+                except Exception as e:
+                    print(f"❌ {e}")
+                    queue.fail(owner, task['url'], e)
+                finally:
+                    with hb.lock:
+                        hb.held.discard(task['url'])
+    except KeyboardInterrupt:
+        print("\n👋 用户中断，未完成的租约到期后会自动回到队列。")
+    finally:
+        hb.stopped.set()
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分布式抓取任务队列')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p_init = sub.add_parser('init', help='导入链接文件（支持通配符）')
+    p_init.add_argument('patterns', nargs='+')
+    p_init.add_argument('--db', default=DB_FILE)
+    p_init.add_argument('--no-filter', action='store_true', help='不做抓取前链接过滤')
+    p_init.add_argument('--filter-model', action='store_true', help='规则判断不了的链接交给打分器（先运行 link_filter.py train）')
+
+    p_serve = sub.add_parser('serve', help='启动协调端 HTTP 接口')
+    p_serve.add_argument('--db', default=DB_FILE)
+    p_serve.add_argument('--host', default='0.0.0.0')
+    p_serve.add_argument('--port', type=int, default=8765)
+
+    p_work = sub.add_parser('work', help='启动 worker')
+    p_work.add_argument('--db', default=DB_FILE)
+    p_work.add_argument('--server', help='协调端地址，例如 http://10.0.0.2:8765')
+    p_work.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}")
+    p_work.add_argument('--lease', type=int, default=LEASE_SECONDS)
+    p_work.add_argument('--batch', type=int, default=BATCH_SIZE)
+    p_work.add_argument('--via-translate', action='store_true', help='经 Google 翻译中转抓取')
+    p_work.add_argument('--forever', action='store_true', help='队列空了也不退出')
+    p_work.add_argument('--proxies', help='代理列表文件，见 proxy_pool.py')
+    p_work.add_argument('--metrics-port', type=int, help='开放 Prometheus 指标接口')
+
+    p_status = sub.add_parser('status', help='查看队列进度')
+    p_status.add_argument('--db', default=DB_FILE)
+    p_status.add_argument('--server')
+
+    p_export = sub.add_parser('export', help='导出结果 CSV')
+    p_export.add_argument('--db', default=DB_FILE)
+    p_export.add_argument('--out', default='huawei_corpus_queue.csv')
+
+    args = parser.parse_args()
+
+    if args.cmd == 'init':
+        queue = SqliteQueue(args.db)
+        link_filter = None
+        if not args.no_filter:
+            from link_filter import LinkFilter
+            link_filter = LinkFilter(use_model=args.filter_model)
+        for pattern in args.patterns:
+            for path in sorted(glob.glob(pattern)):
+                links = list(iter_links(path))
+                total = len(links)
+                if link_filter is not None:
+                    # 高分链接先入队，先被领取
+                    links = link_filter.filter_links(links)
+                added = queue.add_links(links, source=path)
+                print(f"📥 {path}: {total} 条链接，过滤后 {len(links)} 条，新增 {added} 条")
+        print(f"📊 {queue.stats()}")
+    elif args.cmd == 'serve':
+        queue = SqliteQueue(args.db)
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(queue))
+        print(f"🛰️ 协调端已启动: http://{args.host}:{args.port}  数据库: {args.db}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 协调端退出。")
+    elif args.cmd == 'work':
+        queue = RemoteQueue(args.server) if args.server else SqliteQueue(args.db)
+        if args.metrics_port:
+            import crawl_metrics
+            crawl_metrics.serve(args.metrics_port)
+        pool = None
+        if args.proxies:
+            from proxy_pool import ProxyPool, load_proxies
+            pool = ProxyPool(load_proxies(args.proxies))
+        done = run_worker(queue, args.worker_id, args.lease, args.batch,
+                          args.via_translate, idle_exit=not args.forever, pool=pool)
+        print(f"✨ 本 worker 共完成 {done} 条。")
+    elif args.cmd == 'status':
+        queue = RemoteQueue(args.server) if args.server else SqliteQueue(args.db)
+        print(f"📊 {queue.stats()}")
+    elif args.cmd == 'export':
+        count = SqliteQueue(args.db).export_csv(args.out)
+        print(f"✓ 共导出 {count} 条语料至: {args.out}")
+
+
+if __name__ == "__main__":
+    with stage_profile.from_argv():
+        main()